@@ -1,3 +1,6 @@
-from . import bot
+def main():
+    """Entrypoint for the Discord Bot."""
+    # the bot is only imported here: worker processes import the package
+    from . import bot
 
-main = bot.main
+    bot.main()
@@ -17,10 +17,12 @@ from .commands import (
 )
 
 from . import db
+from . import decklists
+from . import registry
+from . import seating
 from . import utils
 from .tournament import Tournament
 
-
 # ####################################################################### Logging config
 logger = logging.getLogger()
 logging.basicConfig(
@@ -42,12 +44,15 @@ krcg.vtes.VTES.load()
 # ########################################################################### Bot events
 @bot.listen()
 async def on_ready(event: hikari.StartedEvent) -> None:
-    """Setup app commands and connect to the database."""
+    """Setup app commands, connect to the database and VEKN, start seating engine."""
     logger.info("Ready as %s", bot.get_me().username)
     await db.POOL.open()
     if RESET:
         await db.reset()
     await db.init()
+    await registry.CLIENT.open()
+    await decklists.CLIENT.open()
+    seating.start()
     if not APPLICATION:
         APPLICATION.append(await bot.rest.fetch_application())
     application = APPLICATION[-1]
@@ -80,8 +85,11 @@ async def on_ready(event: hikari.StartedEvent) -> None:
 
 @bot.listen()
 async def on_stopped(event: hikari.StoppedEvent) -> None:
-    """Disconnect from the database."""
+    """Disconnect from the database and VEKN, stop the seating engine."""
     await db.POOL.close()
+    await registry.CLIENT.close()
+    await decklists.CLIENT.close()
+    seating.shutdown()
 
 
 @bot.listen()
@@ -0,0 +1,131 @@
+"""Check a list of VEKN IDs# against the VEKN registry.
+
+The VEKN IDs# are read one per line, from a file or the standard input, and checked
+by a pool of workers (see `registry.Client.lookup_each`). A CSV row is written for
+each of them as soon as it is checked: VEKN ID#, validity, name (or error) and
+country. With an output file, an interrupted run can be resumed: the VEKN IDs#
+already in the output file are skipped. The VEKN IDs# that could not be checked
+(registry unavailable, authentication failure) are only logged, so that resuming
+checks them again.
+
+    archon-check-vekn [input] [-o output] [--resume] [--workers N]
+
+The VEKN credentials are read from the VEKN_LOGIN and VEKN_PASSWORD environment
+variables.
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import sys
+from typing import Iterable, Iterator, Optional, TextIO
+
+from . import registry
+
+logger = logging.getLogger()
+
+
+def read_vekns(lines: Iterable[str], skip: set[str]) -> Iterator[str]:
+    """VEKN IDs# from the input lines, lazily"""
+    for line in lines:
+        vekn = line.strip(" #\r\n")
+        if vekn and vekn not in skip:
+            yield vekn
+
+
+def checked_vekns(path: str) -> set[str]:
+    """VEKN IDs# already in an output file"""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            return {row[0] for row in csv.reader(f) if row}
+    except FileNotFoundError:
+        return set()
+
+
+async def check(
+    client: registry.Client, vekns: Iterable[str], output: TextIO
+) -> tuple[int, int]:
+    """Check the VEKN IDs#, write the rows as they come.
+
+    Return the numbers of VEKN IDs# checked and of those that could not be checked.
+    """
+    writer = csv.writer(output)
+    count = failed = 0
+    async for vekn, result in client.lookup_each(vekns):
+        if isinstance(result, registry.NotFound):
+            writer.writerow([vekn, False, str(result), ""])
+        elif isinstance(result, registry.VEKNError):
+            # not in the checkpoint: checked again on resume
+            logger.warning("Failed to check %s: %s", vekn, result)
+            failed += 1
+            continue
+        else:
+            writer.writerow([vekn, True, result.name, result.country])
+        # the output file is the checkpoint
+        output.flush()
+        count += 1
+    return count, failed
+
+
+async def _main(vekns: Iterable[str], output: TextIO, workers: int) -> tuple[int, int]:
+    # no need to keep the checked entries in memory
+    async with registry.Client(concurrency=workers, cache_size=0) as client:
+        return await check(client, vekns, output)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entrypoint for the VEKN IDs# check."""
+    parser = argparse.ArgumentParser(
+        prog="archon-check-vekn", description="Check VEKN IDs# (one per line)"
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=argparse.FileType("r", encoding="utf-8"),
+        default=sys.stdin,
+        help="VEKN IDs# file (default: standard input)",
+    )
+    parser.add_argument("-o", "--output", help="CSV file (default: standard output)")
+    parser.add_argument(
+        "-r",
+        "--resume",
+        action="store_true",
+        help="skip the VEKN IDs# already in the output file, append the others",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=registry.VEKN_CONCURRENCY,
+        help="concurrent requests to the registry",
+    )
+    args = parser.parse_args(argv)
+    if args.resume and not args.output:
+        parser.error("--resume requires an output file")
+    logging.basicConfig(level=logging.WARNING, format="[%(levelname)7s] %(message)s")
+    skip = checked_vekns(args.output) if args.resume else set()
+    vekns = read_vekns(args.input, skip)
+    if args.output:
+        output = open(
+            args.output, "a" if args.resume else "w", newline="", encoding="utf-8"
+        )
+    else:
+        output = sys.stdout
+    try:
+        count, failed = asyncio.run(_main(vekns, output, args.workers))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{count} VEKN IDs# checked, {len(skip)} already checked", file=sys.stderr)
+    if failed:
+        print(
+            f"{failed} VEKN IDs# could not be checked"
+            + (", use --resume to check them" if args.output else ""),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,11 +24,16 @@ import krcg.deck
 import krcg.vtes
 
 import chardet
+import psycopg
 import requests
 import stringcase
 
 
 from . import db
+from . import decklists
+from . import formats
+from . import registry
+from . import telemetry
 from . import tournament
 from . import utils
 from . import permissions as perm
@@ -46,53 +51,6 @@ VDB_URL = "https://vdb.im"
 AMARANTH_URL = "https://amaranth.vtes.co.nz"
 
 
-# We'll need cleaner VEKN csvs to replace this
-VTES_ABBREV_TO_SET = {
-    "Jyhad": "Jyhad",
-    "VTES": "Vampire: The Eternal Struggle",
-    "DS": "Dark Sovereigns",
-    "AH": "Ancient Hearts",
-    "Sabbat": "Sabbat",
-    "SW": "Sabbat War",
-    "FN": "Final Nights",
-    "BL": "Bloodlines",
-    "CE": "Camarilla Edition",
-    "Anarchs": "Anarchs",
-    "BH": "Black Hand",
-    "Gehenna": "Gehenna",
-    "Tenth": "Tenth Anniversary",
-    "KMW": "Kindred Most Wanted",
-    "LoB": "Legacies of Blood",
-    "NoR": "Nights of Reckoning",
-    "Third": "Third Edition",
-    "SoC": "Sword of Caine",
-    "LotN": "Lords of the Night",
-    "BSC": "Blood Shadowed Court",
-    "TR": "Twilight Rebellion",
-    "KoT": "Keepers of Tradition",
-    "KoTR": "Keepers of Tradition Reprint",
-    "EK": "Ebony Kingdom",
-    "HttB": "Heirs to the Blood",
-    "HttBR": "Heirs to the Blood Reprint",
-    "DM": "Danse Macabre",
-    "TU": "The Unaligned",
-    "AU": "Anarch Unbound",
-    "Anthology": "Anthology",
-    "Anthology I": "Anthology",  # hack because of VDB/VEKN mismatch here
-    "LK": "Lost Kindred",
-    "SP": "Sabbat Preconstructed",
-    "25th": "Twenty-Fifth Anniversary",
-    "FB": "First Blood",
-    "V5": "Fifth Edition",
-    "V5A": "Fifth Edition (Anarch)",
-    "NB": "New Blood",
-    "FoL": "Fall of London",
-    "SoB": "Shadows of Berlin",
-    "EoG": "Echoes of Gehenna",
-    "NB2": "New Blood II",
-}
-
-
 def build_command_tree(rest_api):
     """Hikari commands to submit to the Discord server on boot."""
     commands = {}
@@ -254,11 +212,23 @@ class DiscordExtra:
         default_factory=dict
     )
 
+    def __post_init__(self):
+        # reverse index (VEKN# -> discord ID), not serialized: rebuilt on decode
+        self._discord_ids = {v: k for k, v in self.players.items()}
+
     def get_vekn(self, discord_id: hikari.Snowflake) -> Optional[str]:
         return self.players.get(discord_id, None)
 
-    def get_discord_id(self, vekn: str) -> str:
-        return {v: k for k, v in self.players.items()}.get(vekn, None)
+    def get_discord_id(self, vekn: str) -> Optional[hikari.Snowflake]:
+        return self._discord_ids.get(vekn, None)
+
+    def set_player(self, discord_id: hikari.Snowflake, vekn: str) -> None:
+        """Link a discord user to a VEKN#, keeping the reverse index up to date."""
+        previous = self.players.get(discord_id, None)
+        if previous is not None and self._discord_ids.get(previous) == discord_id:
+            del self._discord_ids[previous]
+        self.players[discord_id] = vekn
+        self._discord_ids[vekn] = discord_id
 
     def role_name(self, role: Role, table_num: Optional[int] = None) -> str:
         if role == Role.ROOT_JUDGE:
@@ -410,6 +380,13 @@ class BaseInteraction:
             data,
         )
 
+    def speculate_seating(self) -> None:
+        """Check-in changes: compute the next round seating in the background.
+
+        Called by the registration and check-in commands, after `update()`.
+        """
+        self.tournament.speculate_seating((self.guild_id, self.category_id))
+
     def _is_judge(self) -> bool:
         """Check whether the author is a judge."""
         judge_role = self.discord.roles[Role.JUDGE]
@@ -1063,9 +1040,10 @@ class ConfigureTournament(BaseCommand):
                 limits.append("- Single clan (75%) in crypt")
             if self.tournament.flags & tournament.TournamentFlag.SINGLE_VAMPIRE:
                 limits.append("- Single vampire in crypt")
-            if self.tournament.include:
+            legality = self.tournament.legality()
+            if legality.include:
                 limits.append("- Limited list of allowed cards")
-            if self.tournament.exclude:
+            if legality.exclude:
                 limits.append("- Additional list of banned cards")
             embed.description += "\n**Limited tournament**\n" + "\n".join(limits) + "\n"
             embed.description += (
@@ -1200,18 +1178,16 @@ class Stagger(BaseCommand):
         ),
     ]
 
-    async def _progress(self, step, **kwargs) -> None:
-        """Progress bar for the start subcommand"""
-        chunk = tournament.ITERATIONS // 20
-        if step % chunk:
-            return
-        progress = step // chunk
-        await self.create_or_edit_response(
-            embed=hikari.Embed(
+    @staticmethod
+    def _progress(progress: float, **kwargs) -> dict:
+        """Progress bar for the seating computation"""
+        progress = min(20, int(progress * 20))
+        return {
+            "embed": hikari.Embed(
                 title="Computing seating...",
                 description="▇" * progress + "▁" * (20 - progress),
             )
-        )
+        }
 
     async def __call__(self, rounds_count: int) -> None:
         await self.create_or_edit_response(
@@ -1220,7 +1196,10 @@ class Stagger(BaseCommand):
                 description="▁" * 20,
             )
         )
-        await self.tournament.make_staggered(rounds_count, self._progress)
+        async with utils.ProgressReporter(
+            self.create_or_edit_response, self._progress
+        ) as progress:
+            await self.tournament.make_staggered(rounds_count, progress)
         await self.update()
         await self.create_or_edit_response(
             embed=hikari.Embed(
@@ -1288,6 +1267,24 @@ class DefineLimited(BaseCommand):
         ),
     ]
 
+    @staticmethod
+    def _progress(done: int, total: int) -> dict:
+        """Progress bar for the decks check"""
+        progress = 20 * done // total
+        return {
+            "embed": hikari.Embed(
+                title=f"Checking decks... ({done}/{total})",
+                description="▇" * progress + "▁" * (20 - progress),
+            )
+        }
+
+    @staticmethod
+    def _compile_format(data: dict) -> formats.Format:
+        try:
+            return formats.compile_format(data)
+        except ValueError as e:
+            raise CommandFailed(str(e))
+
     async def __call__(
         self,
         vdb_format: Optional[hikari.Snowflake] = None,
@@ -1308,66 +1305,26 @@ class DefineLimited(BaseCommand):
         else:
             self.tournament.include = []
             self.tournament.exclude = []
+            self.tournament.format = ""
         if vdb_format:
             if data.startswith("{"):
-                try:
-                    krcg.vtes.VTES.load()
-                except requests.HTTPError:
-                    raise CommandFailed("Failed to load VTES database.")
                 try:
                     data = json.loads(data)
-                    self.vdb_format = data
                 except json.JSONDecodeError:
                     raise CommandFailed("Invalid VDB format file.")
-                sets = set([k for k, v in data["sets"].items() if v])
-                allowed = set(
-                    [int(k) for k, v in data["allowed"]["crypt"].items() if v]
-                    + [int(k) for k, v in data["allowed"]["library"].items() if v]
-                )
-                banned = set(
-                    [int(k) for k, v in data["banned"]["crypt"].items() if v]
-                    + [int(k) for k, v in data["banned"]["library"].items() if v]
-                )
-                if allowed & banned:
-                    raise CommandFailed(
-                        "Invalid format: some cards are both allowed and banned"
-                    )
-                # hack for Anthology I
-                if "Anthology I" in sets:
-                    sets.pop("Anthology I")
-                    sets.add("Anthology")
-                    if not (101110 in allowed or "SoB" in sets):
-                        banned.add(101110)  # The Line
-                    if 102128 not in allowed:
-                        banned.add(102128)  # Vivenne Géroux
-                    if not (200030 in allowed or "EoG" in sets):
-                        banned.add(200030)  # Aisha az-Zahra
-                    if not (200081 in allowed or "SoB" in sets):
-                        banned.add(200081)  # André the Manipulator
-                    if not (200105 in allowed or "SoB" in sets):
-                        banned.add(200105)  # Anne-Marie Bourgeois
-                    if not (200123 in allowed or "EoG" in sets):
-                        banned.add(200123)  # Apolonia Czarnecki
-                    if not (200562 in allowed or "SoB" in sets):
-                        banned.add(200562)  # Hamid Mansour
-                    if not (200723 in allowed or "EoG" in sets):
-                        banned.add(200723)  # Joseph Fisher
-                    if not (200816 in allowed or "SoB" in sets):
-                        banned.add(200816)  # Laura Goldman
-                    if not (201321 in allowed or "EoG" in sets):
-                        banned.add(201321)  # Styles Margs
-                    if not (201465 in allowed or "SoB" in sets):
-                        banned.add(201465)  # Weirich Waldburg
-                sets = set([VTES_ABBREV_TO_SET[a] for a in sets])
-                if not sets and not allowed:
-                    self.tournament.include = []
-                    self.tournament.exclude = banned
-                else:
-                    cards = [c.id for c in krcg.vtes.VTES if set(c.sets.keys()) & sets]
-                    cards += allowed
-                    cards = sorted(set(cards) - banned)
-                    self.tournament.include = cards
-                    self.tournament.exclude = []
+                compiled = self._compile_format(data)
+                if set(compiled.sets) - formats.sets_index().keys():
+                    # new set released: refresh the cards database
+                    try:
+                        krcg.vtes.VTES.load()
+                    except requests.HTTPError:
+                        raise CommandFailed("Failed to load VTES database.")
+                    compiled = self._compile_format(data)
+                self.vdb_format = data
+                self.tournament.include = []
+                self.tournament.exclude = []
+                self.tournament.format = compiled.digest
+                sets, allowed, banned = compiled.sets, compiled.allowed, compiled.banned
                 if sets:
                     description += (
                         "- The following sets are included:\n"
@@ -1402,6 +1359,7 @@ class DefineLimited(BaseCommand):
             self.vdb_format = {}
             self.tournament.include = []
             self.tournament.exclude = cards
+            self.tournament.format = ""
             if cards and len(cards) < 20:
                 description += (
                     "- The following cards are excluded:\n"
@@ -1423,14 +1381,12 @@ class DefineLimited(BaseCommand):
             else:
                 self.tournament.flags &= ~tournament.TournamentFlag.SINGLE_VAMPIRE
         # Recheck existing decks
-        rejected_decks = []
-        for player in self.tournament.players.values():
-            if player.deck:
-                deck = krcg.deck.Deck()
-                deck.from_json(player.deck)
-                if self.tournament.check_deck(deck):
-                    player.deck = {}
-                    rejected_decks.append(player.vekn)
+        async with utils.ProgressReporter(
+            self.create_or_edit_response, self._progress
+        ) as progress:
+            rejected_decks = list(await self.tournament.check_decks(progress))
+        for vekn in rejected_decks:
+            self.tournament.players[vekn].deck = {}
         await self.update()
         comp = []
         if self.vdb_format:
@@ -1646,7 +1602,7 @@ class Register(BaseCommand):
         player = await self.tournament.add_player(
             vekn=vekn, prev_vekn=prev_vekn, name=name, judge=False
         )
-        self.discord.players[discord_id] = player.vekn
+        self.discord.set_player(discord_id, player.vekn)
         await self.bot.rest.add_role_to_member(
             self.guild_id,
             discord_id,
@@ -1677,6 +1633,7 @@ class Register(BaseCommand):
             )
         description += f"\nUse {Status.mention()} anytime to check your status."
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response(
             embed=hikari.Embed(
                 title="Registered",
@@ -1740,7 +1697,7 @@ class RegisterPlayer(BaseCommand):
             vekn=vekn, prev_vekn=prev_vekn, name=name, judge=True
         )
         if user:
-            self.discord.players[user] = player.vekn
+            self.discord.set_player(user, player.vekn)
             await self.bot.rest.add_role_to_member(
                 self.guild_id,
                 user,
@@ -1748,6 +1705,7 @@ class RegisterPlayer(BaseCommand):
                 reason=self.reason,
             )
         await self.update()
+        self.speculate_seating()
         player_display = self._player_display(player.vekn)
         description = f"{player_display} is successfully registered for the tournament."
         if player.playing:
@@ -1837,6 +1795,7 @@ class CheckIn(BaseCommand):
             )
         description += f"\nUse {Status.mention()} anytime to check your status."
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response(
             embed=hikari.Embed(
                 title=title,
@@ -1863,6 +1822,17 @@ class BatchRegister(BaseCommand):
         ),
     ]
 
+    @staticmethod
+    def _progress(done: int, total: int) -> dict:
+        """Progress bar for the VEKN IDs# check"""
+        progress = 20 * done // total
+        return {
+            "embed": hikari.Embed(
+                title=f"Checking VEKN IDs#... ({done}/{total})",
+                description="▇" * progress + "▁" * (20 - progress),
+            )
+        }
+
     async def __call__(
         self,
         file: hikari.Snowflake,
@@ -1873,7 +1843,8 @@ class BatchRegister(BaseCommand):
         data = data.decode(encoding=chardet.detect(data)["encoding"])
         sniffer = csv.Sniffer()
         dialect = sniffer.sniff(data, ",;\t|")
-        data = data.splitlines()[1 if sniffer.has_header(data) else 0 :]
+        header = 1 if sniffer.has_header(data) else 0
+        data = data.splitlines()[header:]
         try:
             players = [
                 [vekn, name, url]
@@ -1888,21 +1859,52 @@ class BatchRegister(BaseCommand):
                 "(vekn, name, decklist_url)."
             )
             return
-        await asyncio.gather(
-            *(
-                self.tournament.add_player(vekn=vekn, name=name, judge=True)
-                for vekn, name, _ in players
+        async with utils.ProgressReporter(
+            self.create_or_edit_response, self._progress
+        ) as progress:
+            errors = await self.tournament.add_players(
+                [(vekn, name) for vekn, name, _ in players], progress
             )
-        )
-        for vekn, _, url in players:
-            if url:
-                deck = krcg.deck.Deck.from_url(url)
+        with_deck = [
+            index
+            for index, (_, _, url) in enumerate(players)
+            if url and index not in errors
+        ]
+        # all decks are fetched concurrently
+        decks = await decklists.CLIENT.decks(players[i][2] for i in with_deck)
+        # the players are registered anyway
+        deck_errors = {}
+        for index, deck in zip(with_deck, decks):
+            if isinstance(deck, decklists.DeckError):
+                deck_errors[index] = str(deck)
+                continue
+            vekn = players[index][0]
+            try:
                 self.tournament.add_player_deck(vekn=vekn, deck=deck)
+            except CommandFailed as e:
+                deck_errors[index] = str(e)
         await self.update()
+        self.speculate_seating()
+        description = (
+            f"{len(players) - len(errors)} players registered.\n"
+            f"Use {PlayersList.mention()} to diplay the players list."
+        )
+        if errors:
+            description += f"\n\n⚠️ **{len(errors)} lines failed:**\n" + "\n".join(
+                f"- Line {header + index + 1} ({players[index][0]}): {error}"
+                for index, error in sorted(errors.items())
+            )
+        if deck_errors:
+            description += (
+                f"\n\n⚠️ **{len(deck_errors)} players registered without deck:**\n"
+                + "\n".join(
+                    f"- Line {header + index + 1} ({players[index][0]}): {error}"
+                    for index, error in sorted(deck_errors.items())
+                )
+            )
         await self.create_or_edit_response(
-            embed=hikari.Embed(
-                title="File uploaded",
-                description=f"Use {PlayersList.mention()} to diplay the players list.",
+            embeds=_paginate_embed(
+                hikari.Embed(title="File uploaded", description=description)
             ),
             flags=hikari.MessageFlag.EPHEMERAL,
         )
@@ -1919,6 +1921,7 @@ class OpenCheckIn(BaseCommand):
     async def __call__(self) -> None:
         self.tournament.open_checkin()
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response("Check-in is open")
 
 
@@ -1940,6 +1943,7 @@ class Drop(BaseCommand):
         )
         self.tournament.drop(vekn)
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response(
             "Dropped",
             flags=hikari.MessageFlag.EPHEMERAL,
@@ -1980,6 +1984,7 @@ class DropPlayer(BaseCommand):
             )
         self.tournament.drop(vekn)
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response("Dropped")  # cannot display them anymore
 
 
@@ -2027,6 +2032,7 @@ class Disqualify(BaseCommand):
                 vekn, self.author.id, tournament.NoteLevel.WARNING, note
             )
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response(
             f"{player_display} Disqualified",
             user_mentions=[user] if user else [],
@@ -2069,7 +2075,11 @@ class UploadDeck(BaseCommand):
             )
             return
         if url:
-            deck = krcg.deck.Deck.from_url(url)
+            await self.deferred(flags=hikari.MessageFlag.EPHEMERAL)
+            try:
+                deck = await decklists.CLIENT.deck(url)
+            except decklists.DeckError as e:
+                raise CommandFailed(str(e))
             await self.check_and_add_deck(vekn, deck, judge)
             return
         if file:
@@ -2300,6 +2310,14 @@ class Round(BaseCommand):
             type=hikari.OptionType.SUB_COMMAND,
             name="start",
             description="Start the next round",
+            options=[
+                hikari.CommandOption(
+                    type=hikari.OptionType.BOOLEAN,
+                    name="reseat",
+                    description="Compute a new seating, even if one is cached",
+                    is_required=False,
+                )
+            ],
         ),
         hikari.CommandOption(
             type=hikari.OptionType.SUB_COMMAND,
@@ -2374,18 +2392,16 @@ class Round(BaseCommand):
                 **{subopt.name: subopt.value for subopt in (option.options or [])}
             )
 
-    async def _progress(self, step, **kwargs) -> None:
+    @staticmethod
+    def _progress(progress: float, **kwargs) -> dict:
         """Progress bar for the start subcommand"""
-        chunk = tournament.ITERATIONS // 20
-        if step % chunk:
-            return
-        progress = step // chunk
-        await self.create_or_edit_response(
-            embed=hikari.Embed(
+        progress = min(20, int(progress * 20))
+        return {
+            "embed": hikari.Embed(
                 title="Seating players...",
                 description="▇" * progress + "▁" * (20 - progress),
             )
-        )
+        }
 
     async def _display_seating(self, table_num) -> None:
         """Display the seating in the table channel."""
@@ -2406,10 +2422,11 @@ class Round(BaseCommand):
         embed.set_thumbnail(hikari.UnicodeEmoji("🪑"))
         await self.bot.rest.create_message(voice_channel, embed=embed)
 
-    async def start(self) -> None:
+    async def start(self, reseat: bool = False) -> None:
         """Start a round. Dynamically optimise seating to follow official VEKN rules.
 
         Assign roles and create text and voice channels for players.
+        Seatings are cached, use reseat to get a new one (eg. after a reset).
         """
         players_count = len([p for p in self.tournament.players.values() if p.playing])
         if players_count in [6, 7, 11] and not (
@@ -2432,7 +2449,27 @@ class Round(BaseCommand):
                 description="_" * 20,
             )
         )
-        round, score = await self.tournament.start_round(self._progress)
+        async with utils.ProgressReporter(
+            self.create_or_edit_response, self._progress
+        ) as progress:
+            round, result = await self.tournament.start_round(
+                progress, owner=(self.guild_id, self.category_id), reseat=reseat
+            )
+        try:
+            if result:
+                await db.set_seating_trace(
+                    self.guild_id,
+                    self.category_id,
+                    self.tournament.current_round,
+                    telemetry.record(result),
+                )
+            else:
+                # no optimisation (staggered, first round): drop a previous record
+                await db.delete_seating_trace(
+                    self.guild_id, self.category_id, self.tournament.current_round
+                )
+        except psycopg.Error:
+            logger.exception("Failed to record the seating telemetry")
         await self.create_or_edit_response(
             embed=hikari.Embed(
                 title="Assigning tables...",
@@ -2465,10 +2502,14 @@ class Round(BaseCommand):
                 "rec.games.trading-cards.jyhad/c/4YivYLDVYQc/m/CCH-ZBU5UiUJ"
             ),
         )
-        if score:
+        if result:
             embed.set_footer(
                 "Seating score: "
-                + ", ".join(f"R{i}: {v:.2g}" for i, v in enumerate(score.rules, 1))
+                + ", ".join(
+                    f"R{i}: {v:.2g}" for i, v in enumerate(result.score.rules, 1)
+                )
+                + (" (cached seating)" if result.cached else "")
+                + (" (precomputed during check-in)" if result.speculative else "")
             )
         await self.create_or_edit_response(
             embeds=_paginate_embed(embed),
@@ -2486,6 +2527,7 @@ class Round(BaseCommand):
         round = self.tournament.finish_round(keep_checkin)
         await self._delete_round_tables(round.finals)
         await self.update()
+        self.speculate_seating()
         await self.create_or_edit_response("Round finished")
 
     async def reset(self) -> None:
@@ -3565,6 +3607,36 @@ class Standings(BaseCommand):
         )
 
 
+class FindPlayer(BaseCommand):
+    """Search the VEKN registry mirror by name, to find a player VEKN ID#."""
+
+    UPDATE = db.UpdateLevel.READ_ONLY
+    ACCESS = CommandAccess.JUDGE
+    DESCRIPTION = "JUDGE: Find a player VEKN ID# by name (private)"
+    OPTIONS = [
+        hikari.CommandOption(
+            type=hikari.OptionType.STRING,
+            name="name",
+            description="Player name, or part of it",
+            is_required=True,
+        ),
+    ]
+
+    async def __call__(self, name: str) -> None:
+        members = await registry.search(name)
+        if members:
+            description = "\n".join(
+                f"- #{m.vekn} {m.name}" + (f" ({m.country})" if m.country else "")
+                for m in members
+            )
+        else:
+            description = "No player found in the VEKN registry mirror."
+        await self.create_or_edit_response(
+            embed=hikari.Embed(title="VEKN Registry", description=description),
+            flags=hikari.MessageFlag.EPHEMERAL,
+        )
+
+
 class PlayerInfo(BaseCommand):
     """Player information. Includes notes."""
 
@@ -3697,12 +3769,13 @@ class Results(BaseCommand):
         embed = hikari.Embed(
             title="Finals" if round.finals else f"Round {round_number}"
         )
-        incorrect = round.score()
+        # frozen (finished) rounds are correctly scored
+        incorrect = set() if round.frozen else round.score()
         judge_role_id = self.discord.roles[Role.JUDGE].id
         for i, table in enumerate(round.seating.iter_tables(), 1):
             scores = []
             for j, vekn in enumerate(table, 1):
-                score = round.results.get(vekn, None) or tournament.Score()
+                score = round.results.get(vekn, None) or tournament.ZERO_SCORE
                 scores.append(f"{j}. {self._player_display(vekn)} {score}")
             embed.add_field(
                 name=f"Table {i} " + ("⚠️" if i in incorrect else "☑️"),
@@ -3759,9 +3832,9 @@ class PlayersList(BaseCommand):
         embed = hikari.Embed(title=f"Players ({playing}/{total})")
         player_lines = []
         for p in players:
-            info = self.tournament.player_info(p.vekn)
+            status = self.tournament.player_status(p.vekn)
             player_lines.append(
-                f"- {status_icon(info.status)} {self._player_display(p.vekn)}"
+                f"- {status_icon(status)} {self._player_display(p.vekn)}"
             )
         embed.description = "\n".join(player_lines)
         embeds = _paginate_embed(embed)
@@ -3784,12 +3857,16 @@ class DownloadReports(BaseCommand):
             raise CommandFailed("Finish the current round before exporting results")
         await self.deferred(hikari.MessageFlag.EPHEMERAL)
         self._report_number.clear()
-        reports = [self._build_results_csv()]
+        # all reports are built from the same results table
+        winner = self.tournament.score_rounds()
+        table = self.tournament.results_table()
+        ranking = self.tournament.ranking(table, winner)
+        reports = [self._build_results_csv(table, ranking)]
         if self.tournament.flags & tournament.TournamentFlag.DECKLIST_REQUIRED:
-            reports.append(self._build_decks_json())
+            reports.append(self._build_decks_json(table))
         if self.tournament.flags & tournament.TournamentFlag.VEKN_REQUIRED:
-            reports.append(self._build_methuselahs_csv())
-            reports.extend(f for f in self._build_rounds_csvs())
+            reports.append(self._build_methuselahs_csv(table))
+            reports.extend(f for f in self._build_rounds_csvs(table))
             if self.tournament.state == tournament.TournamentState.FINISHED:
                 reports.append(self._build_finals_csv())
         # Discord limits to 10 attachments: zip if there are more (eg. league)
@@ -3831,15 +3908,18 @@ class DownloadReports(BaseCommand):
         buffer = io.BytesIO(buffer.getvalue().encode("utf-8"))
         return hikari.Bytes(buffer, filename, mimetype="application/json")
 
-    def _build_results_csv(self) -> hikari.Bytes:
-        _winner, ranking = self.tournament.standings()
+    def _build_results_csv(
+        self, table: tournament.ResultsTable, ranking: list[tournament.Rank]
+    ) -> hikari.Bytes:
+        rounds_played = table.rounds_played()
         data = []
         report_number = 1
         for rank, vekn, score in ranking:
             if vekn in self.tournament.dropped:
                 rank = "DQ"
-            info = self.tournament.player_info(vekn)
-            if info.rounds <= 0:
+            player = self.tournament.players[vekn]
+            rounds = int(rounds_played[table.index[vekn]])
+            if rounds <= 0:
                 self._report_number[vekn] = None
             else:
                 self._report_number[vekn] = report_number
@@ -3847,12 +3927,12 @@ class DownloadReports(BaseCommand):
                 data.append(
                     [
                         self._report_number[vekn],
-                        info.player.vekn,
-                        info.player.name,
-                        info.rounds,
+                        player.vekn,
+                        player.name,
+                        rounds,
                         score.gw,
                         score.vp,
-                        info.player.seed or "",
+                        player.seed or "",
                         rank,
                     ]
                 )
@@ -3871,22 +3951,24 @@ class DownloadReports(BaseCommand):
             ],
         )
 
-    def _build_decks_json(self) -> hikari.Bytes:
+    def _build_decks_json(self, table: tournament.ResultsTable) -> hikari.Bytes:
         """List of decks."""
+        rounds_played = table.rounds_played()
+        gw, vp, tp = table.totals()
         data = []
         for player in sorted(
             self.tournament.players.values(),
             key=lambda p: self._report_number.get(p.vekn, 0),
         ):
-            info = self.tournament.player_info(player.vekn)
             if not self._report_number.get(player.vekn, None):
                 continue
+            j = table.index[player.vekn]
             data.append(
                 {
                     "vekn": player.vekn,
                     "finals_seed": player.seed,
-                    "rounds": info.rounds,
-                    "score": asdict(info.score),
+                    "rounds": int(rounds_played[j]),
+                    "score": {"gw": int(gw[j]), "vp": float(vp[j]), "tp": int(tp[j])},
                     "deck": player.deck,
                 }
             )
@@ -3905,7 +3987,8 @@ class DownloadReports(BaseCommand):
             name.append("")
         return name
 
-    def _build_methuselahs_csv(self) -> hikari.Bytes:
+    def _build_methuselahs_csv(self, table: tournament.ResultsTable) -> hikari.Bytes:
+        rounds_played = table.rounds_played()
         data = []
         for player in sorted(
             self.tournament.players.values(),
@@ -3914,7 +3997,6 @@ class DownloadReports(BaseCommand):
             if not self._report_number.get(player.vekn, None):
                 continue
             name = self._player_first_last_name(player)
-            info = self.tournament.player_info(player.vekn)
             data.append(
                 [
                     self._report_number[player.vekn],
@@ -3922,10 +4004,10 @@ class DownloadReports(BaseCommand):
                     name[1],
                     "",  # country
                     player.vekn,
-                    info.rounds,
+                    int(rounds_played[table.index[player.vekn]]),
                     (
                         "DQ"
-                        if info.status
+                        if self.tournament.player_status(player.vekn)
                         in [
                             tournament.PlayerStatus.DISQUALIFIED
                             or tournament.PlayerStatus.DROPPED_OUT
@@ -3936,12 +4018,13 @@ class DownloadReports(BaseCommand):
             )
         return self._build_csv("Methuselahs.csv", data)
 
-    def _build_rounds_csvs(self) -> hikari.Bytes:
+    def _build_rounds_csvs(self, results: tournament.ResultsTable) -> hikari.Bytes:
         for i, round in enumerate(self.tournament.rounds, 1):
             if not round.results:
                 break
             if round.finals:
                 break
+            vps = results.vp[i - 1]
             data = []
             for j, table in enumerate(round.seating, 1):
                 for vekn in table:
@@ -3953,7 +4036,7 @@ class DownloadReports(BaseCommand):
                             name[0],
                             name[1],
                             j,
-                            round.results.get(player.vekn, tournament.Score()).vp,
+                            float(vps[results.index[vekn]]),
                         ]
                     )
                 if len(table) < 5:
@@ -3977,7 +4060,7 @@ class DownloadReports(BaseCommand):
                     name[1],
                     1,  # table
                     player.seed,  # seat
-                    round.results.get(player.vekn, tournament.Score()).vp,
+                    round.results.get(player.vekn, tournament.ZERO_SCORE).vp,
                 ]
             )
         return self._build_csv("Finals.csv", data)
@@ -4026,6 +4109,37 @@ class Raffle(BaseCommand):
         await self.create_or_edit_response(embed=embed)
 
 
+class SeatingReport(BaseCommand):
+    """Seating optimisation telemetry of a round, to tune the seating parameters."""
+
+    UPDATE = db.UpdateLevel.READ_ONLY
+    ACCESS = CommandAccess.ADMIN
+    DESCRIPTION = "ADMIN: Seating optimisation report"
+    OPTIONS = [
+        hikari.CommandOption(
+            type=hikari.OptionType.INTEGER,
+            name="round",
+            description="The round (defaults to the current round)",
+            is_required=False,
+            min_value=1,
+        ),
+    ]
+
+    async def __call__(self, round: Optional[int] = None) -> None:
+        round = round or self.tournament.current_round
+        data = await db.get_seating_trace(self.guild_id, self.category_id, round)
+        if not data:
+            raise CommandFailed(f"No seating optimisation recorded for round {round}")
+        embed = hikari.Embed(
+            title=f"Round {round} Seating Report",
+            description=f"```\n{telemetry.render(data)}\n```",
+        )
+        await self.create_or_edit_response(
+            embeds=_paginate_embed(embed),
+            flags=hikari.MessageFlag.EPHEMERAL,
+        )
+
+
 class ResetChannelsAndRoles(BaseCommand):
     """For dev purposes and in case of bug: realign the channels."""
 
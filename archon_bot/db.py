@@ -94,6 +94,46 @@ async def init():
                 "guild, "
                 "category)"
             )
+            await cursor.execute(
+                "CREATE TABLE IF NOT EXISTS seating("
+                "key TEXT PRIMARY KEY, "
+                "created TIMESTAMP DEFAULT now(), "
+                "data json)"
+            )
+            await cursor.execute(
+                "CREATE TABLE IF NOT EXISTS vekn("
+                "vekn TEXT PRIMARY KEY, "
+                "name TEXT, "
+                "country TEXT, "
+                "updated TIMESTAMP DEFAULT now())"
+            )
+            await cursor.execute(
+                "CREATE TABLE IF NOT EXISTS vekn_registry("
+                "vekn TEXT PRIMARY KEY, "
+                "name TEXT, "
+                "country TEXT, "
+                "search TEXT)"
+            )
+            # words of the members names, for prefix searches on any word
+            await cursor.execute(
+                "CREATE TABLE IF NOT EXISTS vekn_registry_word("
+                "word TEXT, "
+                "vekn TEXT, "
+                "PRIMARY KEY (word, vekn))"
+            )
+            await cursor.execute(
+                "CREATE INDEX IF NOT EXISTS vekn_registry_word_prefix "
+                "ON vekn_registry_word(word text_pattern_ops)"
+            )
+            await cursor.execute(
+                "CREATE TABLE IF NOT EXISTS seating_trace("
+                "guild TEXT, "
+                "category TEXT, "
+                "round INTEGER, "
+                "created TIMESTAMP DEFAULT now(), "
+                "data json, "
+                "PRIMARY KEY (guild, category, round))"
+            )
 
 
 async def reset():
@@ -102,6 +142,11 @@ async def reset():
         async with conn.cursor() as cursor:
             logger.warning("Reset DB")
             await cursor.execute("DROP TABLE tournament")
+            await cursor.execute("DROP TABLE IF EXISTS seating")
+            await cursor.execute("DROP TABLE IF EXISTS seating_trace")
+            await cursor.execute("DROP TABLE IF EXISTS vekn")
+            await cursor.execute("DROP TABLE IF EXISTS vekn_registry")
+            await cursor.execute("DROP TABLE IF EXISTS vekn_registry_word")
 
 
 async def create_tournament(conn, guild_id, category_id, tournament_data):
@@ -180,7 +225,7 @@ async def tournament(guild_id, category_id, update=False):
 
 
 async def close_tournament(conn, guild_id, category_id):
-    """Close a tournament. Remove it from cache."""
+    """Close a tournament. Remove it from cache, delete its seating telemetry."""
     logger.debug("Closing tournament %s-%s", guild_id, category_id)
     TOURNAMENTS.pop((guild_id, category_id), None)
     async with conn.cursor() as cursor:
@@ -189,3 +234,154 @@ async def close_tournament(conn, guild_id, category_id):
             "WHERE active=TRUE AND guild=%s AND category=%s",
             [str(guild_id), str(category_id) if category_id else ""],
         )
+        # a new tournament in the same category must not show these
+        await cursor.execute(
+            "DELETE FROM seating_trace WHERE guild=%s AND category=%s",
+            [str(guild_id), str(category_id) if category_id else ""],
+        )
+
+
+async def get_seating(key: str):
+    """Cached optimised seating, None if not found."""
+    async with POOL.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute("SELECT data FROM seating WHERE key=%s", [key])
+            res = await cursor.fetchone()
+            return res[0] if res else None
+
+
+async def set_seating(key: str, seating_data):
+    """Cache an optimised seating."""
+    async with POOL.connection() as conn:
+        await conn.set_read_only(False)
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "INSERT INTO seating (key, data) VALUES (%s, %s) "
+                "ON CONFLICT (key) DO UPDATE SET data=EXCLUDED.data, created=now()",
+                [key, psycopg.types.json.Json(seating_data)],
+            )
+
+
+async def get_seating_trace(guild_id, category_id, round_number: int):
+    """Seating optimisation telemetry of a round, None if not found."""
+    async with POOL.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT data FROM seating_trace "
+                "WHERE guild=%s AND category=%s AND round=%s",
+                [str(guild_id), str(category_id) if category_id else "", round_number],
+            )
+            res = await cursor.fetchone()
+            return res[0] if res else None
+
+
+async def set_seating_trace(guild_id, category_id, round_number: int, trace_data):
+    """Record the seating optimisation telemetry of a round."""
+    async with POOL.connection() as conn:
+        await conn.set_read_only(False)
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "INSERT INTO seating_trace (guild, category, round, data) "
+                "VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (guild, category, round) "
+                "DO UPDATE SET data=EXCLUDED.data, created=now()",
+                [
+                    str(guild_id),
+                    str(category_id) if category_id else "",
+                    round_number,
+                    psycopg.types.json.Json(trace_data),
+                ],
+            )
+
+
+async def delete_seating_trace(guild_id, category_id, round_number: int):
+    """Delete the seating optimisation telemetry of a round, if any."""
+    async with POOL.connection() as conn:
+        await conn.set_read_only(False)
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM seating_trace "
+                "WHERE guild=%s AND category=%s AND round=%s",
+                [str(guild_id), str(category_id) if category_id else "", round_number],
+            )
+
+
+async def get_vekn(vekn: str):
+    """Cached VEKN registry entry: (name, country, age in seconds), None if absent.
+
+    The name and country are None for a VEKN ID# not found in the registry.
+    """
+    async with POOL.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT name, country, EXTRACT(EPOCH FROM now() - updated) "
+                "FROM vekn WHERE vekn=%s",
+                [vekn],
+            )
+            res = await cursor.fetchone()
+            return (res[0], res[1], float(res[2])) if res else None
+
+
+async def set_vekn(vekn: str, name, country):
+    """Cache a VEKN registry entry (None name and country if not found)."""
+    async with POOL.connection() as conn:
+        await conn.set_read_only(False)
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "INSERT INTO vekn (vekn, name, country) VALUES (%s, %s, %s) "
+                "ON CONFLICT (vekn) DO UPDATE SET name=EXCLUDED.name, "
+                "country=EXCLUDED.country, updated=now()",
+                [vekn, name, country],
+            )
+
+
+async def get_registry_member(vekn: str):
+    """VEKN registry mirror entry: (name, country), None if absent."""
+    async with POOL.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT name, country FROM vekn_registry WHERE vekn=%s", [vekn]
+            )
+            return await cursor.fetchone()
+
+
+async def search_registry(words: list[str], limit: int):
+    """VEKN registry mirror entries (vekn, name, country) matching all words.
+
+    The words (alphanumeric) match the beginning of any word of the search column,
+    using the prefix index of the words table.
+    """
+    where = " AND ".join(
+        ["vekn IN (SELECT vekn FROM vekn_registry_word WHERE word LIKE %s)"]
+        * len(words)
+    )
+    params = [f"{word}%" for word in words]
+    async with POOL.connection() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT vekn, name, country FROM vekn_registry "
+                f"WHERE {where or 'TRUE'} ORDER BY search LIMIT %s",
+                params + [limit],
+            )
+            return await cursor.fetchall()
+
+
+async def import_registry(rows) -> int:
+    """Replace the VEKN registry mirror: rows of (vekn, name, country, search)."""
+    count = 0
+    async with POOL.connection() as conn:
+        await conn.set_read_only(False)
+        async with conn.cursor() as cursor:
+            await cursor.execute("TRUNCATE vekn_registry, vekn_registry_word")
+            async with cursor.copy(
+                "COPY vekn_registry (vekn, name, country, search) FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+                    count += 1
+            await cursor.execute(
+                "INSERT INTO vekn_registry_word (word, vekn) "
+                "SELECT DISTINCT unnest(string_to_array(search, ' ')), vekn "
+                "FROM vekn_registry WHERE search != ''"
+            )
+    return count
@@ -0,0 +1,264 @@
+"""Deck lists fetching from deckbuilding websites (VDB, Amaranth, VTESDecks).
+
+A single client is shared by all commands: its HTTP session keeps the connections
+alive, requests are bounded in time and concurrency, and the event loop is never
+blocked by a fetch. Many decks can be fetched at once (batch registration).
+
+The websites answers are cached in memory for a while, keyed by the normalised deck
+URL: a deck is often uploaded again, by the player then a judge. Building the deck
+from the answer (cards lookup) is done in a worker thread.
+
+`await CLIENT.open()` before using it, and `await CLIENT.close()` when finished.
+"""
+
+import asyncio
+import collections
+import email.utils
+import itertools
+import logging
+import os
+import time
+import urllib.parse
+from typing import Iterable, Optional, Union
+
+import aiohttp
+import arrow
+import asgiref.sync
+import krcg.deck
+import krcg.vtes
+
+logger = logging.getLogger()
+#: Timeout of a request to a deckbuilding website (seconds)
+DECKS_TIMEOUT = float(os.getenv("DECKS_TIMEOUT", 0)) or 10.0
+#: Maximum concurrent requests to the deckbuilding websites
+DECKS_CONCURRENCY = int(os.getenv("DECKS_CONCURRENCY", 0)) or 16
+#: Websites answers cache lifetime (seconds)
+DECKS_CACHE_TTL = float(os.getenv("DECKS_CACHE_TTL", 0)) or 600.0
+#: Websites answers cached in memory
+DECKS_CACHE_SIZE = 1000
+#: Deck API of each website
+APIS = {
+    "amaranth": "https://amaranth.vtes.co.nz/api/deck",
+    "vdb": "https://vdb.im/api/deck/",
+    "vtesdecks": "https://api.vtesdecks.com/1.0/decks/",
+}
+#: Normalised deck URL for each website
+URLS = {
+    "amaranth": "https://amaranth.vtes.co.nz/#deck/{}",
+    "vdb": "https://vdb.im/decks/{}",
+    "vtesdecks": "https://vtesdecks.com/deck/{}",
+}
+NAMES = {"amaranth": "Amaranth", "vdb": "VDB", "vtesdecks": "VTESDecks"}
+
+
+class DeckError(Exception):
+    """The deck could not be fetched"""
+
+
+def source(url: str) -> Optional[tuple[str, str]]:
+    """Website and deck ID of a deck URL, None if the URL holds the whole deck.
+
+    Same URLs as `krcg.deck.Deck.from_url`. Raise `DeckError` if not supported.
+    """
+    result = urllib.parse.urlparse(url.strip())
+    netloc = result.netloc.lower().removeprefix("www.")
+    if netloc == "amaranth.vtes.co.nz":
+        if result.fragment.startswith("deck/") and result.fragment[5:]:
+            return "amaranth", result.fragment[5:].strip("/")
+        raise DeckError("Unknown Amaranth URL format")
+    if netloc in {"vdb.smeea.casa", "vdb.im"}:
+        if not result.path.startswith("/decks"):
+            raise DeckError("Unknown VDB URL path")
+        params = urllib.parse.parse_qs(result.query)
+        if "id" in params:
+            return "vdb", params["id"][0]
+        if result.fragment:
+            return None
+        if result.path.startswith("/decks/") and result.path[7:].strip("/"):
+            return "vdb", result.path[7:].strip("/")
+        raise DeckError("Unknown VDB URL format")
+    if netloc == "vtesdecks.com":
+        if result.path.startswith("/deck/") and result.path[6:].strip("/"):
+            return "vtesdecks", result.path[6:].strip("/")
+        raise DeckError("Unknown VTESDecks URL path")
+    raise DeckError("Unknown deck URL provider (use VDB, Amaranth or VTESDecks)")
+
+
+def normalize(url: str) -> str:
+    """Normalised deck URL: the same for all the URLs of a deck"""
+    key = source(url)
+    if not key:
+        return url.strip()
+    website, uid = key
+    return URLS[website].format(uid)
+
+
+class Client:
+    """Deckbuilding websites client: pooled connections, bounded concurrency"""
+
+    def __init__(
+        self,
+        timeout: float = DECKS_TIMEOUT,
+        concurrency: int = DECKS_CONCURRENCY,
+        cache_size: int = DECKS_CACHE_SIZE,
+        apis: Optional[dict[str, str]] = None,
+    ):
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        self.apis = apis or APIS
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        #: normalised URL -> (website answer, and the time it was fetched)
+        self._cache: collections.OrderedDict[str, tuple[dict, float]] = (
+            collections.OrderedDict()
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self.session is None
+
+    async def open(self) -> None:
+        if self.session:
+            return
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> "Client":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _request(self, website: str, uid: str) -> dict:
+        async with self._semaphore:
+            if website == "amaranth":
+                request = self.session.post(self.apis[website], data={"id": uid})
+            else:
+                request = self.session.get(
+                    self.apis[website] + urllib.parse.quote(uid, safe="")
+                )
+            async with request as response:
+                if response.status in {400, 404}:
+                    raise DeckError(f"Deck not found on {NAMES[website]}")
+                if response.status >= 400:
+                    raise DeckError(
+                        f"{NAMES[website]} returned an error: HTTP {response.status}"
+                    )
+                return await response.json(content_type=None)
+
+    async def fetch(self, website: str, uid: str) -> dict:
+        """Website answer for a deck ID, cached"""
+        url = URLS[website].format(uid)
+        entry = self._cache.get(url)
+        if entry and time.time() - entry[1] < DECKS_CACHE_TTL:
+            self._cache.move_to_end(url)
+            return entry[0]
+        logger.info("Fetching deck %s", url)
+        try:
+            data = await self._request(website, uid)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DeckError(f"Unable to reach {NAMES[website]}") from e
+        except ValueError as e:
+            raise DeckError(f"{NAMES[website]} returned an invalid answer") from e
+        self._cache[url] = data, time.time()
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    async def deck(self, url: str) -> krcg.deck.Deck:
+        """Deck from a deckbuilding website URL.
+
+        Raise `DeckError` if the URL is not supported or the deck cannot be fetched.
+        """
+        key = source(url)
+        if key:
+            data = await self.fetch(*key)
+            parse = asgiref.sync.sync_to_async(_parse, thread_sensitive=False)
+            return await parse(*key, data)
+        # the deck is in the URL
+        parse = asgiref.sync.sync_to_async(_parse_url, thread_sensitive=False)
+        return await parse(url)
+
+    async def decks(
+        self, urls: Iterable[str]
+    ) -> list[Union[krcg.deck.Deck, DeckError]]:
+        """Decks from deckbuilding websites URLs, or the error for each of them.
+
+        They are fetched concurrently, within the client concurrency bound.
+        """
+        return await asyncio.gather(
+            *(self._deck_or_error(url) for url in urls),
+        )
+
+    async def _deck_or_error(self, url: str) -> Union[krcg.deck.Deck, DeckError]:
+        try:
+            return await self.deck(url)
+        except DeckError as e:
+            return e
+
+
+def _parse(website: str, uid: str, data: dict) -> krcg.deck.Deck:
+    """Deck from a website answer, like `krcg.deck.Deck.from_url` does.
+
+    Dates are parsed with arrow, like krcg: websites may send a `Z` or an offset.
+    """
+    if not krcg.vtes.VTES:
+        krcg.vtes.VTES.load()
+    try:
+        if website == "amaranth":
+            data = data["result"]
+            ret = krcg.deck.Deck(id=uid, author=data.get("author", None))
+            ret.name = data.get("title", None)
+            ret.date = arrow.get(data["modified"]).date()
+            cards = (
+                (krcg.vtes.VTES.amaranth[cid], count)
+                for cid, count in data["cards"].items()
+            )
+        elif website == "vdb":
+            ret = krcg.deck.Deck(id=uid, author=data.get("author", data.get("owner")))
+            ret.name = data.get("name", None)
+            if "timestamp" in data:
+                ret.date = email.utils.parsedate_to_datetime(data["timestamp"]).date()
+            cards = (
+                (krcg.vtes.VTES[int(cid)], count)
+                for cid, count in data["cards"].items()
+            )
+        else:
+            ret = krcg.deck.Deck(id=uid, author=data.get("author", None))
+            ret.name = data.get("name", None)
+            ret.date = arrow.get(data["modifyDate"]).date()
+            cards = (
+                (krcg.vtes.VTES[int(card["id"])], card["number"])
+                for card in itertools.chain(data["crypt"], data["library"])
+            )
+        ret.comments = data.get("description", None) or ""
+        for card, count in cards:
+            count = int(count)
+            if count > 0:
+                ret[card] = count
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise DeckError(f"{NAMES[website]} returned an invalid deck") from e
+    return ret
+
+
+def _parse_url(url: str) -> krcg.deck.Deck:
+    """Deck from an URL holding the whole deck (no request)"""
+    try:
+        return krcg.deck.Deck.from_url(url)
+    except (KeyError, TypeError, ValueError) as e:
+        raise DeckError("Invalid deck URL") from e
+
+
+#: await CLIENT.open() before using it, and CLIENT.close() when finished
+CLIENT = Client()
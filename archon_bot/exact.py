@@ -0,0 +1,260 @@
+"""Exact seating of a round for small fields: branch and bound.
+
+For 8 to 15 players, the seating of the next round (previous rounds fixed) can be
+searched exhaustively. The score is `krcg.seating.Score.fast_total`, decomposed:
+
+- pairs rules (R1, R2, R4, R6, R9): the violations added by two players sitting at
+  the same table only depend on their previous rounds and relative positions
+- seats rules (R5, R7): only depend on the player previous rounds and seat
+- VPs and transfers variances (R3, R8): the mean is the same for all seatings when
+  the players of the round have played the same number of rounds, the variance
+  then only depends on the sum of squares, a sum over the players
+
+So the score is a sum over tables: the best arrangement of each set of players
+is computed once, and the search is over the partitions of the players into
+tables. Each new table holds the lowest player not seated yet, so that every
+partition is enumerated once (tables of the same size are interchangeable). A
+branch is cut as soon as its score reaches the best score found (an annealing
+result is a good start).
+
+If the players have not played the same number of rounds, the search uses the
+variances of the previous mean: the result is near optimal, not proven optimal.
+"""
+
+import collections
+import itertools
+import math
+import time
+from typing import Callable, Optional
+
+import krcg.seating
+import numpy
+
+from . import scoring
+
+#: Fields for which the exact solver is used
+MIN_PLAYERS = 8
+MAX_PLAYERS = 15
+# fast_total weights
+W = scoring.WEIGHTS
+
+
+class Timeout(Exception):
+    """Time limit reached, or stopped"""
+
+
+class Solver:
+    """Branch and bound over the tables of the last round, previous rounds fixed.
+
+    The rounds before the given ones can be given as a history.
+    """
+
+    def __init__(
+        self,
+        rounds: list[krcg.seating.Round],
+        history: Optional[scoring.SeatingHistory] = None,
+    ):
+        self.rounds = rounds
+        self.pm = scoring.player_mapping(rounds, history)
+        self.round = rounds[-1]
+        self.sizes = [len(table) for table in self.round]
+        self.players = sorted(self.pm[p] for p in self.round.iter_players())
+        count = len(self.pm)
+        previous_rounds = len(rounds) - 1 + (history.rounds if history else 0)
+        if previous_rounds:
+            previous = scoring.SeatingEvaluator(rounds[:-1], self.pm, history)
+            position, opponents = previous.position, previous.opponents
+        else:
+            position = numpy.zeros((count, 8), int)
+            opponents = numpy.zeros((count, count, 8), int)
+        threshold = max(2, previous_rounds + 1)
+        # an entry counts when it goes over 1 (or the R2 threshold)
+        self.opponent_cost = (
+            # R2: opponent in all rounds
+            W[1] * (opponents[:, :, 0] == threshold - 1)
+            # R4: opponent twice
+            + W[3] * (opponents[:, :, 0] == 1)
+        ).tolist()
+        # relative positions costs: position_cost[size][d][p][q] for q d seats after p
+        self.position_cost = {}
+        for size in set(self.sizes):
+            self.position_cost[size] = [None]
+            for d in range(1, size):
+                forward = krcg.seating.OPPONENTS[size][d - 1]
+                backward = krcg.seating.OPPONENTS[size][size - d - 1]
+                repeat_pq = (opponents == 1) & (forward == 1)
+                repeat_qp = (opponents.transpose(1, 0, 2) == 1) & (backward == 1)
+                cost = (
+                    # R1: prey twice, both ways
+                    W[0] * (repeat_pq[:, :, 1] | repeat_qp[:, :, 1])
+                    # R6: same relative position (symmetric)
+                    + W[5] * repeat_pq[:, :, 1:6].any(axis=2)
+                    # R9: same position group (symmetric)
+                    + W[8] * repeat_pq[:, :, 6:].any(axis=2)
+                )
+                self.position_cost[size].append(cost.tolist())
+        # players ratios (VPs and transfers by round played), for each seat
+        playing = position[:, 0] + numpy.isin(numpy.arange(count), self.players)
+        self.playing_count = numpy.count_nonzero(playing)
+        self.separable = len(set(playing[self.players].tolist())) < 2
+        self.seat_cost = {}
+        self.table_cost = {}
+        for size in set(self.sizes):
+            self.seat_cost[size] = []
+            for seat in range(size):
+                values = krcg.seating.POSITIONS[size][seat]
+                column = 3 + values[3:].argmax()
+                repeat = position[:, column] == 1
+                transfers = (position[:, 2] + values[2]) / numpy.maximum(playing, 1)
+                cost = (
+                    # R7: same seat, R5: fifth seat
+                    W[6] * repeat
+                    + (W[4] * repeat if column == 7 else 0)
+                    # R8: sum of squares part of the variance
+                    + W[7] * transfers**2 / self.playing_count
+                )
+                self.seat_cost[size].append(cost.tolist())
+            # R3: sum of squares part of the variance
+            vps = (position[:, 1] + size) / numpy.maximum(playing, 1)
+            self.table_cost[size] = (W[2] * vps**2 / self.playing_count).tolist()
+        self.arrangements = {}
+        self.nodes = 0
+        self.best = math.inf
+        self.best_tables = None
+        self.deadline = math.inf
+        self.time_limit = None
+        self.start = self.next_report = 0
+        self.callback = None
+        self.stop = None
+
+    def solve(
+        self,
+        time_limit: Optional[float] = None,
+        incumbent: Optional[krcg.seating.Round] = None,
+        callback: Optional[Callable] = None,
+        stop=None,
+    ) -> tuple[krcg.seating.Round, bool]:
+        """Return the best round and whether it is proven optimal.
+
+        If the time limit is reached, return the best round found. An incumbent
+        (eg. an annealing result) speeds up the search.
+        With a time limit, the callback is called every 100th of it with the keyword
+        arguments progress (0 to 1) and nodes. The search also stops when the `stop`
+        event is set, as if the time limit was reached.
+        """
+        self.start = time.monotonic()
+        if time_limit:
+            self.time_limit = time_limit
+            self.deadline = self.start + time_limit
+            self.next_report = self.start + time_limit / 100
+        self.callback = callback
+        self.stop = stop
+        if incumbent:
+            self.best_tables = [[self.pm[p] for p in t] for t in incumbent]
+            self.best = sum(self._arrangement_cost(t) for t in self.best_tables)
+        try:
+            self._branch([], set(self.players), 0, collections.Counter(self.sizes))
+            optimal = self.separable
+        except Timeout:
+            optimal = False
+        return self.best_round(), optimal
+
+    def best_round(self) -> Optional[krcg.seating.Round]:
+        """Best round found so far"""
+        if self.best_tables is None:
+            return None
+        rpm = {v: k for k, v in self.pm.items()}
+        return krcg.seating.Round([[rpm[p] for p in t] for t in self.best_tables])
+
+    def _check(self) -> None:
+        """Raise Timeout when the time limit is reached or when stopped"""
+        now = time.monotonic()
+        if now > self.deadline or (self.stop and self.stop.is_set()):
+            raise Timeout()
+        if self.callback and self.time_limit and now >= self.next_report:
+            self.next_report = now + self.time_limit / 100
+            self.callback(
+                progress=(now - self.start) / self.time_limit, nodes=self.nodes
+            )
+
+    def _arrangement_cost(self, table: list[int]) -> float:
+        """Cost of an arranged table"""
+        size = len(table)
+        position_cost = self.position_cost[size]
+        cost = 0
+        for i, p in enumerate(table):
+            cost += self.table_cost[size][p] + self.seat_cost[size][i][p]
+            for j in range(i + 1, size):
+                q = table[j]
+                cost += self.opponent_cost[p][q] + position_cost[j - i][p][q]
+        return cost
+
+    def _arrangement(self, players: tuple[int, ...]) -> tuple[float, list[int]]:
+        """Best arrangement of a table (sorted players), memoized"""
+        if players not in self.arrangements:
+            size = len(players)
+            base = sum(self.table_cost[size][p] for p in players) + sum(
+                self.opponent_cost[p][q] for p, q in itertools.combinations(players, 2)
+            )
+            seat_cost = self.seat_cost[size]
+            position_cost = self.position_cost[size]
+            best = math.inf, None
+            for table in itertools.permutations(players):
+                cost = base
+                for i, p in enumerate(table):
+                    cost += seat_cost[i][p]
+                    for j in range(i + 1, size):
+                        cost += position_cost[j - i][p][table[j]]
+                if cost < best[0]:
+                    best = cost, list(table)
+            self.arrangements[players] = best
+        return self.arrangements[players]
+
+    def _branch(
+        self,
+        tables: list[list[int]],
+        free: set[int],
+        cost: float,
+        sizes: collections.Counter,
+    ) -> None:
+        self.nodes += 1
+        if not self.nodes % 1000:
+            self._check()
+        if not free:
+            if cost < self.best:
+                self.best = cost
+                self.best_tables = self._ordered(tables)
+            return
+        # the new table is anchored on the lowest free player
+        first = min(free)
+        candidates = sorted(free - {first})
+        children = []
+        for size in [s for s, count in sizes.items() if count]:
+            for others in itertools.combinations(candidates, size - 1):
+                players = (first,) + others
+                # quick bound: pairs without positions
+                bound = cost + sum(
+                    self.opponent_cost[p][q]
+                    for p, q in itertools.combinations(players, 2)
+                )
+                if bound >= self.best:
+                    continue
+                table_cost, table = self._arrangement(players)
+                if cost + table_cost < self.best:
+                    children.append((cost + table_cost, players, table))
+        children.sort()
+        for child_cost, players, table in children:
+            if child_cost >= self.best:
+                break
+            tables.append(table)
+            sizes[len(table)] -= 1
+            self._branch(tables, free - set(players), child_cost, sizes)
+            sizes[len(table)] += 1
+            tables.pop()
+
+    def _ordered(self, tables: list[list[int]]) -> list[list[int]]:
+        """Tables in the order of the round table sizes"""
+        by_size = collections.defaultdict(list)
+        for table in tables:
+            by_size[len(table)].append(table)
+        return [by_size[size].pop(0) for size in self.sizes]
@@ -0,0 +1,183 @@
+"""Limited formats: VDB format files compiled into card IDs inclusion or exclusion.
+
+Compiled formats are cached by content digest: tournaments only store the digest
+(and the VDB format file, to recompile it after a restart).
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+
+import krcg.vtes
+import orjson
+
+logger = logging.getLogger()
+
+# We'll need cleaner VEKN csvs to replace this
+VTES_ABBREV_TO_SET = {
+    "Jyhad": "Jyhad",
+    "VTES": "Vampire: The Eternal Struggle",
+    "DS": "Dark Sovereigns",
+    "AH": "Ancient Hearts",
+    "Sabbat": "Sabbat",
+    "SW": "Sabbat War",
+    "FN": "Final Nights",
+    "BL": "Bloodlines",
+    "CE": "Camarilla Edition",
+    "Anarchs": "Anarchs",
+    "BH": "Black Hand",
+    "Gehenna": "Gehenna",
+    "Tenth": "Tenth Anniversary",
+    "KMW": "Kindred Most Wanted",
+    "LoB": "Legacies of Blood",
+    "NoR": "Nights of Reckoning",
+    "Third": "Third Edition",
+    "SoC": "Sword of Caine",
+    "LotN": "Lords of the Night",
+    "BSC": "Blood Shadowed Court",
+    "TR": "Twilight Rebellion",
+    "KoT": "Keepers of Tradition",
+    "KoTR": "Keepers of Tradition Reprint",
+    "EK": "Ebony Kingdom",
+    "HttB": "Heirs to the Blood",
+    "HttBR": "Heirs to the Blood Reprint",
+    "DM": "Danse Macabre",
+    "TU": "The Unaligned",
+    "AU": "Anarch Unbound",
+    "Anthology": "Anthology",
+    "Anthology I": "Anthology",  # hack because of VDB/VEKN mismatch here
+    "LK": "Lost Kindred",
+    "SP": "Sabbat Preconstructed",
+    "25th": "Twenty-Fifth Anniversary",
+    "FB": "First Blood",
+    "V5": "Fifth Edition",
+    "V5A": "Fifth Edition (Anarch)",
+    "NB": "New Blood",
+    "FoL": "Fall of London",
+    "SoB": "Shadows of Berlin",
+    "EoG": "Echoes of Gehenna",
+    "NB2": "New Blood II",
+}
+
+#: Anthology I cards that were not printed in Anthology I:
+#: (card ID, set abbreviation making it legal)
+ANTHOLOGY_I_MISSING = [
+    (101110, "SoB"),  # The Line
+    (102128, None),  # Vivenne Géroux
+    (200030, "EoG"),  # Aisha az-Zahra
+    (200081, "SoB"),  # André the Manipulator
+    (200105, "SoB"),  # Anne-Marie Bourgeois
+    (200123, "EoG"),  # Apolonia Czarnecki
+    (200562, "SoB"),  # Hamid Mansour
+    (200723, "EoG"),  # Joseph Fisher
+    (200816, "SoB"),  # Laura Goldman
+    (201321, "EoG"),  # Styles Margs
+    (201465, "SoB"),  # Weirich Waldburg
+]
+
+
+@dataclass(frozen=True)
+class Format:
+    """A compiled VDB format"""
+
+    digest: str
+    #: sets full names
+    sets: tuple[str, ...] = ()
+    #: additional cards allowed
+    allowed: frozenset[int] = frozenset()
+    #: cards banned
+    banned: frozenset[int] = frozenset()
+    #: all cards legal (empty if all cards but the excluded ones are legal)
+    include: frozenset[int] = frozenset()
+    exclude: frozenset[int] = frozenset()
+
+
+#: Compiled formats by digest
+FORMATS: dict[str, Format] = {}
+#: Set name -> card IDs, built once per card database load (see `sets_index()`)
+_SETS_INDEX: dict[str, frozenset[int]] = {}
+#: First card of the cards database the index was built from: a reload creates new
+#: card objects, even if the cards count does not change
+_SETS_INDEX_VERSION: object = object()
+
+
+def digest(data: dict) -> str:
+    """Content digest of a VDB format"""
+    return hashlib.sha256(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def sets_index() -> dict[str, frozenset[int]]:
+    """Card IDs by set name. Rebuilt only when the cards database changes."""
+    global _SETS_INDEX, _SETS_INDEX_VERSION
+    version = next(iter(krcg.vtes.VTES), None)
+    if version is not _SETS_INDEX_VERSION:
+        index = {}
+        for card in krcg.vtes.VTES:
+            for set_name in card.sets:
+                index.setdefault(set_name, set()).add(card.id)
+        _SETS_INDEX = {k: frozenset(v) for k, v in index.items()}
+        _SETS_INDEX_VERSION = version
+        # the compiled formats need the index, compile them again
+        FORMATS.clear()
+    return _SETS_INDEX
+
+
+def compile_format(data: dict) -> Format:
+    """Compile a VDB format. Raise ValueError if the format is invalid."""
+    key = digest(data)
+    if key in FORMATS:
+        return FORMATS[key]
+    try:
+        sets = set([k for k, v in data["sets"].items() if v])
+        allowed = set(
+            [int(k) for k, v in data["allowed"]["crypt"].items() if v]
+            + [int(k) for k, v in data["allowed"]["library"].items() if v]
+        )
+        banned = set(
+            [int(k) for k, v in data["banned"]["crypt"].items() if v]
+            + [int(k) for k, v in data["banned"]["library"].items() if v]
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        raise ValueError("Invalid VDB format file.")
+    if allowed & banned:
+        raise ValueError("Invalid format: some cards are both allowed and banned")
+    # hack for Anthology I
+    if "Anthology I" in sets:
+        sets.discard("Anthology I")
+        sets.add("Anthology")
+        for card_id, set_abbrev in ANTHOLOGY_I_MISSING:
+            if not (card_id in allowed or set_abbrev in sets):
+                banned.add(card_id)
+    unknown = sets - VTES_ABBREV_TO_SET.keys()
+    if unknown:
+        raise ValueError(f"Unknown sets in format: {', '.join(sorted(unknown))}")
+    sets = sorted(set(VTES_ABBREV_TO_SET[a] for a in sets))
+    index = sets_index()
+    if not sets and not allowed:
+        include = frozenset()
+        exclude = frozenset(banned)
+    else:
+        include = frozenset().union(allowed, *(index.get(s, ()) for s in sets))
+        include -= banned
+        exclude = frozenset()
+    ret = Format(
+        digest=key,
+        sets=tuple(sets),
+        allowed=frozenset(allowed),
+        banned=frozenset(banned),
+        include=include,
+        exclude=exclude,
+    )
+    FORMATS[key] = ret
+    return ret
+
+
+def get_format(key: str, data: dict) -> Format:
+    """Compiled format for this digest, compile the VDB format data if need be."""
+    sets_index()  # make sure the cache is not stale
+    if key in FORMATS:
+        return FORMATS[key]
+    ret = compile_format(data)
+    if ret.digest != key:
+        logger.warning("VDB format digest mismatch: %s != %s", ret.digest, key)
+    return ret
@@ -0,0 +1,457 @@
+"""VEKN registry client.
+
+A single client is shared by all registrations: its HTTP session keeps the
+connections to vekn.net alive, and the authentication token is cached until it
+expires. It is refreshed in the background shortly before, so that a lookup is a
+single registry request.
+
+Registry entries are cached in memory (LRU) and in the database: players register
+again and again across rounds and tournaments. "Not found" answers are cached for a
+shorter time. If the registry is slow or down, stale entries are used.
+
+A registry dump (CSV) can be imported in the database as a local mirror: it is used
+first, and it allows to search players by name. Import it with:
+
+    python -m archon_bot.registry dump.csv
+
+`await CLIENT.open()` before using it, and `await CLIENT.close()` when finished.
+"""
+
+import asyncio
+import base64
+import collections
+import csv
+import logging
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+
+import aiohttp
+import orjson
+import psycopg
+import unidecode
+
+from . import db
+
+logger = logging.getLogger()
+VEKN_URL = os.getenv("VEKN_URL") or "https://www.vekn.net"
+VEKN_LOGIN = os.getenv("VEKN_LOGIN")
+VEKN_PASSWORD = os.getenv("VEKN_PASSWORD")
+#: Timeout of a request to the registry (seconds)
+VEKN_TIMEOUT = float(os.getenv("VEKN_TIMEOUT", 0)) or 10.0
+#: Maximum concurrent requests to the registry
+VEKN_CONCURRENCY = int(os.getenv("VEKN_CONCURRENCY", 0)) or 8
+#: Token lifetime when VEKN does not tell (seconds)
+TOKEN_LIFETIME = 3600
+#: The token is refreshed in the background when it expires in less than this
+TOKEN_REFRESH = 300
+#: Registry entries cache lifetime (seconds)
+VEKN_CACHE_TTL = float(os.getenv("VEKN_CACHE_TTL", 0)) or 7 * 24 * 3600.0
+#: "Not found" answers cache lifetime (seconds)
+VEKN_NOT_FOUND_TTL = float(os.getenv("VEKN_NOT_FOUND_TTL", 0)) or 600.0
+#: Registry entries cached in memory
+VEKN_CACHE_SIZE = 10000
+#: Attempts of a bulk lookup when the registry cannot answer
+VEKN_RETRIES = 3
+#: Delay before the first retry of a bulk lookup (seconds), doubled for each retry
+VEKN_BACKOFF = 0.5
+#: Maximum number of players returned by a search
+SEARCH_LIMIT = 10
+
+
+class VEKNError(Exception):
+    """The registry could not answer"""
+
+
+class NotFound(VEKNError):
+    """The registry answered: no such VEKN ID#"""
+
+
+@dataclass
+class Member:
+    """A VEKN registry entry"""
+
+    vekn: str
+    name: str
+    country: str
+
+
+def _token_expiry(token: str) -> float:
+    """Expiry time of a JWT token, default lifetime if it cannot be decoded"""
+    try:
+        payload = token.split(".")[1]
+        payload = orjson.loads(base64.urlsafe_b64decode(payload + "=" * 4))
+        return float(payload["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + TOKEN_LIFETIME
+
+
+class Client:
+    """VEKN registry client: pooled connections, cached token, bounded concurrency"""
+
+    def __init__(
+        self,
+        url: str = VEKN_URL,
+        username: Optional[str] = VEKN_LOGIN,
+        password: Optional[str] = VEKN_PASSWORD,
+        timeout: float = VEKN_TIMEOUT,
+        concurrency: int = VEKN_CONCURRENCY,
+        cache_size: int = VEKN_CACHE_SIZE,
+    ):
+        self.url = url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token: Optional[str] = None
+        self._expiry = 0.0
+        self._login_task: Optional[asyncio.Task] = None
+        #: VEKN ID# -> (member, None if not found, and the time it was fetched)
+        self._cache: collections.OrderedDict[str, tuple[Optional[Member], float]] = (
+            collections.OrderedDict()
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self.session is None
+
+    async def open(self) -> None:
+        if self.session:
+            return
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        if self._login_task:
+            self._login_task.cancel()
+            self._login_task = None
+        if self.session:
+            await self.session.close()
+            self.session = None
+        self._token = None
+        self._expiry = 0.0
+
+    async def __aenter__(self) -> "Client":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _login(self) -> str:
+        logger.debug("Login to VEKN")
+        try:
+            async with self._semaphore:
+                async with self.session.post(
+                    f"{self.url}/api/vekn/login",
+                    data={"username": self.username, "password": self.password},
+                ) as response:
+                    result = await response.json(content_type=None)
+            token = result["data"]["auth"]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise VEKNError("Unable to reach VEKN") from e
+        except (KeyError, TypeError, ValueError) as e:
+            raise VEKNError("Unable to authentify to VEKN") from e
+        if not token:
+            raise VEKNError("Unable to authentify to VEKN")
+        self._token, self._expiry = token, _token_expiry(token)
+        return token
+
+    async def token(self) -> str:
+        """Authentication token: cached, a single login for concurrent requests"""
+        remaining = self._expiry - time.time()
+        if self._token and remaining > TOKEN_REFRESH:
+            return self._token
+        if not self._login_task or self._login_task.done():
+            self._login_task = asyncio.create_task(self._login())
+            self._login_task.add_done_callback(_log_failure)
+        if self._token and remaining > 0:
+            # still valid: refreshed in the background
+            return self._token
+        return await asyncio.shield(self._login_task)
+
+    async def _registry(self, vekn: str, token: str) -> Optional[dict]:
+        async with self._semaphore:
+            async with self.session.get(
+                f"{self.url}/api/vekn/registry",
+                params={"filter": vekn},
+                headers={"Authorization": f"Bearer {token}"},
+            ) as response:
+                if response.status == 401:
+                    return None
+                if response.status >= 500:
+                    raise VEKNError(f"VEKN returned an error: HTTP {response.status}")
+                return await response.json(content_type=None)
+
+    async def member(self, vekn: str) -> Member:
+        """Registry entry of a VEKN ID#.
+
+        Raise `NotFound` if the registry has no such member, `VEKNError` if the
+        registry cannot answer.
+        """
+        logger.info("Checking VEKN# %s", vekn)
+        try:
+            result = await self._registry(vekn, await self.token())
+            if result is None:
+                # token revoked or expired early
+                self._token = None
+                result = await self._registry(vekn, await self.token())
+            return _member(vekn, result["data"])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise VEKNError("Unable to reach VEKN") from e
+        except (KeyError, TypeError, ValueError) as e:
+            raise VEKNError("VEKN returned an invalid answer") from e
+
+    async def lookup(self, vekn: str) -> Member:
+        """Cached registry entry of a VEKN ID#.
+
+        Raise `NotFound` if the registry has no such member, `VEKNError` if the
+        registry cannot answer and there is no stale entry for this VEKN ID#.
+        """
+        entry = self._cache.get(vekn)
+        if not _fresh(entry):
+            entry = (
+                await self._mirror_read(vekn) or await self._cache_read(vekn) or entry
+            )
+        if entry:
+            self._remember(vekn, *entry)
+            if _fresh(entry):
+                if not entry[0]:
+                    raise NotFound("VEKN ID# not found")
+                return entry[0]
+        try:
+            member = await self.member(vekn)
+        except NotFound:
+            await self._cache_write(vekn, None)
+            raise
+        except VEKNError:
+            if entry and entry[0]:
+                logger.warning("VEKN unavailable, using stale entry for %s", vekn)
+                return entry[0]
+            raise
+        await self._cache_write(vekn, member)
+        return member
+
+    async def lookup_many(
+        self,
+        vekns: Iterable[str],
+        workers: Optional[int] = None,
+        callback: Optional[Callable] = None,
+    ) -> dict[str, Union[Member, VEKNError]]:
+        """Cached registry entries of VEKN IDs#, or the error for each of them.
+
+        Each VEKN ID# is looked up once (see `lookup_each()`). The async callback
+        is awaited with the numbers of VEKN IDs# done and total.
+        """
+        vekns = list(dict.fromkeys(vekns))
+        results = {}
+        async for vekn, result in self.lookup_each(vekns, workers):
+            results[vekn] = result
+            if callback:
+                await callback(len(results), len(vekns))
+        return {vekn: results[vekn] for vekn in vekns}
+
+    async def lookup_each(
+        self, vekns: Iterable[str], workers: Optional[int] = None
+    ) -> AsyncIterator[tuple[str, Union[Member, VEKNError]]]:
+        """Yield (VEKN ID#, registry entry or error) as they are looked up.
+
+        The VEKN IDs# are consumed as needed by a pool of workers (as many as the
+        concurrency by default) sharing a single login. When the registry cannot
+        answer, a lookup is retried with an exponential backoff.
+        """
+        vekns = iter(vekns)
+        results = asyncio.Queue(workers or self.concurrency)
+
+        async def worker() -> None:
+            try:
+                for vekn in vekns:
+                    await results.put((vekn, await self._lookup_retry(vekn)))
+                await results.put(None)
+            except Exception as e:
+                await results.put(e)
+
+        tasks = [
+            asyncio.create_task(worker()) for _ in range(workers or self.concurrency)
+        ]
+        running = len(tasks)
+        try:
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _lookup_retry(self, vekn: str) -> Union[Member, VEKNError]:
+        for attempt in range(VEKN_RETRIES):
+            try:
+                return await self.lookup(vekn)
+            except NotFound as e:
+                return e
+            except VEKNError as e:
+                error = e
+                if attempt + 1 < VEKN_RETRIES:
+                    await asyncio.sleep(VEKN_BACKOFF * 2**attempt)
+        return error
+
+    def _remember(self, vekn: str, member: Optional[Member], fetched: float) -> None:
+        self._cache[vekn] = member, fetched
+        self._cache.move_to_end(vekn)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _mirror_read(self, vekn: str) -> Optional[tuple[Member, float]]:
+        if db.POOL.closed:
+            return None
+        try:
+            data = await db.get_registry_member(vekn)
+        except psycopg.Error:
+            logger.exception("Failed to read the VEKN registry mirror")
+            return None
+        if not data:
+            return None
+        return Member(vekn, *data), time.time()
+
+    async def _cache_read(self, vekn: str) -> Optional[tuple[Optional[Member], float]]:
+        if db.POOL.closed:
+            return None
+        try:
+            data = await db.get_vekn(vekn)
+        except psycopg.Error:
+            logger.exception("Failed to read the VEKN cache")
+            return None
+        if not data:
+            return None
+        name, country, age = data
+        member = Member(vekn=vekn, name=name, country=country) if name else None
+        return member, time.time() - age
+
+    async def _cache_write(self, vekn: str, member: Optional[Member]) -> None:
+        self._remember(vekn, member, time.time())
+        if db.POOL.closed:
+            return
+        try:
+            await db.set_vekn(
+                vekn,
+                member.name if member else None,
+                member.country if member else None,
+            )
+        except psycopg.Error:
+            logger.exception("Failed to write the VEKN cache")
+
+
+def _fresh(entry: Optional[tuple[Optional[Member], float]]) -> bool:
+    if not entry:
+        return False
+    member, fetched = entry
+    return time.time() - fetched < (VEKN_CACHE_TTL if member else VEKN_NOT_FOUND_TTL)
+
+
+def _member(vekn: str, data) -> Member:
+    """Member from the registry answer data"""
+    if isinstance(data, str):
+        raise VEKNError(f"VEKN returned an error: {data}")
+    players = data["players"]
+    if len(players) > 1:
+        raise NotFound("Invalid VEKN ID# (it should be 7 digits)")
+    if len(players) < 1 or players[0]["veknid"] != str(vekn):
+        raise NotFound("VEKN ID# not found")
+    return Member(
+        vekn=str(vekn),
+        name=players[0]["firstname"] + " " + players[0]["lastname"],
+        country=players[0].get("countryname") or "",
+    )
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    """Login task callback: the next request retries if it failed"""
+    if not task.cancelled() and task.exception():
+        logger.warning("Failed to login to VEKN: %s", task.exception())
+
+
+#: await CLIENT.open() before using it, and CLIENT.close() when finished
+CLIENT = Client()
+
+
+def search_key(name: str) -> str:
+    """Normalised name for searches: lowercase ASCII alphanumeric words"""
+    return " ".join(re.split(r"[^a-z0-9]+", unidecode.unidecode(name).lower())).strip()
+
+
+def parse_dump(lines: Iterable[str]) -> Iterator[Member]:
+    """Registry members from a CSV dump.
+
+    The header names the columns like the registry API: veknid, firstname,
+    lastname and countryname (or vekn, name and country). Extra fields are ignored,
+    and so are the duplicates of a VEKN ID# (the first entry is kept).
+    """
+    seen = set()
+    for row in csv.DictReader(lines):
+        row = {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            # fields beyond the header are listed under None
+            if key is not None
+        }
+        vekn = (row.get("veknid") or row.get("vekn") or "").strip("#")
+        if not vekn:
+            continue
+        if vekn in seen:
+            logger.warning("Duplicated VEKN ID# in the registry dump: %s", vekn)
+            continue
+        seen.add(vekn)
+        name = row.get("name") or " ".join(
+            filter(None, [row.get("firstname"), row.get("lastname")])
+        )
+        yield Member(vekn, name, row.get("countryname") or row.get("country") or "")
+
+
+async def import_dump(path: str) -> int:
+    """Replace the registry mirror with a CSV dump, return the members count"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return await db.import_registry(
+            (m.vekn, m.name, m.country, search_key(m.name)) for m in parse_dump(f)
+        )
+
+
+async def search(name: str, limit: int = SEARCH_LIMIT) -> list[Member]:
+    """Registry mirror members matching a partial name (accents and case ignored)"""
+    words = search_key(name).split()
+    if not words or db.POOL.closed:
+        return []
+    return [Member(*row) for row in await db.search_registry(words, limit)]
+
+
+async def _import(path: str) -> None:
+    await db.POOL.open()
+    try:
+        await db.init()
+        count = await import_dump(path)
+    finally:
+        await db.POOL.close()
+    logger.info("Imported %s VEKN members", count)
+
+
+def main(path: str) -> None:
+    """Import a registry dump in the database."""
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)7s] %(message)s")
+    asyncio.run(_import(path))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,186 @@
+"""Columnar results store.
+
+Rounds results are stored as `dict[str, Score]` for each round (that is the JSON
+format). For aggregations (standings, reports), it is far cheaper to work on arrays:
+one row per round, one column per player.
+"""
+
+import itertools
+import math
+import random
+from typing import Iterable, Optional, Tuple
+
+import numpy
+
+#: (gw, vp, tp)
+ScoreTuple = Tuple[int, float, int]
+
+
+class ResultsTable:
+    """All rounds results as numpy arrays of shape (rounds, players).
+
+    - gw, vp, tp: the score of each player for each round
+    - reported: the player has a result recorded for the round
+    - seated: the player was seated in the round
+    """
+
+    def __init__(
+        self,
+        vekns: list[str],
+        gw: numpy.ndarray,
+        vp: numpy.ndarray,
+        tp: numpy.ndarray,
+        reported: numpy.ndarray,
+        seated: Optional[numpy.ndarray] = None,
+    ):
+        self.vekns = vekns
+        self.index = {vekn: i for i, vekn in enumerate(vekns)}
+        self.gw = gw
+        self.vp = vp
+        self.tp = tp
+        self.reported = reported
+        self.seated = reported.copy() if seated is None else seated
+
+    @classmethod
+    def empty(cls, vekns: list[str], rounds_count: int) -> "ResultsTable":
+        shape = (rounds_count, len(vekns))
+        return cls(
+            vekns,
+            gw=numpy.zeros(shape, dtype=numpy.int64),
+            vp=numpy.zeros(shape, dtype=numpy.float64),
+            tp=numpy.zeros(shape, dtype=numpy.int64),
+            reported=numpy.zeros(shape, dtype=bool),
+            seated=numpy.zeros(shape, dtype=bool),
+        )
+
+    @classmethod
+    def from_rounds(cls, rounds: list) -> "ResultsTable":
+        """Build the table from `tournament.Round` objects (seating and results)."""
+        index = {}
+        for round_ in rounds:
+            for vekn in itertools.chain(round_.seating.iter_players(), round_.results):
+                index.setdefault(vekn, len(index))
+        ret = cls.empty(list(index), len(rounds))
+        for i, round_ in enumerate(rounds):
+            seated = [index[vekn] for vekn in round_.seating.iter_players()]
+            ret.seated[i, seated] = True
+            if not round_.results:
+                continue
+            columns = [index[vekn] for vekn in round_.results]
+            scores = round_.results.values()
+            ret.gw[i, columns] = [s.gw for s in scores]
+            ret.vp[i, columns] = [s.vp for s in scores]
+            ret.tp[i, columns] = [s.tp for s in scores]
+            ret.reported[i, columns] = True
+        return ret
+
+    @classmethod
+    def from_json(cls, rounds: list[dict]) -> "ResultsTable":
+        """Build the table from its JSON form, see `to_json()`."""
+        index = {}
+        for round_ in rounds:
+            for vekn in itertools.chain(round_["seated"], round_["results"]):
+                index.setdefault(vekn, len(index))
+        ret = cls.empty(list(index), len(rounds))
+        for i, round_ in enumerate(rounds):
+            ret.seated[i, [index[vekn] for vekn in round_["seated"]]] = True
+            for vekn, score in round_["results"].items():
+                j = index[vekn]
+                ret.gw[i, j] = score["gw"]
+                ret.vp[i, j] = score["vp"]
+                ret.tp[i, j] = score["tp"]
+                ret.reported[i, j] = True
+        return ret
+
+    def to_json(self) -> list[dict]:
+        """One dict per round: the seated players, and the results (as stored in
+        the tournament data)."""
+        ret = []
+        for i in range(self.reported.shape[0]):
+            ret.append(
+                {
+                    "seated": [
+                        self.vekns[j] for j in numpy.flatnonzero(self.seated[i])
+                    ],
+                    "results": {
+                        self.vekns[j]: {
+                            "gw": int(self.gw[i, j]),
+                            "vp": float(self.vp[i, j]),
+                            "tp": int(self.tp[i, j]),
+                        }
+                        for j in numpy.flatnonzero(self.reported[i])
+                    },
+                }
+            )
+        return ret
+
+    def totals(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Total (gw, vp, tp) for each player."""
+        return self.gw.sum(axis=0), self.vp.sum(axis=0), self.tp.sum(axis=0)
+
+    def rounds_played(self) -> numpy.ndarray:
+        """Number of rounds each player was seated in."""
+        return self.seated.sum(axis=0)
+
+    def player_score(self, vekn: str) -> ScoreTuple:
+        j = self.index.get(vekn, None)
+        if j is None:
+            return 0, 0.0, 0
+        return (
+            int(self.gw[:, j].sum()),
+            float(self.vp[:, j].sum()),
+            int(self.tp[:, j].sum()),
+        )
+
+    def player_rounds_played(self, vekn: str) -> int:
+        j = self.index.get(vekn, None)
+        if j is None:
+            return 0
+        return int(self.seated[:, j].sum())
+
+    def ranking(
+        self,
+        dropped: Iterable[str] = (),
+        winner: Optional[str] = None,
+        seeds: Optional[dict[str, int]] = None,
+        toss: bool = False,
+    ) -> list[Tuple[int, str, ScoreTuple]]:
+        """Full ranking [(rank, vekn, (gw, vp, tp))] of players with results.
+
+        Order: non-dropped players first, then winner, score, finals seed, then
+        either a random toss or the VEKN#. Ties share the same rank, except for
+        finalists: they are all ranked 2nd after the winner.
+        """
+        seeds = seeds or {}
+        columns = numpy.flatnonzero(self.reported.any(axis=0))
+        vekns = numpy.array([self.vekns[j] for j in columns], dtype=str)
+        gw, vp, tp = (a[columns] for a in self.totals())
+        dropped = set(dropped)
+        is_dropped = numpy.array([v in dropped for v in vekns], dtype=bool)
+        is_winner = vekns == winner if winner else numpy.zeros(len(vekns), bool)
+        # if you win the toss once, you keep your win: seed goes before the toss
+        # 0 would go before negative seed numbers, -math.inf goes last
+        seed = numpy.array([-seeds.get(v, 0) or -math.inf for v in vekns], dtype=float)
+        if toss:
+            last = numpy.array([random.random() for _ in vekns], dtype=float)
+        else:
+            last = vekns
+        # lexsort: last key is the primary one, ascending order
+        order = numpy.lexsort((last, seed, tp, vp, gw, is_winner, ~is_dropped))[::-1]
+        gw, vp, tp = gw[order], vp[order], tp[order]
+        vekns, is_dropped = vekns[order], is_dropped[order]
+        positions = numpy.arange(1, len(order) + 1)
+        # a new rank starts on each score change
+        changed = numpy.ones(len(order), dtype=bool)
+        changed[1:] = (gw[1:] != gw[:-1]) | (vp[1:] != vp[:-1]) | (tp[1:] != tp[:-1])
+        ranks = numpy.where(changed, positions, 0)
+        if winner:
+            ranks[1:5] = 2
+        ranks = numpy.maximum.accumulate(ranks)
+        # dropped players all share the rank of the first dropped player
+        first_dropped = numpy.argmax(is_dropped) if is_dropped.any() else len(order)
+        ranks[first_dropped:] = first_dropped + 1
+        return [
+            (int(rank), str(vekn), (int(g), float(v), int(t)))
+            for rank, vekn, g, v, t in zip(ranks, vekns, gw, vp, tp)
+        ]
@@ -0,0 +1,424 @@
+"""Incremental seating score, for the seating optimisation.
+
+`krcg.seating.Score.fast_total` measures the whole tournament for each candidate
+swap: it allocates and scans players² matrices. The evaluator keeps the measure
+(positions and opponents relationships) as NumPy arrays and the count of
+violations for each rule: a swap only changes the relationships of the players at
+the tables involved, so evaluating it only looks at those players (10 at most).
+
+The total is the same as `krcg.seating.Score.fast_total`.
+
+The previous rounds can be given as a `SeatingHistory`, maintained round by round
+and stored with the tournament: the setup then does not depend on the number of
+previous rounds.
+"""
+
+import base64
+import itertools
+import math
+from dataclasses import dataclass, field
+from typing import Hashable, Optional
+
+import krcg.seating
+import numpy
+
+#: Rules weights, in order
+WEIGHTS = [rule[2] for rule in krcg.seating.RULES]
+# columns of the opponents relationships (see `krcg.seating.measure`)
+OPPONENT, PREY = 0, 1
+#: Relationships and positions are counted over all rounds: int8 would suffice
+DTYPE = numpy.int16
+
+
+def _table_pairs(size: int) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Ordered pairs of seats at a table, with their relationship vector."""
+    seats = [(i, j) for i in range(size) for j in range(size) if i != j]
+    return (
+        numpy.array([i for i, _ in seats]),
+        numpy.array([j for _, j in seats]),
+        numpy.array(
+            [krcg.seating.OPPONENTS[size][(j - i - 1) % size] for i, j in seats],
+            dtype=DTYPE,
+        ),
+    )
+
+
+TABLE_PAIRS = {size: _table_pairs(size) for size in [4, 5]}
+#: Relationships of the second player to the first: prey and predator swapped...
+REVERSE = [0, 4, 3, 2, 1, 5, 6, 7]
+#: Compact history arrays: players indexes and relationships counts
+HISTORY_INDEX, HISTORY_COUNT = numpy.uint16, numpy.int8
+
+
+def _tables_pairs(*sizes: int) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Ordered pairs of seats of consecutive tables, with their relationships"""
+    first, second, relationships = [], [], []
+    offset = 0
+    for size in sizes:
+        f, s, r = TABLE_PAIRS[size]
+        first.append(f + offset)
+        second.append(s + offset)
+        relationships.append(r)
+        offset += size
+    return (
+        numpy.concatenate(first),
+        numpy.concatenate(second),
+        numpy.concatenate(relationships),
+    )
+
+
+#: Pairs of seats of the tables involved in a swap: one table or two tables
+SWAP_PAIRS = {
+    sizes: _tables_pairs(*sizes)
+    for sizes in [(4,), (5,), (4, 4), (4, 5), (5, 4), (5, 5)]
+}
+
+
+@dataclass
+class SeatingHistory:
+    """Positions and relationships of the players over previous rounds.
+
+    Only the pairs of players who met are kept. The arrays are stored as base64
+    strings: the history is stored with the tournament, and decoded with it for
+    each interaction.
+    """
+
+    #: number of rounds
+    rounds: int = 0
+    #: players, in the order of the positions rows
+    players: list[str] = field(default_factory=list)
+    #: played, VPs, transfers, seat 1 to 5 of each player (see krcg `measure`)
+    position: str = ""
+    #: pairs of players who met (players indexes, lowest first)
+    pairs: str = ""
+    #: relationships of the first player to the second: opponent, prey, ...
+    relationships: str = ""
+
+    @classmethod
+    def from_rounds(cls, rounds: list[krcg.seating.Round]) -> "SeatingHistory":
+        history = cls()
+        for round_ in rounds:
+            history.add(round_)
+        return history
+
+    def arrays(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Decoded position, pairs and relationships arrays"""
+        return (
+            _decode(self.position, DTYPE, 8),
+            _decode(self.pairs, HISTORY_INDEX, 2),
+            _decode(self.relationships, HISTORY_COUNT, 8),
+        )
+
+    def add(self, round_: krcg.seating.Round) -> None:
+        """Add a round seating to the history."""
+        self._update(round_, 1)
+
+    def remove(self, round_: krcg.seating.Round) -> None:
+        """Remove a round seating from the history (the last one added)."""
+        self._update(round_, -1)
+
+    def rename(self, previous: str, new: str) -> None:
+        """Change a player's ID (VEKN# change), keeping their history."""
+        # new list: the history can be shared with a running seating computation
+        self.players = [new if p == previous else p for p in self.players]
+
+    def _update(self, round_: krcg.seating.Round, sign: int) -> None:
+        position, pairs, relationships = self.arrays()
+        index = {player: i for i, player in enumerate(self.players)}
+        players = [p for p in round_.iter_players() if p not in index]
+        for player in players:
+            index[player] = len(index)
+        # new list: the history can be shared with a running seating computation
+        self.players = self.players + players
+        position = numpy.concatenate([position, numpy.zeros((len(players), 8), DTYPE)])
+        pairs, relationships = [pairs.astype(int)], [relationships]
+        for table in round_:
+            ids = numpy.array([index[p] for p in table])
+            first, second, table_relationships = TABLE_PAIRS[len(table)]
+            position[ids] += sign * krcg.seating.POSITIONS[len(table)]
+            lowest = ids[first] < ids[second]
+            pairs.append(numpy.stack([ids[first], ids[second]], axis=1)[lowest])
+            relationships.append(sign * table_relationships[lowest])
+        pairs = numpy.concatenate(pairs)
+        keys, inverse = numpy.unique(
+            pairs[:, 0] * len(index) + pairs[:, 1], return_inverse=True
+        )
+        summed = numpy.zeros((len(keys), 8), HISTORY_COUNT)
+        numpy.add.at(summed, inverse.ravel(), numpy.concatenate(relationships))
+        # removing a round: pairs who no longer met
+        met = summed.any(axis=1)
+        pairs = numpy.stack([keys // len(index), keys % len(index)], axis=1)
+        self.rounds += sign
+        self.position = _encode(position)
+        self.pairs = _encode(pairs[met].astype(HISTORY_INDEX))
+        self.relationships = _encode(summed[met])
+
+    def measure(
+        self, pm: dict[Hashable, int]
+    ) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Position and opponents matrices for this players mapping.
+
+        Also return the pairs who met, as indexes of the flattened opponents rows.
+        Players missing from the mapping are ignored.
+        """
+        players_count = len(pm)
+        position = numpy.zeros((players_count, 8), DTYPE)
+        opponents = numpy.zeros((players_count, players_count, 8), DTYPE)
+        history_position, pairs, relationships = self.arrays()
+        ids = numpy.array([pm.get(p, -1) for p in self.players], dtype=int)
+        mapped = ids >= 0
+        position[ids[mapped]] = history_position[mapped]
+        first, second = ids[pairs[:, 0]], ids[pairs[:, 1]]
+        mapped = (first >= 0) & (second >= 0)
+        first, second = first[mapped], second[mapped]
+        opponents[first, second] = relationships[mapped]
+        opponents[second, first] = relationships[mapped][:, REVERSE]
+        return (
+            position,
+            opponents,
+            numpy.concatenate(
+                [first * players_count + second, second * players_count + first]
+            ),
+        )
+
+
+def _encode(array: numpy.ndarray) -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _decode(data: str, dtype, columns: int) -> numpy.ndarray:
+    return (
+        numpy.frombuffer(base64.b64decode(data), dtype=dtype)
+        .reshape(-1, columns)
+        .copy()
+    )
+
+
+def player_mapping(
+    rounds: list[krcg.seating.Round], history: Optional[SeatingHistory] = None
+) -> dict[Hashable, int]:
+    """Players indexes: the players of the history who played, then the others"""
+    players = []
+    if history and history.players:
+        played = _decode(history.position, DTYPE, 8)[:, 0] > 0
+        players = itertools.compress(history.players, played)
+    players = itertools.chain(
+        players, itertools.chain.from_iterable(r.iter_players() for r in rounds)
+    )
+    return {p: i for i, p in enumerate(dict.fromkeys(players))}
+
+
+class SeatingEvaluator:
+    """Score of a seating, updated incrementally on players swaps.
+
+    Usage, for simulated annealing:
+
+        evaluator = SeatingEvaluator(rounds)
+        total = evaluator.evaluate(round_index, (table, seat), (table, seat))
+        if accepted:
+            evaluator.commit()  # swaps the players in the rounds
+
+    The rounds are modified in place by `commit()`. The previous rounds can be
+    given as a history instead of rounds.
+    """
+
+    def __init__(
+        self,
+        rounds: list[krcg.seating.Round],
+        pm: Optional[dict[Hashable, int]] = None,
+        history: Optional[SeatingHistory] = None,
+    ):
+        self.rounds = rounds
+        history = history or SeatingHistory()
+        self.pm = pm or player_mapping(rounds, history)
+        self.rounds_count = history.rounds + len(rounds)
+        # R2: opponents in all rounds (but more than once)
+        self.threshold = max(2, self.rounds_count)
+        players_count = len(self.pm)
+        self.position, self.opponents, met = history.measure(self.pm)
+        met = [met]
+        for round_ in rounds:
+            # tables of each size, as arrays of players indexes
+            tables = {4: [], 5: []}
+            for table in round_:
+                tables[len(table)].append([self.pm[p] for p in table])
+            for size, ids in tables.items():
+                if not ids:
+                    continue
+                # players and pairs are unique in a round: vectorised add
+                ids = numpy.array(ids)
+                first, second, relationships = TABLE_PAIRS[size]
+                self.position[ids] += krcg.seating.POSITIONS[size]
+                self.opponents[ids[:, first], ids[:, second]] += relationships
+                met.append((ids[:, first] * players_count + ids[:, second]).ravel())
+        # violations counts, see `total`: only the pairs of players who met count,
+        # do not scan the whole matrix (players²) for large fields
+        pairs = self.opponents.reshape(-1, 8)[numpy.unique(numpy.concatenate(met))]
+        self.over = numpy.count_nonzero(pairs > 1, axis=0)
+        self.over_all_rounds = numpy.count_nonzero(pairs[:, OPPONENT] >= self.threshold)
+        self.seats_over = numpy.count_nonzero(self.position[:, 3:] > 1, axis=0)
+        # average VPs and transfers: sum and sum of squares of players ratios
+        self.playing = numpy.count_nonzero(self.position[:, 0])
+        ratios = self._ratios(self.position)
+        self.sums = ratios.sum(axis=0)
+        self.squares = (ratios**2).sum(axis=0)
+        self.total = self._total(
+            self.over, self.over_all_rounds, self.seats_over, self.sums, self.squares
+        )
+        self._pending = None
+
+    def score(self) -> krcg.seating.Score:
+        """Detailed score (see `krcg.seating.Score`)"""
+        score = krcg.seating.Score.__new__(krcg.seating.Score)
+        score.score_measure(
+            krcg.seating.Measure(self.position, self.opponents),
+            self.rounds_count,
+            self.pm,
+        )
+        return score
+
+    @staticmethod
+    def _ratios(position: numpy.ndarray) -> numpy.ndarray:
+        """VPs and transfers available to each playing player, by round played"""
+        playing = position[:, 0] > 0
+        return position[playing][:, 1:3] / position[playing][:, :1]
+
+    def rules(self) -> list[float]:
+        """Values of the 9 rules, as in `krcg.seating.Score.rules`.
+
+        The total uses the variances of VPs and transfers (R3, R8), the rules
+        display their standard deviations.
+        """
+        rules = self._rules(
+            self.over, self.over_all_rounds, self.seats_over, self.sums, self.squares
+        )
+        return [
+            math.sqrt(rule) if index in (2, 7) else float(rule)
+            for index, rule in enumerate(rules)
+        ]
+
+    def _rules(
+        self,
+        over: numpy.ndarray,
+        over_all_rounds: int,
+        seats_over: numpy.ndarray,
+        sums: numpy.ndarray,
+        squares: numpy.ndarray,
+    ) -> list:
+        means = sums / self.playing
+        variances = numpy.maximum(squares / self.playing - means**2, 0)
+        return [
+            # predator-prey relationship: counted once, as prey
+            over[PREY],
+            over_all_rounds // 2,
+            variances[0],
+            over[OPPONENT] // 2,
+            seats_over[4],
+            over[1:6].sum() // 2,
+            seats_over.sum(),
+            variances[1],
+            over[6:].sum() // 2,
+        ]
+
+    def _total(self, *args) -> float:
+        rules = self._rules(*args)
+        return float(sum(rule * weight for rule, weight in zip(rules, WEIGHTS)))
+
+    def evaluate(
+        self, round_index: int, i: tuple[int, int], j: tuple[int, int]
+    ) -> float:
+        """Total score if the players at seats i and j (table, seat) were swapped.
+
+        Call `commit()` to actually swap them.
+        """
+        round_ = self.rounds[round_index]
+        (t1, s1), (t2, s2) = i, j
+        if i == j:
+            self._pending = None
+            return self.total
+        tables = [round_[t1]] if t1 == t2 else [round_[t1], round_[t2]]
+        # local indexes: players of the tables involved
+        players = [p for table in tables for p in table]
+        ids = numpy.array([self.pm[p] for p in players])
+        first, second, relationships = SWAP_PAIRS[tuple(len(t) for t in tables)]
+        # the swap permutes two local indexes
+        a = s1
+        b = s2 if t1 == t2 else len(round_[t1]) + s2
+        permutation = numpy.arange(len(players))
+        permutation[a], permutation[b] = b, a
+        block = self.opponents[numpy.ix_(ids, ids)]
+        before = block > 1
+        all_rounds_before = numpy.count_nonzero(block[:, :, OPPONENT] >= self.threshold)
+        block[first, second] -= relationships
+        block[permutation[first], permutation[second]] += relationships
+        over = self.over + (
+            numpy.count_nonzero(block > 1, axis=(0, 1))
+            - numpy.count_nonzero(before, axis=(0, 1))
+        )
+        over_all_rounds = (
+            self.over_all_rounds
+            + numpy.count_nonzero(block[:, :, OPPONENT] >= self.threshold)
+            - all_rounds_before
+        )
+        # positions of the swapped players
+        rows = ids[[a, b]]
+        position = self.position[rows]
+        old = numpy.array(
+            [
+                krcg.seating.POSITIONS[len(round_[t1])][s1],
+                krcg.seating.POSITIONS[len(round_[t2])][s2],
+            ]
+        )
+        new = position - old + old[::-1]
+        seats_over = self.seats_over + (
+            numpy.count_nonzero(new[:, 3:] > 1, axis=0)
+            - numpy.count_nonzero(position[:, 3:] > 1, axis=0)
+        )
+        old_ratios = position[:, 1:3] / position[:, :1]
+        new_ratios = new[:, 1:3] / new[:, :1]
+        sums = self.sums + new_ratios.sum(axis=0) - old_ratios.sum(axis=0)
+        squares = (
+            self.squares + (new_ratios**2).sum(axis=0) - (old_ratios**2).sum(axis=0)
+        )
+        total = self._total(over, over_all_rounds, seats_over, sums, squares)
+        self._pending = (
+            round_index,
+            i,
+            j,
+            ids,
+            block,
+            rows,
+            new,
+            over,
+            over_all_rounds,
+            seats_over,
+            sums,
+            squares,
+            total,
+        )
+        return total
+
+    def commit(self) -> None:
+        """Swap the players of the last evaluated swap."""
+        if not self._pending:
+            return
+        (
+            round_index,
+            (t1, s1),
+            (t2, s2),
+            ids,
+            block,
+            rows,
+            new,
+            self.over,
+            self.over_all_rounds,
+            self.seats_over,
+            self.sums,
+            self.squares,
+            self.total,
+        ) = self._pending
+        self._pending = None
+        self.opponents[numpy.ix_(ids, ids)] = block
+        self.position[rows] = new
+        round_ = self.rounds[round_index]
+        round_[t1][s1], round_[t2][s2] = round_[t2][s2], round_[t1][s1]
@@ -0,0 +1,890 @@
+"""Seating engine: seating optimisation in worker processes.
+
+The optimisation is CPU bound: run in a thread, it competes with the event loop for
+the GIL and the interactions of all guilds stall during a seating computation.
+Rounds are sent to the workers as plain lists and the progress is streamed back
+over a queue, polled from the event loop.
+
+The optimisation follows `krcg.seating.optimise` (simulated annealing) but runs
+on a wall-clock budget and stops early once it has converged.
+
+Optimised seatings are cached in the database, by content (see `cache_key()`):
+the same players after the same rounds get the same seating right away.
+
+Very large fields are seated by groups (see `partition()`): each group of players
+is optimised independently, in parallel, then a final pass repairs the seating
+across the groups.
+
+While players check in, the next round seating is computed in the background
+(see `speculate()`): if the checked-in players have not changed when the round
+starts, the seating is available right away.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Hashable, Optional
+
+import krcg.seating
+import orjson
+import psycopg
+
+from . import db
+from . import exact as exact_solver
+from . import scoring
+
+logger = logging.getLogger()
+#: Number of worker processes (defaults to the number of CPUs)
+SEATING_WORKERS = int(os.getenv("SEATING_WORKERS", 0)) or os.cpu_count() or 1
+#: Number of independent optimisation chains (defaults to the number of workers)
+SEATING_CHAINS = int(os.getenv("SEATING_CHAINS", 0)) or SEATING_WORKERS
+#: Wall-clock budget of a seating computation (seconds)
+SEATING_BUDGET = float(os.getenv("SEATING_BUDGET", 0)) or 30.0
+#: Stop when the best score has not improved for that many steps
+SEATING_PATIENCE = int(os.getenv("SEATING_PATIENCE", 0)) or 5000
+#: Players count from which a round is seated by groups
+SEATING_GROUPS_THRESHOLD = int(os.getenv("SEATING_GROUPS_THRESHOLD", 0)) or 300
+#: Players per group, for large fields
+SEATING_GROUP_SIZE = int(os.getenv("SEATING_GROUP_SIZE", 0)) or 100
+#: Share of the budget for the repair pass across the groups
+REPAIR_SHARE = 0.2
+#: Share of the budget for the annealing that starts an exact search
+EXACT_ANNEAL_SHARE = 0.1
+#: Delay before a speculative seating starts, restarted on each change (seconds)
+SPECULATION_DELAY = float(os.getenv("SPECULATION_DELAY", 0)) or 5.0
+#: Progress polling period (seconds)
+POLL_PERIOD = 0.1
+
+EXECUTOR: Optional[concurrent.futures.ProcessPoolExecutor] = None
+MANAGER = None
+#: Seating computations running for a round start (not speculative), all guilds
+LIVE = 0
+
+
+def _init_worker() -> None:
+    """Preload krcg in the worker process, lower its priority.
+
+    When the CPUs are busy, interactions should get them before seating workers.
+    """
+    import krcg.seating  # noqa: F401
+
+    os.nice(10)
+
+
+def start() -> None:
+    """Start the worker processes pool. Called on demand if need be."""
+    global EXECUTOR, MANAGER
+    if EXECUTOR:
+        return
+    # do not fork the bot process: its event loop and threads would be copied
+    context = multiprocessing.get_context("spawn")
+    EXECUTOR = concurrent.futures.ProcessPoolExecutor(
+        max_workers=SEATING_WORKERS, mp_context=context, initializer=_init_worker
+    )
+    MANAGER = context.Manager()
+    logger.info("Seating engine started with %s workers", SEATING_WORKERS)
+
+
+def shutdown() -> None:
+    """Stop the worker processes pool."""
+    global EXECUTOR, MANAGER
+    if EXECUTOR:
+        EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        EXECUTOR = None
+    if MANAGER:
+        MANAGER.shutdown()
+        MANAGER = None
+
+
+@dataclass
+class SeatingResult:
+    rounds: list[krcg.seating.Round]
+    score: krcg.seating.Score
+    #: iterations of all chains
+    iterations: int
+    #: wall-clock time (seconds)
+    elapsed: float
+    #: reused from the cache
+    cached: bool = False
+    #: proven optimal (exact solver)
+    optimal: bool = False
+    #: optimised by groups of players (see `partition()`)
+    groups: bool = False
+    #: computed in the background, before the round started (see `speculate()`)
+    speculative: bool = False
+    #: convergence trace: the annealing checkpoints of all chains (see `_gather()`)
+    trace: list[dict] = field(default_factory=list)
+
+
+def anneal(
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    budget: float,
+    patience: int,
+    max_iterations: Optional[int] = None,
+    callback: Optional[Callable] = None,
+    stop=None,
+    history: Optional[scoring.SeatingHistory] = None,
+) -> tuple[list[krcg.seating.Round], krcg.seating.Score, int]:
+    """Simulated annealing with a wall-clock budget and early stopping.
+
+    Same moves, cooling and resets to the best state as `krcg.seating.optimise`,
+    with an incremental evaluation of the moves (see `scoring`). The schedule
+    follows the elapsed fraction of the budget (or of max_iterations, if it is
+    further). Stops when the budget is spent, when the
+    score is zero (no violation) or when it has not improved for `patience` steps.
+    Also stops when the `stop` event is set (checked every 100th of the way).
+
+    The callback is called every 100th of the way, and at the end, with the keyword
+    arguments progress (0 to 1), step, score and rules (best so far), temperature,
+    and the trials, accepts and improves since the previous call (for telemetry).
+    The rounds before the given ones can be given as a history.
+    Returns the best rounds, their score and the number of iterations.
+    """
+    random.seed()
+    # annealing parameters from krcg.seating.optimise
+    temperature_min = 0.001
+    temperature_max = krcg.seating.RULES[0][2]
+    temperature_factor = -math.log(temperature_max / temperature_min)
+    pm = scoring.player_mapping(rounds, history)
+    best_state = [krcg.seating.Round.copy(r) for r in rounds]
+    movable = [i for i in range(fixed, len(rounds)) if rounds[i].players_count() > 1]
+    if not movable:
+        evaluator = scoring.SeatingEvaluator(best_state, pm, history)
+        return best_state, evaluator.score(), 0
+    evaluator = scoring.SeatingEvaluator(best_state, pm, history)
+    best_score, best_rules = evaluator.total, evaluator.rules()
+    rounds = [krcg.seating.Round.copy(r) for r in rounds]
+    for i in movable:
+        rounds[i].shuffle()
+    evaluator = scoring.SeatingEvaluator(rounds, pm, history)
+    rounds_global_indexes = [r._global_indexes() for r in rounds]
+    start = time.monotonic()
+    step = last_improvement = 0
+    checkpoint = 1
+    temperature = temperature_max
+    trials = accepts = improves = 0
+
+    def report(progress: float) -> None:
+        callback(
+            progress=progress,
+            step=step,
+            score=best_score,
+            rules=best_rules,
+            temperature=temperature,
+            trials=trials,
+            accepts=accepts,
+            improves=improves,
+        )
+
+    # no need to reset to the best state if the current state is as good
+    at_best = False
+    while True:
+        progress = (time.monotonic() - start) / budget
+        if max_iterations:
+            progress = max(progress, step / max_iterations)
+        if progress >= 1 or best_score <= 0 or step - last_improvement >= patience:
+            break
+        temperature = temperature_max * math.exp(temperature_factor * progress)
+        round_index = random.choice(movable)
+        global_indexes = rounds_global_indexes[round_index]
+        length = len(global_indexes)
+        score = evaluator.evaluate(
+            round_index,
+            global_indexes[random.randrange(length)],
+            global_indexes[random.randrange(length)],
+        )
+        score_diff = score - evaluator.total
+        trials += 1
+        if score_diff <= 0 or math.exp(-score_diff / temperature) >= random.random():
+            evaluator.commit()
+            accepts += 1
+            at_best = score <= best_score
+            if score < best_score:
+                best_state = [krcg.seating.Round.copy(r) for r in rounds]
+                best_score, best_rules = score, evaluator.rules()
+                last_improvement = step
+                improves += 1
+        step += 1
+        # every 100th of the way, reset the state to the best known state
+        if progress * 100 >= checkpoint:
+            checkpoint = math.floor(progress * 100) + 1
+            if callback:
+                report(progress)
+            trials = accepts = improves = 0
+            if stop and stop.is_set():
+                break
+            if not at_best:
+                rounds = [krcg.seating.Round.copy(r) for r in best_state]
+                evaluator = scoring.SeatingEvaluator(rounds, pm, history)
+                at_best = True
+    # last report: the moves since the last checkpoint
+    if callback:
+        report(1)
+    score = scoring.SeatingEvaluator(best_state, pm, history).score()
+    return best_state, score, step
+
+
+def repair(
+    rounds: list[krcg.seating.Round],
+    budget: float,
+    patience: int,
+    history: Optional[scoring.SeatingHistory] = None,
+    callback: Optional[Callable] = None,
+    stop=None,
+) -> tuple[list[krcg.seating.Round], krcg.seating.Score, int]:
+    """Greedy descent on the last round: swap players if it does not worsen the score.
+
+    Used after seating by groups: swaps between groups fix what the groups could not.
+    Stops when the budget is spent, when the score is zero or when it has not
+    improved for `patience` steps. Like `anneal()`, also stops when the `stop` event
+    is set, and calls the callback every 100th of the way and at the end, with the
+    keyword arguments progress (0 to 1) and score.
+    Returns the rounds, their score and the number of iterations.
+    """
+    random.seed()
+    rounds = [krcg.seating.Round.copy(r) for r in rounds]
+    evaluator = scoring.SeatingEvaluator(rounds, history=history)
+    round_index = len(rounds) - 1
+    global_indexes = rounds[round_index]._global_indexes()
+    length = len(global_indexes)
+    start = time.monotonic()
+    step = last_improvement = 0
+    checkpoint = 1
+    while evaluator.total > 0 and step - last_improvement < patience:
+        elapsed = time.monotonic() - start
+        if elapsed >= budget:
+            break
+        if elapsed * 100 >= checkpoint * budget:
+            checkpoint = math.floor(elapsed * 100 / budget) + 1
+            if callback:
+                callback(progress=elapsed / budget, score=evaluator.total)
+            if stop and stop.is_set():
+                break
+        total = evaluator.total
+        score = evaluator.evaluate(
+            round_index,
+            global_indexes[random.randrange(length)],
+            global_indexes[random.randrange(length)],
+        )
+        if score <= total:
+            evaluator.commit()
+            if score < total:
+                last_improvement = step
+        step += 1
+    if callback:
+        callback(progress=1, score=evaluator.total)
+    return rounds, evaluator.score(), step
+
+
+def optimise_table(
+    round_: krcg.seating.Round,
+    table: int,
+    history: Optional[scoring.SeatingHistory] = None,
+) -> float:
+    """Best arrangement of a table of the round, given the previous rounds history.
+
+    For a player added to or removed from a table before the round begins.
+    Modifies the round in place, returns the score total.
+    """
+    evaluator = scoring.SeatingEvaluator([round_], history=history)
+    best_score, best_table = evaluator.total, list(round_[table])
+    # Heap's algorithm: each permutation is a swap away from the previous one
+    size = len(round_[table])
+    counters = [0] * size
+    i = 1
+    while i < size:
+        if counters[i] < i:
+            j = counters[i] if i % 2 else 0
+            evaluator.evaluate(0, (table, j), (table, i))
+            evaluator.commit()
+            if evaluator.total < best_score:
+                best_score, best_table = evaluator.total, list(round_[table])
+            counters[i] += 1
+            i = 1
+        else:
+            counters[i] = 0
+            i += 1
+    round_[table] = best_table
+    return best_score
+
+
+def partition(
+    rounds: list[krcg.seating.Round],
+    group_size: int,
+    history: Optional[scoring.SeatingHistory] = None,
+) -> list[list[Hashable]]:
+    """Split the players of the last round in groups of about group_size players.
+
+    Greedy: each player joins the group where they have met the fewest players in
+    the previous rounds. Groups have a multiple of 5 players, except the last one:
+    only the last group has tables of 4, as many as the whole round would have.
+    """
+    players = list(rounds[-1].iter_players())
+    random.shuffle(players)
+    # at least 10 players per group, so that none has 6, 7 or 11 players
+    groups_count = max(1, min(round(len(players) / group_size), len(players) // 12))
+    size = 5 * (len(players) // (5 * groups_count))
+    capacities = [size] * (groups_count - 1)
+    capacities.append(len(players) - sum(capacities))
+    met = collections.defaultdict(list)
+    for round_ in rounds[:-1]:
+        for table in round_:
+            for player in table:
+                met[player].extend(p for p in table if p != player)
+    if history:
+        _, pairs, relationships = history.arrays()
+        for (p, q), count in zip(pairs.tolist(), relationships[:, 0].tolist()):
+            met[history.players[p]].extend([history.players[q]] * count)
+    groups = [[] for _ in capacities]
+    group_index = {}
+    for player in players:
+        conflicts = [0] * groups_count
+        for opponent in met[player]:
+            if opponent in group_index:
+                conflicts[group_index[opponent]] += 1
+        index = min(
+            (i for i in range(groups_count) if len(groups[i]) < capacities[i]),
+            key=lambda i: (conflicts[i], len(groups[i]) / capacities[i]),
+        )
+        groups[index].append(player)
+        group_index[player] = index
+    return groups
+
+
+def _repair(
+    rounds: list[list[list[str]]],
+    budget: float,
+    patience: int,
+    history: Optional[scoring.SeatingHistory] = None,
+    progress: Optional[queue.Queue] = None,
+    chain: int = 0,
+    stop=None,
+) -> tuple[list[list[str]], krcg.seating.Score, int]:
+    """Run in the worker process"""
+
+    def callback(**kwargs) -> None:
+        progress.put_nowait((chain, kwargs))
+
+    rounds, score, iterations = repair(
+        [krcg.seating.Round(r) for r in rounds],
+        budget,
+        patience,
+        history,
+        callback=callback if progress else None,
+        stop=stop,
+    )
+    return list(rounds[-1]), score, iterations
+
+
+def _optimise(
+    rounds: list[list[list[str]]],
+    fixed: int,
+    budget: float,
+    patience: int,
+    max_iterations: Optional[int] = None,
+    history: Optional[scoring.SeatingHistory] = None,
+    progress: Optional[queue.Queue] = None,
+    chain: int = 0,
+    stop=None,
+) -> tuple[list[list[list[str]]], krcg.seating.Score, int]:
+    """Run in the worker process"""
+
+    def callback(**kwargs) -> None:
+        progress.put_nowait((chain, kwargs))
+
+    rounds, score, iterations = anneal(
+        rounds=[krcg.seating.Round(r) for r in rounds],
+        fixed=fixed,
+        budget=budget,
+        patience=patience,
+        max_iterations=max_iterations,
+        callback=callback if progress else None,
+        stop=stop,
+        history=history,
+    )
+    return [list(r) for r in rounds], score, iterations
+
+
+def cache_key(
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    seed: int,
+    history: Optional[scoring.SeatingHistory] = None,
+) -> str:
+    """Digest of the fixed rounds, the players and rounds count to seat, and a seed.
+
+    The players order in the rounds to optimise does not matter, nor does the
+    players sitting out a round of a staggered tournament.
+    """
+    players = set()
+    for round_ in rounds[fixed:]:
+        players.update(round_.iter_players())
+    return hashlib.sha256(
+        orjson.dumps(
+            [
+                [[list(table) for table in r] for r in rounds[:fixed]],
+                asdict(history) if history else None,
+                sorted(players),
+                len(rounds) - fixed,
+                seed,
+            ]
+        )
+    ).hexdigest()
+
+
+async def _get_cached(
+    key: str,
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    history: Optional[scoring.SeatingHistory],
+) -> Optional[SeatingResult]:
+    try:
+        data = await db.get_seating(key)
+    except psycopg.Error:
+        logger.exception("Failed to read the seating cache")
+        return None
+    if not data:
+        return None
+    rounds = list(rounds[:fixed]) + [krcg.seating.Round(r) for r in data]
+    return SeatingResult(
+        rounds=rounds,
+        score=scoring.SeatingEvaluator(rounds, history=history).score(),
+        iterations=0,
+        elapsed=0,
+        cached=True,
+    )
+
+
+async def optimise(
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    callback: Optional[Callable] = None,
+    budget: Optional[float] = None,
+    patience: Optional[int] = None,
+    max_iterations: Optional[int] = None,
+    chains: Optional[int] = None,
+    seed: Optional[int] = None,
+    exact: bool = False,
+    groups: bool = False,
+    history: Optional[scoring.SeatingHistory] = None,
+    speculative: bool = False,
+) -> SeatingResult:
+    """Optimise the seating of rounds after the `fixed` first ones.
+
+    Run independent optimisation chains in parallel worker processes, return the
+    best result. The async callback is awaited with keyword arguments progress
+    (0 to 1, of the slowest chain) and score (best so far).
+
+    For small fields, use exact to get the optimal seating of the last round with
+    the branch and bound solver (see `exact.Solver`) instead. For large fields, use
+    groups to optimise the last round by groups of players (see `partition()`).
+
+    The previous rounds can be given as a history (see `scoring.SeatingHistory`)
+    instead of fixed rounds: the setup then does not depend on their number.
+
+    If a seed is given and the database is available, the result is cached:
+    change the seed to get a new seating for the same players.
+
+    A speculative computation (see `speculate()`) runs with the same chains and
+    budget: its result is as good as a round start one. It keeps the workers busy
+    during check-in, so other computations cancel the running speculative ones:
+    the workers go to the round starts first.
+    """
+    global LIVE
+    key = None
+    if seed is not None and not db.POOL.closed:
+        key = cache_key(rounds, fixed, seed, history)
+        result = await _get_cached(key, rounds, fixed, history)
+        if result:
+            result.speculative = speculative
+            return result
+    if not speculative:
+        _preempt()
+        LIVE += 1
+    try:
+        if exact and fixed == len(rounds) - 1:
+            result = await _solve_exact(rounds, callback, budget, patience, history)
+        elif groups and fixed == len(rounds) - 1:
+            result = await _optimise_groups(rounds, callback, budget, patience, history)
+        else:
+            result = await _optimise_chains(
+                rounds,
+                fixed,
+                callback,
+                budget,
+                patience,
+                max_iterations,
+                chains,
+                history,
+            )
+    finally:
+        if not speculative:
+            LIVE -= 1
+    result.speculative = speculative
+    if key:
+        try:
+            await db.set_seating(key, [list(r) for r in result.rounds[fixed:]])
+        except psycopg.Error:
+            logger.exception("Failed to write the seating cache")
+    return result
+
+
+def _solve(
+    rounds: list[list[list[str]]],
+    budget: float,
+    patience: int,
+    history: Optional[scoring.SeatingHistory] = None,
+    progress: Optional[queue.Queue] = None,
+    chain: int = 0,
+    stop=None,
+) -> tuple[list[list[str]], krcg.seating.Score, int, bool]:
+    """Run in the worker process: annealing for a first solution, then exact"""
+    start_time = time.monotonic()
+    rounds = [krcg.seating.Round(r) for r in rounds]
+
+    def anneal_callback(progress: float, score: float, **kwargs) -> None:
+        report(progress=progress * EXACT_ANNEAL_SHARE, score=score)
+
+    def solver_callback(progress: float, nodes: int) -> None:
+        best = rounds[:-1] + [solver.best_round()]
+        report(
+            progress=EXACT_ANNEAL_SHARE + progress * (1 - EXACT_ANNEAL_SHARE),
+            score=scoring.SeatingEvaluator(best, history=history).total,
+        )
+
+    def report(**kwargs) -> None:
+        if progress:
+            progress.put_nowait((chain, kwargs))
+
+    # a short annealing gives a good bound to start with
+    incumbent, _, _ = anneal(
+        rounds,
+        fixed=len(rounds) - 1,
+        budget=budget * EXACT_ANNEAL_SHARE,
+        patience=patience,
+        callback=anneal_callback,
+        stop=stop,
+        history=history,
+    )
+    solver = exact_solver.Solver(rounds, history)
+    round_, optimal = solver.solve(
+        time_limit=budget - (time.monotonic() - start_time),
+        incumbent=incumbent[-1],
+        callback=solver_callback,
+        stop=stop,
+    )
+    rounds[-1] = round_
+    score = scoring.SeatingEvaluator(rounds, history=history).score()
+    return list(round_), score, solver.nodes, optimal
+
+
+async def _solve_exact(
+    rounds: list[krcg.seating.Round],
+    callback: Optional[Callable],
+    budget: Optional[float],
+    patience: Optional[int],
+    history: Optional[scoring.SeatingHistory],
+) -> SeatingResult:
+    start()
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    # the exact search tries no annealing moves: no convergence trace
+    results, _ = await _gather(
+        [
+            (
+                _solve,
+                [[list(table) for table in r] for r in rounds],
+                budget or SEATING_BUDGET,
+                patience or SEATING_PATIENCE,
+                history,
+            )
+        ],
+        callback,
+    )
+    round_, score, nodes, optimal = results[0]
+    return SeatingResult(
+        rounds=list(rounds[:-1]) + [krcg.seating.Round(round_)],
+        score=score,
+        iterations=nodes,
+        elapsed=loop.time() - start_time,
+        optimal=optimal,
+    )
+
+
+async def _optimise_chains(
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    callback: Optional[Callable],
+    budget: Optional[float],
+    patience: Optional[int],
+    max_iterations: Optional[int],
+    chains: Optional[int],
+    history: Optional[scoring.SeatingHistory],
+) -> SeatingResult:
+    start()
+    budget = budget or SEATING_BUDGET
+    patience = patience or SEATING_PATIENCE
+    chains = chains or SEATING_CHAINS
+    # chains that cannot run in parallel share the budget
+    budget *= min(chains, SEATING_WORKERS) / chains
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    data = [[list(table) for table in r] for r in rounds]
+    results, trace = await _gather(
+        [
+            (_optimise, data, fixed, budget, patience, max_iterations, history)
+            for _ in range(chains)
+        ],
+        callback,
+    )
+    rounds, score, _ = min(results, key=lambda r: r[1].total)
+    return SeatingResult(
+        rounds=[krcg.seating.Round(r) for r in rounds],
+        score=score,
+        iterations=sum(r[2] for r in results),
+        elapsed=loop.time() - start_time,
+        trace=trace,
+    )
+
+
+async def _optimise_groups(
+    rounds: list[krcg.seating.Round],
+    callback: Optional[Callable],
+    budget: Optional[float],
+    patience: Optional[int],
+    history: Optional[scoring.SeatingHistory],
+) -> SeatingResult:
+    """Optimise the last round by groups of players, then repair across groups"""
+    start()
+    budget = budget or SEATING_BUDGET
+    patience = patience or SEATING_PATIENCE
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    groups = partition(rounds, SEATING_GROUP_SIZE, history)
+    # groups that cannot run in parallel share the budget
+    groups_budget = (
+        budget * (1 - REPAIR_SHARE) * min(len(groups), SEATING_WORKERS) / len(groups)
+    )
+    data = [[list(table) for table in r] for r in rounds[:-1]]
+    results, trace = await _gather(
+        [
+            (
+                _optimise,
+                data + [list(krcg.seating.Round.from_players(group))],
+                len(rounds) - 1,
+                groups_budget,
+                patience,
+                None,
+                history,
+            )
+            for group in groups
+        ],
+        _scaled(callback, 0, 1 - REPAIR_SHARE),
+    )
+    round_ = [table for result in results for table in result[0][-1]]
+    # the repair pass scores the whole round: not in the groups convergence trace
+    repaired, _ = await _gather(
+        [
+            (
+                _repair,
+                data + [round_],
+                budget - (loop.time() - start_time),
+                patience,
+                history,
+            )
+        ],
+        _scaled(callback, 1 - REPAIR_SHARE, REPAIR_SHARE),
+    )
+    round_, score, iterations = repaired[0]
+    return SeatingResult(
+        rounds=list(rounds[:-1]) + [krcg.seating.Round(round_)],
+        score=score,
+        iterations=sum(r[2] for r in results) + iterations,
+        elapsed=loop.time() - start_time,
+        groups=True,
+        trace=trace,
+    )
+
+
+def _scaled(callback: Optional[Callable], offset: float, share: float):
+    """Progress callback of a step of the computation: progress from offset, on share"""
+    if not callback:
+        return None
+
+    async def scaled(progress: float, **kwargs) -> None:
+        await callback(progress=offset + progress * share, **kwargs)
+
+    return scaled
+
+
+async def _gather(
+    calls: list[tuple], callback: Optional[Callable]
+) -> tuple[list, list[dict]]:
+    """Run optimisations (function and arguments) in the workers.
+
+    The functions take the progress queue, their index and the stop event as last
+    arguments. The callback is awaited with the progress (of the slowest one) and
+    the best score so far.
+
+    Return the results and the trace: the progress reports of all functions, with
+    their index (chain) and the elapsed time.
+    """
+    progress = MANAGER.Queue()
+    # cancelling the futures does not stop running workers
+    stop = MANAGER.Event()
+    loop = asyncio.get_running_loop()
+    futures = [
+        loop.run_in_executor(EXECUTOR, *call, progress, index, stop)
+        for index, call in enumerate(calls)
+    ]
+    start_time = loop.time()
+    chains_progress = {}
+    trace = []
+    try:
+        while True:
+            _, pending = await asyncio.wait(futures, timeout=POLL_PERIOD)
+            updated = False
+            while True:
+                try:
+                    chain, kwargs = progress.get_nowait()
+                except queue.Empty:
+                    break
+                chains_progress[chain] = kwargs
+                trace.append(
+                    {"chain": chain, "elapsed": loop.time() - start_time, **kwargs}
+                )
+                updated = True
+            if not pending:
+                break
+            if updated and callback:
+                await callback(
+                    # finished chains are done
+                    progress=min(
+                        (
+                            chains_progress.get(i, {}).get("progress", 0)
+                            for i, future in enumerate(futures)
+                            if future in pending
+                        ),
+                    ),
+                    score=min(p["score"] for p in chains_progress.values()),
+                )
+    except asyncio.CancelledError:
+        stop.set()
+        raise
+    return [future.result() for future in futures], trace
+
+
+@dataclass
+class Speculation:
+    """Seating computed in the background, before the round starts"""
+
+    #: rounds and players digest
+    key: str
+    task: Optional[asyncio.Task] = None
+    #: set when the computation has started (after the debounce delay)
+    started: bool = False
+    #: progress callback of a round start waiting for the result
+    callback: Optional[Callable] = None
+
+    async def progress(self, **kwargs) -> None:
+        if self.callback:
+            await self.callback(**kwargs)
+
+
+#: Speculative seatings by owner (Discord guild and category)
+SPECULATIONS: dict[Hashable, Speculation] = {}
+
+
+async def _speculate(
+    speculation: Speculation,
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    seed: Optional[int],
+    options: dict,
+) -> Optional[SeatingResult]:
+    await asyncio.sleep(SPECULATION_DELAY)
+    # never ahead of a round start
+    while LIVE:
+        await asyncio.sleep(SPECULATION_DELAY)
+    speculation.started = True
+    try:
+        return await optimise(
+            rounds,
+            fixed,
+            callback=speculation.progress,
+            seed=seed,
+            speculative=True,
+            **options,
+        )
+    except Exception:
+        logger.exception("Speculative seating failed")
+        return None
+
+
+def speculate(
+    owner: Hashable,
+    key: str,
+    rounds: list[krcg.seating.Round],
+    fixed: int,
+    seed: Optional[int] = None,
+    **options,
+) -> None:
+    """Compute the seating in the background, unless it is already for this key.
+
+    The options (exact, groups) are passed to `optimise()`.
+    Debounced: a new key cancels the previous computation and the new one only
+    starts after SPECULATION_DELAY, once no round start computation is running.
+    """
+    speculation = SPECULATIONS.get(owner)
+    if speculation and speculation.key == key:
+        return
+    discard(owner)
+    speculation = Speculation(key=key)
+    speculation.task = asyncio.create_task(
+        _speculate(speculation, rounds, fixed, seed, options)
+    )
+    SPECULATIONS[owner] = speculation
+
+
+def discard(owner: Hashable) -> None:
+    """Cancel the speculative seating of this owner, if any."""
+    speculation = SPECULATIONS.pop(owner, None)
+    if speculation:
+        speculation.task.cancel()
+
+
+def _preempt() -> None:
+    """Cancel the running speculative seatings: a round start needs the workers.
+
+    The speculation awaited by a round start is not listed anymore, it goes on.
+    """
+    for owner, speculation in list(SPECULATIONS.items()):
+        if speculation.started:
+            discard(owner)
+
+
+async def speculation(
+    owner: Hashable, key: str, callback: Optional[Callable] = None
+) -> Optional[SeatingResult]:
+    """Speculative seating for this key, None if there is none.
+
+    Waits for the computation if it is running, with the given progress callback.
+    """
+    speculation = SPECULATIONS.pop(owner, None)
+    if not speculation:
+        return None
+    if speculation.key != key or not speculation.started:
+        speculation.task.cancel()
+        return None
+    speculation.callback = callback
+    return await speculation.task
@@ -0,0 +1,100 @@
+"""Staggered tournaments seating templates, for 6, 7 and 11 players.
+
+The templates are optimised once, at build time, for players numbered from 0,
+and shipped as a data file: a tournament gets a template seating with its players
+randomly assigned to the numbers. The seating score does not depend on the players
+numbering, so the seating is as good as the template, instantly.
+
+Generate the templates with:
+
+    python -m archon_bot.staggered [budget]
+"""
+
+import logging
+import pathlib
+import random
+import sys
+from typing import Optional
+
+import krcg.seating
+import orjson
+
+from . import seating
+
+logger = logging.getLogger()
+TEMPLATES_PATH = pathlib.Path(__file__).parent / "staggered.json"
+#: Players counts requiring a staggered structure
+PLAYERS_COUNTS = [6, 7, 11]
+#: Rounds played by each player: templates are generated for these counts
+ROUNDS_COUNTS = [2, 3, 4, 5]
+#: Independent optimisations run for each template, the best one is kept
+RESTARTS = 10
+
+_TEMPLATES: Optional[dict] = None
+
+
+def templates() -> dict[str, dict[str, list]]:
+    """Templates: players count -> rounds count -> rounds of players numbers"""
+    global _TEMPLATES
+    if _TEMPLATES is None:
+        try:
+            _TEMPLATES = orjson.loads(TEMPLATES_PATH.read_bytes())
+        except FileNotFoundError:
+            logger.warning("No staggered seating templates: %s", TEMPLATES_PATH)
+            _TEMPLATES = {}
+    return _TEMPLATES
+
+
+def get_rounds(
+    players: list[str], rounds_count: int
+) -> Optional[list[krcg.seating.Round]]:
+    """Template seating for these players, None if there is no template."""
+    template = templates().get(str(len(players)), {}).get(str(rounds_count))
+    if not template:
+        return None
+    players = random.sample(players, len(players))
+    return [
+        krcg.seating.Round([[players[i] for i in table] for table in round_])
+        for round_ in template
+    ]
+
+
+def generate(
+    players_count: int, rounds_count: int, budget: float
+) -> tuple[list[krcg.seating.Round], krcg.seating.Score]:
+    """Optimise a template: best of RESTARTS optimisations of the given budget."""
+    best = None
+    for _ in range(RESTARTS):
+        rounds = krcg.seating.get_rounds(list(range(players_count)), rounds_count)
+        rounds, score, _ = seating.anneal(
+            rounds, fixed=0, budget=budget, patience=budget * 5000
+        )
+        if best is None or score.total < best[1].total:
+            best = rounds, score
+        if score.total <= 0:
+            break
+    return best
+
+
+def main(budget: float = 10) -> None:
+    """Generate the templates file."""
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)7s] %(message)s")
+    ret = {}
+    for players_count in PLAYERS_COUNTS:
+        for rounds_count in ROUNDS_COUNTS:
+            rounds, score = generate(players_count, rounds_count, budget)
+            logger.info(
+                "%s players, %s rounds: %s rounds, score %s",
+                players_count,
+                rounds_count,
+                len(rounds),
+                score.rules,
+            )
+            ret.setdefault(str(players_count), {})[str(rounds_count)] = [
+                [list(table) for table in r] for r in rounds
+            ]
+    TEMPLATES_PATH.write_bytes(orjson.dumps(ret, option=orjson.OPT_SORT_KEYS))
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:2]))
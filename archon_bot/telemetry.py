@@ -0,0 +1,107 @@
+"""Seating optimisation telemetry: convergence trace of a round seating.
+
+The annealing chains report their progress about 100 times (see `seating.anneal`):
+best score and rules so far, temperature, and the moves tried, accepted and
+improving the best score since the previous report. The trace of a round start is
+recorded in the database and rendered for admins, to tune the seating budget.
+"""
+
+from typing import Iterator, Optional
+
+from . import seating
+
+#: Number of rows of the rendered convergence table
+ROWS = 10
+
+
+def record(result: seating.SeatingResult) -> dict:
+    """Telemetry of a seating optimisation, to be stored as JSON"""
+    return {
+        "players": sum(1 for _ in result.rounds[-1].iter_players()),
+        "iterations": result.iterations,
+        "elapsed": result.elapsed,
+        "cached": result.cached,
+        "optimal": result.optimal,
+        "groups": result.groups,
+        "score": float(result.score.total),
+        "rules": [float(rule) for rule in result.score.rules],
+        "trace": result.trace,
+    }
+
+
+def _convergence(data: dict) -> Iterator[tuple[float, float, list[float], dict]]:
+    """Best (elapsed, score, rules) after each report, with the report.
+
+    Chains are independent: the best is the best chain. Groups seat different
+    players: their scores add up (the players of different groups never meet).
+    """
+    latest = {}
+    for report in sorted(data["trace"], key=lambda r: r["elapsed"]):
+        latest[report["chain"]] = report
+        if data["groups"]:
+            score = sum(r["score"] for r in latest.values())
+            rules = [
+                sum(values) for values in zip(*(r["rules"] for r in latest.values()))
+            ]
+        else:
+            best = min(latest.values(), key=lambda r: r["score"])
+            score, rules = best["score"], best["rules"]
+        yield report["elapsed"], score, rules, report
+
+
+def _rate(accepts: int, trials: int) -> str:
+    return f"{accepts / trials:.0%}" if trials else "-"
+
+
+def _rules(rules: list[float]) -> str:
+    return " ".join(f"{rule:>5.2g}" for rule in rules)
+
+
+def render(data: dict, round_number: Optional[int] = None) -> str:
+    """Text report: score and rules over time, acceptance rate and time to best"""
+    chains = len({report["chain"] for report in data["trace"]})
+    lines = [
+        (f"Round {round_number}: " if round_number else "")
+        + f"{data['players']} players, "
+        + (f"{chains} {'groups' if data['groups'] else 'chains'}, " if chains else "")
+        + f"{data['iterations']} iterations, {data['elapsed']:.1f}s"
+    ]
+    if data["cached"]:
+        lines.append("Cached seating: no optimisation")
+    if data["optimal"]:
+        lines.append("Optimal seating (branch and bound)")
+    if data["trace"]:
+        convergence = list(_convergence(data))
+        end, final = convergence[-1][0], convergence[-1][1]
+        time_to_best = next(e for e, score, _, _ in convergence if score <= final)
+        lines.append(
+            f"Best found at {time_to_best:.1f}s ({time_to_best / (end or 1):.0%}), "
+            f"acceptance rate "
+            + _rate(
+                sum(r["accepts"] for r in data["trace"]),
+                sum(r["trials"] for r in data["trace"]),
+            )
+        )
+        lines.append("")
+        lines.append(
+            f"{'time':>6} {'score':>8} {'acc.':>4} "
+            + " ".join(f"{f'R{i}':>5}" for i in range(1, 10))
+        )
+        index = 0
+        for row in range(1, ROWS + 1):
+            limit = end if row == ROWS else end * row / ROWS
+            start, trials, accepts = index, 0, 0
+            while index < len(convergence) and convergence[index][0] <= limit:
+                elapsed, score, rules, report = convergence[index]
+                trials += report["trials"]
+                accepts += report["accepts"]
+                index += 1
+            if index == start:
+                continue
+            lines.append(
+                f"{elapsed:>5.1f}s {score:>8.3g} {_rate(accepts, trials):>4} "
+                + _rules(rules)
+            )
+    lines.append("")
+    lines.append(f"{'final':>6} {data['score']:>8.3g} {'':>4} {_rules(data['rules'])}")
+    return "\n".join(lines)
@@ -1,23 +1,32 @@
 import collections
 import enum
+import hashlib
 import itertools
 import logging
 import math
-import os
 import random
+import sys
 from dataclasses import dataclass, field
 from typing import Callable, Optional, Tuple, Union
 
-import aiohttp
 import asgiref.sync
 import krcg.deck
 import krcg.seating
 import krcg.utils
+import orjson
+
+from . import exact
+from . import formats
+from . import registry
+from . import scoring
+from . import seating
+from . import staggered
+from .results import ResultsTable
+from .utils import SLOTS
 
 logger = logging.getLogger()
-ITERATIONS = 30000
-VEKN_LOGIN = os.getenv("VEKN_LOGIN")
-VEKN_PASSWORD = os.getenv("VEKN_PASSWORD")
+#: Number of decks checked by each worker thread when checking all decks
+DECKS_BATCH = 50
 
 
 class CommandFailed(Exception):
@@ -94,7 +103,7 @@ class DeckIssue:
         extra: int
 
         def __str__(self) -> str:
-            return f"The library is too big: it has {self.missing} cards too many"
+            return f"The library is too big: it has {self.extra} cards too many"
 
     @dataclass
     class ShortCrypt:
@@ -145,7 +154,22 @@ DeckIssueType = Union[
 ]
 
 
-@dataclass(order=True, eq=True)
+@dataclass(frozen=True)
+class Legality:
+    """Compiled tournament format: card IDs legality as sets"""
+
+    include: frozenset[int] = frozenset()
+    exclude: frozenset[int] = frozenset()
+    single_clan: bool = False
+    single_vampire: bool = False
+
+    def is_legal(self, card_id: int) -> bool:
+        if self.include and card_id not in self.include:
+            return False
+        return card_id not in self.exclude
+
+
+@dataclass(order=True, eq=True, **SLOTS)
 class Score:
     gw: int = 0
     vp: float = 0.0
@@ -163,20 +187,26 @@ class Score:
         )
 
     def __iadd__(self, rhs):
+        if self is ZERO_SCORE:
+            return self + rhs
         self.gw += rhs.gw
         self.vp += rhs.vp
         self.tp += rhs.tp
         return self
 
 
-@dataclass
+#: Shared zero score, to be used as a default value. Never modify it.
+ZERO_SCORE = Score()
+
+
+@dataclass(**SLOTS)
 class Note:
     judge: str
     level: NoteLevel = NoteLevel.NOTE
     text: str = ""
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, **SLOTS)
 class Player:
     vekn: str = field(compare=True)
     name: str = field(default="", compare=False)
@@ -191,12 +221,25 @@ class Player:
         return s
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Round:
     seating: krcg.seating.Round = field(default_factory=krcg.seating.Round)
     results: dict[str, Score] = field(default_factory=dict)
     overrides: dict[int, Note] = field(default_factory=dict)
     finals: bool = False
+    #: the round is finished and has been scored: it is not scored again
+    frozen: bool = False
+
+    def freeze(self) -> None:
+        """Mark the finished round as frozen: it is not scored again.
+
+        The round must have been scored already, and correctly.
+        """
+        self.frozen = True
+
+    def thaw(self) -> None:
+        """Judge fixes on a finished round: it will be scored and frozen again."""
+        self.frozen = False
 
     def score(self) -> set[int]:
         """Returns the list of incorrect tables"""
@@ -222,7 +265,7 @@ class Round:
         tps = [12, 24, 36, 48, 60]
         if len(table) == 4:
             tps.pop(2)
-        vps = sorted([self.results.get(vekn, Score()).vp, vekn] for vekn in table)
+        vps = sorted([self.results.get(vekn, ZERO_SCORE).vp, vekn] for vekn in table)
         for vp, players in itertools.groupby(vps, lambda a: a[0]):
             players = list(players)
             tp = sum(tps.pop(0) for _ in range(len(players))) // len(players)
@@ -233,7 +276,7 @@ class Round:
             if sum(math.ceil(a[0]) for a in vps) != len(table):
                 return False
             if not self.finals:
-                vps = [self.results.get(vekn, Score()).vp for vekn in table]
+                vps = [self.results.get(vekn, ZERO_SCORE).vp for vekn in table]
                 # remove successive ousts
                 while len(vps) > 1:
                     for j, score in enumerate(vps):
@@ -257,40 +300,14 @@ Rank = Tuple[int, str, Score]
 
 
 async def _check_vekn(vekn: str) -> str:
-    logger.info("Checking VEKN# %s", vekn)
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://www.vekn.net/api/vekn/login",
-            data={"username": VEKN_LOGIN, "password": VEKN_PASSWORD},
-        ) as response:
-            result = await response.json()
-            try:
-                token = result["data"]["auth"]
-            except:  # noqa: E722
-                token = None
-        if not token:
-            raise CommandFailed("Unable to authentify to VEKN")
-
-        async with session.get(
-            f"https://www.vekn.net/api/vekn/registry?filter={vekn}",
-            headers={"Authorization": f"Bearer {token}"},
-        ) as response:
-            result = await response.json()
-            result = result["data"]
-            if isinstance(result, str):
-                raise CommandFailed(f"VEKN returned an error: {result}")
-            result = result["players"]
-            if len(result) > 1:
-                raise CommandFailed("Invalid VEKN ID# (it should be 7 digits)")
-            if len(result) < 1:
-                raise CommandFailed("VEKN ID# not found")
-            result = result[0]
-            if result["veknid"] != str(vekn):
-                raise CommandFailed("VEKN ID# not found")
-            return result["firstname"] + " " + result["lastname"]
+    try:
+        member = await registry.CLIENT.lookup(vekn)
+    except registry.VEKNError as e:
+        raise CommandFailed(str(e))
+    return member.name
 
 
-@dataclass
+@dataclass(**SLOTS)
 class PlayerInfo:
     """Comprehensive player information"""
 
@@ -313,20 +330,79 @@ class Tournament:
     current_round: int = 0
     include: list[int] = field(default_factory=list)
     exclude: list[int] = field(default_factory=list)
+    #: VDB format digest, the format itself is stored in extra["vdb_format"]
+    format: str = ""
     state: TournamentState = TournamentState.REGISTRATION
     players: dict[str, Player] = field(default_factory=dict)
     dropped: dict[str, DropReason] = field(default_factory=dict)
     rounds: list[Round] = field(default_factory=list)
+    #: seating history of the finished rounds, see `_seating_history()`
+    history: scoring.SeatingHistory = field(default_factory=scoring.SeatingHistory)
     notes: dict[str, list[Note]] = field(default_factory=dict)
     winner: str = ""
     extra: dict = field(default_factory=dict)
 
+    def __post_init__(self):
+        self._intern_vekns()
+        # compiled format, not serialized: see `legality()`
+        self._legality = None
+        self._legality_key = None
+
     def __bool__(self):
         return bool(self.name)
 
+    def _intern_vekns(self) -> None:
+        """Share the VEKN# strings across players, rounds, results and notes.
+
+        Decoding the JSON data yields a new string for each occurrence.
+        """
+        self.players = {
+            sys.intern(vekn): player for vekn, player in self.players.items()
+        }
+        for player in self.players.values():
+            player.vekn = sys.intern(player.vekn)
+        self.dropped = {sys.intern(vekn): v for vekn, v in self.dropped.items()}
+        self.notes = {sys.intern(vekn): v for vekn, v in self.notes.items()}
+        for round in self.rounds:
+            for table in round.seating:
+                table[:] = [sys.intern(vekn) for vekn in table]
+            round.results = {
+                sys.intern(vekn): score for vekn, score in round.results.items()
+            }
+
+    def legality(self) -> Legality:
+        """Compiled format. Recompiled only if the format has changed."""
+        flags = self.flags & TournamentFlag.SINGLE_CLAN
+        flags |= self.flags & TournamentFlag.SINGLE_VAMPIRE
+        # include and exclude lists are replaced, not modified, when the format changes
+        if (
+            self._legality is None
+            or self._legality_key[0] is not self.include
+            or self._legality_key[1] is not self.exclude
+            or self._legality_key[2] != flags
+            or self._legality_key[3] != self.format
+        ):
+            include = frozenset(self.include)
+            exclude = frozenset(self.exclude)
+            if self.format:
+                vdb_format = formats.get_format(
+                    self.format, self.extra.get("vdb_format", {})
+                )
+                include |= vdb_format.include
+                exclude |= vdb_format.exclude
+            self._legality = Legality(
+                include=include,
+                exclude=exclude,
+                single_clan=bool(flags & TournamentFlag.SINGLE_CLAN),
+                single_vampire=bool(flags & TournamentFlag.SINGLE_VAMPIRE),
+            )
+            self._legality_key = (self.include, self.exclude, flags, self.format)
+        return self._legality
+
     def is_limited(self):
         return (
-            self.include
+            self.format
+            or self.include
             or self.exclude
             or self.flags & TournamentFlag.SINGLE_CLAN
             or self.flags & TournamentFlag.SINGLE_VAMPIRE
@@ -338,10 +414,12 @@ class Tournament:
         prev_vekn: Optional[str] = None,
         name: Optional[str] = None,
         judge: bool = False,
+        member: Optional[registry.Member] = None,
     ) -> Player:
         """Used for both check-in and registration.
 
-        It can be called multiple times to fill in the player info piece by piece
+        It can be called multiple times to fill in the player info piece by piece.
+        The VEKN registry entry can be given if it has already been checked.
         """
         temp_vekn = False
         # figure out the VEKN if not provided
@@ -388,7 +466,7 @@ class Tournament:
                 )
         # check VEKN# against the VEKN registry, get registered name
         if vekn and not temp_vekn:
-            vekn_name = await _check_vekn(vekn)
+            vekn_name = member.name if member else await _check_vekn(vekn)
             if name:
                 name = f"{name} ({vekn_name})"
             else:
@@ -405,7 +483,13 @@ class Tournament:
                     for i, v in enumerate(table):
                         if v == prev_vekn:
                             table[i] = vekn
+                            round.thaw()
                 dict_replace(round.results, prev_vekn, vekn)
+            if vekn in self.history.players:
+                # two histories cannot be merged: computed anew
+                self.history = scoring.SeatingHistory()
+            else:
+                self.history.rename(prev_vekn, vekn)
         # upsert player information (name, deck)
         if vekn in self.players:
             player = self.players[vekn]
@@ -421,6 +505,36 @@ class Tournament:
         self.player_check_in(player=player)
         return player
 
+    async def add_players(
+        self,
+        players: list[tuple[str, str]],
+        progression_callback: Optional[Callable] = None,
+    ) -> dict[int, str]:
+        """Register players (VEKN#, name) as a judge, return errors by index.
+
+        The VEKN IDs# are checked against the registry first, in bulk (see
+        `registry.Client.lookup_many`). The players that fail are skipped,
+        the others are registered. The progression callback is awaited with the
+        numbers of VEKN IDs# checked and to check.
+        """
+        vekns = [self._safe_vekn(vekn) for vekn, _ in players]
+        members = await registry.CLIENT.lookup_many(
+            # temporary IDs are not checked, see add_player()
+            (v for v in vekns if v and not (v.startswith("P") and v in self.players)),
+            callback=progression_callback,
+        )
+        errors = {}
+        for index, (vekn, (_, name)) in enumerate(zip(vekns, players)):
+            member = members.get(vekn)
+            if isinstance(member, registry.VEKNError):
+                errors[index] = str(member)
+                continue
+            try:
+                await self.add_player(vekn=vekn, name=name, judge=True, member=member)
+            except CommandFailed as e:
+                errors[index] = str(e)
+        return errors
+
     def add_player_deck(
         self,
         vekn: str,
@@ -455,46 +569,82 @@ class Tournament:
         deck: krcg.deck.Deck,
     ) -> [DeckIssueType]:
         """Check if the deck is tournament legal, return all deck issues"""
+        legality = self.legality()
+        library_count = 0
+        crypt_count = 0
+        groups = set()
+        clans = collections.Counter()
+        vampires = set()
+        banned = []
+        excluded = []
+        for card, count in deck.items():
+            if card.crypt:
+                crypt_count += count
+                if card.group != "ANY":
+                    groups.add(int(card.group))
+                clans[card.clans[0] if card.clans else ""] += count
+                vampires.add(card.name)
+            else:
+                library_count += count
+            if card.banned:
+                banned.append(card.name)
+            if not legality.is_legal(card.id):
+                excluded.append(card.name)
         issues = []
-        library_count = deck.cards_count(lambda c: c.library)
-        crypt_count = deck.cards_count(lambda c: c.crypt)
         if library_count < 60:
             issues.append(DeckIssue.ShortLibrary(60 - library_count))
         if library_count > 90:
             issues.append(DeckIssue.BigLibrary(library_count - 90))
         if crypt_count < 12:
             issues.append(DeckIssue.ShortCrypt(12 - crypt_count))
-        groups = set(c.group for c, _ in deck.cards(lambda c: c.crypt))
-        groups.discard("ANY")
-        groups = list(groups)
-        if len(groups) > 2 or abs(int(groups[0]) - int(groups[-1])) > 1:
-            issues.append(DeckIssue.InvalidGrouping(groups))
-        banned = [c.name for c, _ in deck.cards(lambda c: c.banned)]
-        if any(banned):
+        if groups and max(groups) - min(groups) > 1:
+            issues.append(DeckIssue.InvalidGrouping(sorted(groups)))
+        if banned:
             issues.append(DeckIssue.BannedCards(banned))
-        if self.exclude:
-            excluded = [c.name for c, _ in deck.cards(lambda c: c.id in self.exclude)]
-            if any(excluded):
-                issues.append(DeckIssue.ExcludedCards(excluded))
-        if self.include:
-            excluded = [
-                c.name for c, _ in deck.cards(lambda c: c.id not in self.include)
-            ]
-            if any(excluded):
-                issues.append(DeckIssue.ExcludedCards(excluded))
-        if self.flags & TournamentFlag.SINGLE_CLAN:
-            clans = collections.Counter(
-                [c.clan for c, _ in deck.cards(lambda c: c.crypt)]
-            )
-            _, count = clans.most_common()
+        if excluded:
+            issues.append(DeckIssue.ExcludedCards(excluded))
+        if legality.single_clan and clans:
+            _, count = clans.most_common(1)[0]
             if count < crypt_count * 0.75:
                 issues.append(DeckIssue.SingleClanViolation())
-        if self.flags & TournamentFlag.SINGLE_VAMPIRE:
-            vampires = set([c.name for c, _ in deck.cards(lambda c: c.crypt)])
-            if len(vampires) > 1:
-                issues.append(DeckIssue.SingleVampireViolation())
+        if legality.single_vampire and len(vampires) > 1:
+            issues.append(DeckIssue.SingleVampireViolation())
         return issues
 
+    async def check_decks(
+        self, progression_callback: Optional[Callable] = None
+    ) -> dict[str, list[DeckIssueType]]:
+        """Check all registered decks, typically after a format change.
+
+        Decks are checked by batches in a worker thread, so the event loop stays
+        responsive. Returns the issues of invalid decks, by VEKN#.
+        The callback is awaited after each batch with (done, total) decks counts.
+        """
+        self.legality()  # compile the format once, before dispatching
+        decks = [(p.vekn, p.deck) for p in self.players.values() if p.deck]
+        # checks are CPU bound: one batch at a time, more threads would compete
+        # with the event loop for the GIL
+        check = asgiref.sync.sync_to_async(self._check_decks, thread_sensitive=False)
+        ret = {}
+        for i in range(0, len(decks), DECKS_BATCH):
+            ret.update(await check(decks[i : i + DECKS_BATCH]))
+            if progression_callback:
+                await progression_callback(min(i + DECKS_BATCH, len(decks)), len(decks))
+        return ret
+
+    def _check_decks(
+        self, decks: list[tuple[str, dict]]
+    ) -> dict[str, list[DeckIssueType]]:
+        """Check a batch of decks, return the issues by VEKN#"""
+        ret = {}
+        for vekn, data in decks:
+            deck = krcg.deck.Deck()
+            deck.from_json(data)
+            issues = self.check_deck(deck)
+            if issues:
+                ret[vekn] = issues
+        return ret
+
     def player_check_in(
         self,
         player: Player = None,
@@ -580,7 +730,74 @@ class Tournament:
             self.state = TournamentState.WAITING_FOR_START
         # REGISTRATION, WAITING_FOR_START, WAITING_FOR_CHECKIN and PLAYING stay as is
 
-    async def start_round(self, progression_callback: Callable) -> Round:
+    @property
+    def seating_seed(self) -> int:
+        """Seating cache seed: change it to get a new seating for the same players"""
+        return self.extra.get("seating_seed", 0)
+
+    def _seating_key(self, players: list[str]) -> str:
+        """Digest of the previous rounds seating, the next round players and seed"""
+        return hashlib.sha256(
+            orjson.dumps(
+                [[list(table) for table in r.seating] for r in self.rounds]
+                + [sorted(players), self.seating_seed]
+            )
+        ).hexdigest()
+
+    def _seating_history(self, count: int) -> scoring.SeatingHistory:
+        """Seating history of the first count rounds.
+
+        Updated incrementally when a round is finished or modified, computed anew
+        only if it does not match the rounds count (eg. older tournaments).
+        """
+        if self.history.rounds == count - 1:
+            self.history.add(self.rounds[count - 1].seating)
+        elif self.history.rounds == count + 1:
+            self.history.remove(self.rounds[count].seating)
+        elif self.history.rounds != count:
+            self.history = scoring.SeatingHistory.from_rounds(
+                [r.seating for r in self.rounds[:count]]
+            )
+        return self.history
+
+    def speculate_seating(self, owner) -> None:
+        """Compute the next round seating in the background during check-in.
+
+        The owner identifies the tournament (Discord guild and category).
+        """
+        players = [p.vekn for p in self.players.values() if p.playing]
+        if (
+            self.state
+            not in [TournamentState.CHECKIN, TournamentState.WAITING_FOR_START]
+            or self.flags & TournamentFlag.STAGGERED
+            # no optimisation for the first round
+            or not self.rounds
+            or len(players) < 4
+            or len(players) in [6, 7, 11]
+        ):
+            seating.discard(owner)
+            return
+        round = krcg.seating.Round.from_players(players)
+        round.shuffle()
+        seating.speculate(
+            owner,
+            self._seating_key(players),
+            rounds=[round],
+            fixed=0,
+            seed=self.seating_seed,
+            history=self._seating_history(len(self.rounds)),
+            exact=exact.MIN_PLAYERS <= len(players) <= exact.MAX_PLAYERS,
+            groups=len(players) >= seating.SEATING_GROUPS_THRESHOLD,
+        )
+
+    async def start_round(
+        self, progression_callback: Callable, owner=None, reseat: bool = False
+    ) -> Tuple[Round, Optional[seating.SeatingResult]]:
+        """Start the next round, return it with the seating optimisation result.
+
+        If an owner is given, use its speculative seating if the players match.
+        Seatings are cached: use reseat to compute a new one for the same players.
+        """
         if self.state == TournamentState.REGISTRATION:
             raise CommandFailed("Check players in before starting the round")
         if self.state == TournamentState.PLAYING:
@@ -594,7 +811,7 @@ class Tournament:
             playing = set(round.iter_players())
             for player in self.players.values():
                 player.playing = player.vekn in playing
-            return self.rounds[self.current_round - 1]
+            return self.rounds[self.current_round - 1], None
         # non-staggered
         players = [p.vekn for p in self.players.values() if p.playing]
         if len(players) < 4:
@@ -603,27 +820,43 @@ class Tournament:
             raise CommandFailed(
                 "A staggered tournament structure is required for 6, 7 or 11 players"
             )
+        if reseat:
+            self.extra["seating_seed"] = self.seating_seed + 1
+        key = self._seating_key(players)
+        history = self._seating_history(len(self.rounds))
         round = krcg.seating.Round.from_players(players)
         round.shuffle()
         self.rounds.append(Round(seating=round))
-        score = None
+        result = None
         if self.current_round > 1:
-            optimised_rounds, score = await asgiref.sync.sync_to_async(
-                krcg.seating.optimise
-            )(
-                rounds=[r.seating for r in self.rounds],
-                iterations=ITERATIONS,
-                fixed=self.current_round - 1,
-                callback=asgiref.sync.async_to_sync(progression_callback),
-            )
+            if owner is not None:
+                result = await seating.speculation(owner, key, progression_callback)
+            if result:
+                logger.info("%s: using the speculative seating", self.name)
+            else:
+                result = await seating.optimise(
+                    rounds=[round],
+                    fixed=0,
+                    callback=progression_callback,
+                    seed=self.seating_seed,
+                    history=history,
+                    # small fields: exact solver, large fields: by groups
+                    exact=exact.MIN_PLAYERS <= len(players) <= exact.MAX_PLAYERS,
+                    groups=len(players) >= seating.SEATING_GROUPS_THRESHOLD,
+                )
             logger.info(
-                "%s: optimised seating for round %s with score %s",
+                "%s: optimised seating for round %s with score %s "
+                "(%s iterations, %.1fs%s%s)",
                 self.name,
                 self.current_round,
-                score,
+                result.score,
+                result.iterations,
+                result.elapsed,
+                ", cached" if result.cached else "",
+                ", optimal" if result.optimal else "",
             )
-            self.rounds[-1].seating = optimised_rounds[-1]
-        return self.rounds[-1], score
+            self.rounds[-1].seating = result.rounds[-1]
+        return self.rounds[-1], result
 
     async def make_staggered(
         self, rounds_count: int, progression_callback: Callable
@@ -632,15 +865,12 @@ class Tournament:
 
         For 6, 7 or 11 players only, use more rounds with players seating out some of
         them so that in the end everyone has played the same number of rounds.
+        Use a precomputed template if there is one for this rounds count.
 
         - rounds_count: number of rounds each player gets to play
-        - callback is called every 100th of the way with arguments:
-            * step
-            * temperature
-            * score
-            * trials (since last callback call)
-            * accepts (since last callback call)
-            * improves (since last callback call)
+        - callback is called regularly with arguments:
+            * progress (0 to 1)
+            * score (best so far)
         """
         if self.flags & TournamentFlag.STAGGERED:
             return
@@ -653,24 +883,38 @@ class Tournament:
             raise CommandFailed(
                 "A staggered tournament requires exactly 6, 7 or 11 players"
             )
-        rounds = krcg.seating.get_rounds(players, rounds_count)
-        rounds, score = await asgiref.sync.sync_to_async(krcg.seating.optimise)(
-            rounds=rounds,
-            iterations=ITERATIONS,
-            fixed=0,
-            callback=asgiref.sync.async_to_sync(progression_callback),
-        )
-        self.rounds = [Round(seating=r) for r in rounds]
-        logger.info(
-            "%s: optimised seating for %s rounds with score %s",
-            self.name,
-            rounds_count,
-            score,
-        )
+        rounds = staggered.get_rounds(players, rounds_count)
+        if rounds:
+            self.rounds = [Round(seating=r) for r in rounds]
+            logger.info(
+                "%s: template seating for %s rounds with score %s",
+                self.name,
+                rounds_count,
+                krcg.seating.Score(rounds),
+            )
+        else:
+            rounds = krcg.seating.get_rounds(players, rounds_count)
+            result = await seating.optimise(
+                rounds=rounds,
+                fixed=0,
+                callback=progression_callback,
+                seed=self.seating_seed,
+            )
+            self.rounds = [Round(seating=r) for r in result.rounds]
+            logger.info(
+                "%s: optimised seating for %s rounds with score %s "
+                "(%s iterations, %.1fs%s)",
+                self.name,
+                rounds_count,
+                result.score,
+                result.iterations,
+                result.elapsed,
+                ", cached" if result.cached else "",
+            )
         self.flags |= TournamentFlag.STAGGERED
         # Staggered tournaments cannot allow registration between rounds
         if self.flags & TournamentFlag.REGISTER_BETWEEN:
-            self.tournament.flags ^= TournamentFlag.REGISTER_BETWEEN
+            self.flags ^= TournamentFlag.REGISTER_BETWEEN
         self.state = TournamentState.WAITING_FOR_START
 
     def unmake_staggered(self) -> None:
@@ -703,12 +947,14 @@ class Tournament:
             raise CommandFailed("Table has 5 players already")
         if self.max_rounds and self.player_rounds_played(player) >= self.max_rounds:
             raise ErrorMaxRoundReached()
+        # the round changes: history of the previous rounds only
+        history = self._seating_history(len(self.rounds) - 1)
         table.append(player.vekn)
         player.playing = True
         # if this is not first round, optimise the score
         # and make sure we don't repeat a predator-prey relation
         if len(self.rounds) > 1:
-            krcg.seating.optimise_table(self.rounds, table_num - 1)
+            seating.optimise_table(self.rounds[-1].seating, table_num - 1, history)
 
     def round_remove(self, player_id: str) -> int:
         """Remove a player from current round, returns the table number.
@@ -733,12 +979,14 @@ class Tournament:
         table = self.rounds[-1].seating[table_num - 1]
         if len(table) < 5:
             raise CommandFailed("Table has only 4 players, unable to remove one.")
+        # the round changes: history of the previous rounds only
+        history = self._seating_history(len(self.rounds) - 1)
         table.remove(player.vekn)
         player.playing = False
         # if this is not first round, optimise the score
         # and make sure we don't repeat a predator-prey relation
         if len(self.rounds) > 1:
-            krcg.seating.optimise_table(self.rounds, table_num - 1)
+            seating.optimise_table(self.rounds[-1].seating, table_num - 1, history)
         return table_num
 
     def finish_round(self, keep_checkin=False) -> Round:
@@ -754,8 +1002,10 @@ class Tournament:
         if self.rounds[-1].finals:
             self.state = TournamentState.FINISHED
             self._reset_checkin()
-            self.standings()  # compute the winner
+            self.standings()  # compute the winner, freezes the round
         else:
+            self.rounds[-1].freeze()
+            self._seating_history(len(self.rounds))
             self.state = TournamentState.WAITING_FOR_START
             if self.flags & TournamentFlag.CHECKIN_EACH_ROUND and not keep_checkin:
                 self._reset_checkin()
@@ -822,6 +1072,7 @@ class Tournament:
             raise CommandFailed("Player has been disqualified")
         if vps not in {0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5}:
             raise CommandFailed("VPs must be between 0 and 5")
+        round.thaw()
         round.results[player.vekn] = Score(vp=vps)
         return round.score_player(player)
 
@@ -833,12 +1084,18 @@ class Tournament:
         anyone winning a toss keeps their rank on subsequent calls, typically
         if the finals seating gets rollbacked because a finalist is missing.
         """
+        winner = self.score_rounds()
+        return winner, self.ranking(self.results_table(), winner, toss)
+
+    def score_rounds(self) -> Optional[str]:
+        """Check the finished rounds scores, return the finals winner (if any)"""
         winner = None
         for i, round in enumerate(
             self.rounds[: -1 if self.state == TournamentState.PLAYING else None], 1
         ):
             # check scores again, some VPs fixes might have happened
-            incorrect = round.score()
+            # frozen rounds have been scored already and cannot have changed
+            incorrect = None if round.frozen else round.score()
             if incorrect:
                 if len(incorrect) > 1:
                     raise CommandFailed(
@@ -846,7 +1103,7 @@ class Tournament:
                     )
                 if len(incorrect) > 0:
                     raise CommandFailed(
-                        f"Incorrect score for table {incorrect[0]} in round {i}"
+                        f"Incorrect score for table {incorrect.pop()} in round {i}"
                     )
             if round.finals and round.results:
                 winner = max(
@@ -856,42 +1113,24 @@ class Tournament:
                 # winning the finals counts as a GW even with less than 2 VPs
                 # cf. VEKN Ratings system
                 round.results[winner].gw = 1
-        totals = collections.defaultdict(Score)
-        for round in self.rounds:
-            for vekn, score in round.results.items():
-                totals[vekn] += score
-        ranking = []
-        last = Score()
-        rank = 1
-        for j, (vekn, score) in enumerate(
-            sorted(
-                totals.items(),
-                key=lambda a: (
-                    a[0] not in self.dropped,
-                    winner == a[0],
-                    a[1],
-                    # put the seed here, so if you win the toss once, you keep your win
-                    # 0 would go before negative seed numbers, -math.inf goes last
-                    -self.players[a[0]].seed or -math.inf,
-                    # toss
-                    random.random() if toss else a[0],
-                ),
-                reverse=True,
-            ),
-            1,
-        ):
-            if vekn not in self.dropped:
-                if winner and 1 < j < 6:
-                    rank = 2
-                elif last != score:
-                    rank = j
-                last = score
-            elif last is not None:
-                last = None
-                rank = j
-            ranking.append((rank, vekn, score))
+            if not round.frozen:
+                round.freeze()
         self.winner = self.players[winner].vekn if winner else ""
-        return winner, ranking
+        return winner
+
+    def ranking(
+        self, table: ResultsTable, winner: Optional[str] = None, toss=False
+    ) -> list[Rank]:
+        """Full ranking [(rank, vekn, score)] from the results of the scored rounds"""
+        return [
+            (rank, vekn, Score(*score))
+            for rank, vekn, score in table.ranking(
+                dropped=self.dropped,
+                winner=winner,
+                seeds={vekn: player.seed for vekn, player in self.players.items()},
+                toss=toss,
+            )
+        ]
 
     def start_finals(self) -> Round:
         _, ranking = self.standings(toss=True)  # toss for finals seats if necessary
@@ -958,6 +1197,7 @@ class Tournament:
         round = self.rounds[round_number - 1]
         if table_number < 1 or table_number > len(round.seating):
             raise CommandFailed("Invalid table number")
+        round.thaw()
         round.overrides[table_number] = Note(
             level=NoteLevel.OVERRIDE, judge=judge, text=comment
         )
@@ -1006,27 +1246,37 @@ class Tournament:
             else:
                 return PlayerStatus.CHECKED_OUT
 
-    def player_rounds_played(self, vekn: str):
-        ret = 0
-        for round in self.rounds:
-            if vekn in round.seating.iter_players():
-                ret += 1
-        return ret
+    def player_rounds_played(
+        self, vekn: str, table: Optional[ResultsTable] = None
+    ) -> int:
+        if table is None:
+            table = self.results_table()
+        return table.player_rounds_played(vekn)
 
-    def player_score(self, vekn: str):
-        ret = Score()
-        for round in self.rounds:
-            ret += round.results.get(vekn, Score())
-        return ret
+    def player_score(self, vekn: str, table: Optional[ResultsTable] = None) -> Score:
+        if table is None:
+            table = self.results_table()
+        return Score(*table.player_score(vekn))
+
+    def results_table(self) -> ResultsTable:
+        """Columnar view of all rounds results, for aggregations.
+
+        Build it once and pass it along when computing several aggregations.
+        """
+        return ResultsTable.from_rounds(self.rounds)
 
-    def player_info(self, vekn: str) -> PlayerInfo:
+    def player_info(
+        self, vekn: str, table: Optional[ResultsTable] = None
+    ) -> PlayerInfo:
         """Returns a player information"""
         player = self._check_player(vekn)
+        if table is None:
+            table = self.results_table()
         ret = PlayerInfo(
             player,
             status=self.player_status(vekn),
-            rounds=self.player_rounds_played(vekn),
-            score=self.player_score(vekn),
+            rounds=self.player_rounds_played(vekn, table),
+            score=self.player_score(vekn, table),
             notes=self.notes.get(vekn, []),
         )
         if self.rounds:
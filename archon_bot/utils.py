@@ -1,9 +1,11 @@
-"""Useful generic tools
-"""
+"""Useful generic tools"""
 
+import asyncio
+import contextlib
 import logging
+import sys
 from dataclasses import is_dataclass
-from typing import get_args, get_origin, Union, TypeVar
+from typing import Any, Awaitable, Callable, get_args, get_origin, Union, TypeVar
 
 # TODO: remove conditional on upgrade
 # python 3.9 backward compatibility
@@ -12,10 +14,14 @@ try:
 except ImportError:
     from typing import Union as UnionType
 
+#: dataclass(**SLOTS) arguments: slots if available
+SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 logger = logging.getLogger()
 
 Dataclass = TypeVar("Dataclass")
+#: Minimum interval between two progress updates (seconds)
+PROGRESS_INTERVAL = 1.0
 
 
 def dictas(cls: Dataclass, dic: dict) -> Dataclass:
@@ -67,3 +73,66 @@ def dictas(cls: Dataclass, dic: dict) -> Dataclass:
             if name in dic
         }
     )
+
+
+class ProgressReporter:
+    """Coalescing progress callback for long-running interactions.
+
+    The callback only records the latest progress: a background task renders it
+    and sends it, at most once every `interval` seconds. The computation never
+    waits for the sender (eg. a Discord response edit) and intermediate progress
+    reports are dropped. The render function returns the sender keyword arguments,
+    they are not sent again if they did not change.
+
+    Use it as an async context manager: on exit, the progress not yet sent is
+    dropped and an update being sent is completed, so that the next response is
+    not overwritten by a late progress update.
+    """
+
+    def __init__(
+        self,
+        send: Callable[..., Awaitable],
+        render: Callable[..., dict[str, Any]],
+        interval: float = PROGRESS_INTERVAL,
+    ):
+        self.send = send
+        self.render = render
+        self.interval = interval
+        self._latest = None
+        self._sent = None
+        self._event = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    async def __aenter__(self) -> "ProgressReporter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._lock:
+            self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def __call__(self, *args, **kwargs) -> None:
+        """Progress callback: record the progress, it is sent later"""
+        self._latest = args, kwargs
+        self._event.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        last = -self.interval
+        while True:
+            await self._event.wait()
+            await asyncio.sleep(last + self.interval - loop.time())
+            self._event.clear()
+            args, kwargs = self._latest
+            async with self._lock:
+                try:
+                    update = self.render(*args, **kwargs)
+                    if update != self._sent:
+                        last = loop.time()
+                        await self.send(**update)
+                        self._sent = update
+                except Exception:
+                    logger.exception("Failed to send progress")
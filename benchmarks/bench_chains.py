@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Seating quality against wall time: krcg, single chain and parallel chains.
+
+Computes the 2nd round seating (1st round fixed) of fields of 20 to 200 players,
+with the previous fixed 30,000 iterations krcg optimisation, then with the seating
+engine on a wall-clock budget (early stop on convergence), for a single chain and
+for parallel chains. Rule violations are reported as krcg score totals: lower is
+better, R1 violations weigh 1e10.
+
+Usage:
+
+    python benchmarks/bench_chains.py [chains] [budget]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import krcg.seating
+
+from archon_bot import seating
+
+
+async def main(chains: int = os.cpu_count() or 1, budget: float = 30) -> None:
+    seating.SEATING_WORKERS = chains
+    seating.start()
+    print(f"{os.cpu_count()} CPUs, {chains} chains, {budget}s budget")
+    try:
+        for players_count in [20, 50, 100, 200]:
+            players = [str(1000000 + i) for i in range(players_count)]
+            rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+            start = time.perf_counter()
+            _, score = krcg.seating.optimise(rounds, iterations=30000, fixed=1)
+            print(
+                f"{players_count:>4} players    krcg: "
+                f"{time.perf_counter() - start:6.2f} s, 30000 iterations, "
+                f"score {score.total:.6g}"
+            )
+            for name, c in [("single", 1), ("multi", chains)]:
+                result = await seating.optimise(
+                    rounds, fixed=1, budget=budget, chains=c
+                )
+                print(
+                    f"{players_count:>4} players {name:>7}: {result.elapsed:6.2f} s, "
+                    f"{result.iterations} iterations, score {result.score.total:.6g}"
+                )
+    finally:
+        seating.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1,
+            *(float(arg) for arg in sys.argv[2:3]),
+        )
+    )
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Decks fetching (batch registration) against a local fake VDB.
+
+Compares the previous implementation (a blocking request for each line, one after
+the other) with the decklists client. The fake VDB answers after a delay, and
+records the requests count and the maximum concurrency.
+
+Usage:
+
+    python benchmarks/bench_decklists.py [lines] [delay]
+"""
+
+import asyncio
+import sys
+import time
+
+import aiohttp.test_utils
+import aiohttp.web
+import requests
+
+from archon_bot import decklists
+
+
+def fake_vdb(delay: float) -> tuple[aiohttp.test_utils.TestServer, dict]:
+    stats = {"requests": 0, "concurrent": 0, "max_concurrent": 0}
+
+    async def deck(request):
+        stats["requests"] += 1
+        stats["concurrent"] += 1
+        stats["max_concurrent"] = max(stats["max_concurrent"], stats["concurrent"])
+        await asyncio.sleep(delay)
+        stats["concurrent"] -= 1
+        return aiohttp.web.json_response(
+            {"name": request.match_info["uid"], "cards": {}}
+        )
+
+    app = aiohttp.web.Application()
+    app.router.add_get("/api/deck/{uid}", deck)
+    return aiohttp.test_utils.TestServer(app), stats
+
+
+async def previous(api: str, uids: list[str]) -> None:
+    """Previous implementation: blocking requests, one after the other"""
+
+    def fetch():
+        for uid in uids:
+            requests.get(api + uid).raise_for_status()
+
+    # in a thread, or the fake VDB on this event loop could not answer
+    await asyncio.to_thread(fetch)
+
+
+async def pooled(api: str, uids: list[str]) -> None:
+    async with decklists.Client(apis={"vdb": api}) as client:
+        await client.decks(f"https://vdb.im/decks/{uid}" for uid in uids)
+
+
+async def main(lines: int = 100, delay: float = 0.05) -> None:
+    uids = [f"deck{i}" for i in range(lines)]
+    print(f"{lines} decks, {delay * 1000:.0f} ms delay")
+    for name, fetch in [("previous", previous), ("pooled", pooled)]:
+        server, stats = fake_vdb(delay)
+        async with server:
+            start = time.perf_counter()
+            await fetch(str(server.make_url("/api/deck/")), uids)
+            elapsed = time.perf_counter() - start
+        print(
+            f"{name:>8}: {elapsed:5.2f} s, {stats['requests']} requests, "
+            f"max {stats['max_concurrent']} concurrent requests"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(t(a) for t, a in zip([int, float], sys.argv[1:3]))))
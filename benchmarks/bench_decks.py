@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Revalidation of all registered decks after a format change.
+
+Measures the total time and the worst event loop latency while the decks are
+checked, serially on the event loop (previous implementation) and with
+`Tournament.check_decks` (worker thread).
+
+Usage (krcg needs network access to load the cards):
+
+    python benchmarks/bench_decks.py [decks]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+import krcg.deck
+import krcg.vtes
+
+from archon_bot import tournament
+
+
+def random_deck(crypt: list, library: list) -> dict:
+    deck = krcg.deck.Deck()
+    for card in random.sample(crypt, 12):
+        deck[card] += 1
+    for card in random.sample(library, 40):
+        deck[card] += random.randint(1, 3)
+    return deck.to_minimal_json()
+
+
+async def monitor(latencies: list, period: float = 0.005) -> None:
+    """Record the event loop latency"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(period)
+        latencies.append(time.perf_counter() - start - period)
+
+
+async def serial(tourney: tournament.Tournament) -> None:
+    for player in tourney.players.values():
+        deck = krcg.deck.Deck()
+        deck.from_json(player.deck)
+        tourney.check_deck(deck)
+
+
+async def measure(name: str, coroutine) -> None:
+    latencies = []
+    task = asyncio.create_task(monitor(latencies))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await coroutine
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    task.cancel()
+    print(
+        f"{name:>8}: {elapsed * 1000:8.1f} ms, "
+        f"worst loop latency {max(latencies) * 1000:.1f} ms"
+    )
+
+
+async def main(decks_count: int = 300) -> None:
+    krcg.vtes.VTES.load()
+    crypt = [c for c in krcg.vtes.VTES if c.crypt]
+    library = [c for c in krcg.vtes.VTES if c.library]
+    tourney = tournament.Tournament(
+        name="Benchmark",
+        flags=tournament.TournamentFlag.SINGLE_CLAN,
+        exclude=random.sample([c.id for c in library], 500),
+    )
+    for i in range(decks_count):
+        vekn = str(1000000 + i)
+        tourney.players[vekn] = tournament.Player(
+            vekn=vekn, deck=random_deck(crypt, library)
+        )
+    print(f"{decks_count} decks")
+    await measure("serial", serial(tourney))
+    await measure("thread", tourney.check_decks())
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Event loop latency for other interactions during a seating computation.
+
+Compares the previous implementation (krcg optimisation in a thread) with the
+seating engine (worker process). An interaction (python work and awaits) is
+simulated every 50 ms and its duration recorded, to compare with the duration
+of the same interaction when the bot is idle.
+
+Usage:
+
+    python benchmarks/bench_event_loop.py [players] [iterations]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import asgiref.sync
+import krcg.seating
+
+from archon_bot import seating
+
+
+def work(n: int = 20000) -> int:
+    """Pure python work, like decoding a tournament for an interaction"""
+    return sum(len(str(i)) for i in range(n))
+
+
+async def interactions(latencies: list, period: float = 0.05) -> None:
+    """Regular interactions: record how long it takes to handle them"""
+    while True:
+        await asyncio.sleep(period)
+        start = time.perf_counter()
+        for _ in range(5):
+            work()
+            # interactions await I/O (database, discord API)
+            await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - start)
+
+
+async def measure(name: str, optimise) -> None:
+    latencies = []
+    task = asyncio.create_task(interactions(latencies))
+    start = time.perf_counter()
+    score, calls = await optimise()
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    print(
+        f"{name:>8}: {elapsed:6.2f} s, {calls} progress calls, interaction "
+        f"median {statistics.median(latencies) * 1000:.1f} ms, "
+        f"max {max(latencies) * 1000:.1f} ms (score {score.total:.3g})"
+    )
+
+
+async def thread_optimise(rounds: list, iterations: int):
+    """Previous implementation"""
+    calls = []
+
+    async def progress(**kwargs):
+        calls.append(kwargs)
+
+    _, score = await asgiref.sync.sync_to_async(krcg.seating.optimise)(
+        rounds=rounds,
+        iterations=iterations,
+        fixed=1,
+        callback=asgiref.sync.async_to_sync(progress),
+    )
+    return score, len(calls)
+
+
+async def process_optimise(rounds: list, iterations: int):
+    """Seating engine, same iterations"""
+    calls = []
+
+    async def progress(**kwargs):
+        calls.append(kwargs)
+
+    result = await seating.optimise(
+        rounds=rounds,
+        fixed=1,
+        callback=progress,
+        budget=3600,
+        patience=iterations,
+        max_iterations=iterations,
+        chains=1,
+    )
+    return result.score, len(calls)
+
+
+async def main(players_count: int = 100, iterations: int = 30000) -> None:
+    players = [str(1000000 + i) for i in range(players_count)]
+    rounds = [
+        krcg.seating.Round.from_players(players),
+        krcg.seating.Round.from_players(players),
+    ]
+    print(f"{players_count} players, round 2, {iterations} iterations")
+    latencies = []
+    task = asyncio.create_task(interactions(latencies))
+    await asyncio.sleep(1)
+    task.cancel()
+    print(f"    idle: interaction median {statistics.median(latencies) * 1000:.1f} ms")
+    seating.start()
+    # warm up: spawn a worker process
+    await seating.optimise(rounds=rounds, fixed=1, max_iterations=10, chains=1)
+    try:
+        await measure("thread", lambda: thread_optimise(rounds, iterations))
+        await measure("process", lambda: process_optimise(rounds, iterations))
+    finally:
+        seating.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Exact seating of small fields, compared with the krcg optimisation.
+
+For each players and rounds count, seat the last round with
+`krcg.seating.optimise` (30000 iterations) and with the branch and bound solver
+(`archon_bot.exact.Solver`, started from a short annealing like the bot does).
+
+Usage:
+
+    python benchmarks/bench_exact.py [iterations] [time_limit]
+"""
+
+import random
+import sys
+import time
+
+import krcg.seating
+
+from archon_bot import exact
+from archon_bot import seating
+
+
+def previous_rounds(players_count: int, rounds_count: int) -> list:
+    """Optimised previous rounds, and a last round to seat"""
+    players = list(range(players_count))
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(rounds_count)]
+    for round_ in rounds:
+        round_.shuffle()
+    if rounds_count > 1:
+        rounds, _, _ = seating.anneal(rounds, fixed=0, budget=1, patience=10000)
+    return rounds
+
+
+def main(iterations: int = 30000, time_limit: float = 20) -> None:
+    random.seed(0)
+    print(
+        f"{'players':>7} {'rounds':>6} | {'krcg':>8} {'score':>10} | "
+        f"{'exact':>8} {'score':>10} optimal"
+    )
+    for players_count in range(exact.MIN_PLAYERS, exact.MAX_PLAYERS + 1):
+        if players_count == 11:
+            # staggered tournament
+            continue
+        for rounds_count in [2, 3, 4]:
+            rounds = previous_rounds(players_count, rounds_count)
+            start = time.perf_counter()
+            krcg_rounds, krcg_score = krcg.seating.optimise(
+                rounds=[krcg.seating.Round(list(r)) for r in rounds],
+                iterations=iterations,
+                fixed=rounds_count - 1,
+            )
+            krcg_time = time.perf_counter() - start
+            start = time.perf_counter()
+            round_, _, nodes, optimal = seating._solve(
+                [[list(t) for t in r] for r in rounds], time_limit, 10000
+            )
+            exact_time = time.perf_counter() - start
+            exact_score = krcg.seating.Score(rounds[:-1] + [krcg.seating.Round(round_)])
+            print(
+                f"{players_count:>7} {rounds_count:>6} | {krcg_time:>7.2f}s "
+                f"{krcg_score.total:>10.4g} | {exact_time:>7.2f}s "
+                f"{exact_score.total:>10.4g} {optimal}"
+            )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]), *(float(a) for a in sys.argv[2:3]))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Deck checks against an Anthology-style limited format.
+
+Compares the compiled format check (`Tournament.check_deck`) with the previous
+implementation: list membership and a deck pass per rule.
+
+Usage (krcg needs network access to load the cards):
+
+    python benchmarks/bench_format.py [decks]
+"""
+
+import collections
+import random
+import sys
+import time
+
+import krcg.deck
+import krcg.vtes
+
+from archon_bot import tournament
+
+#: VDB format "sets" of an Anthology-style tournament
+SETS = {
+    "Anthology",
+    "Fifth Edition",
+    "Fifth Edition (Anarch)",
+    "First Blood",
+    "New Blood",
+    "New Blood II",
+    "Fall of London",
+    "Shadows of Berlin",
+    "Echoes of Gehenna",
+    "Keepers of Tradition Reprint",
+    "Heirs to the Blood Reprint",
+}
+
+
+def legacy_check_deck(tourney: tournament.Tournament, deck: krcg.deck.Deck) -> list:
+    """Previous implementation, for comparison"""
+    issues = []
+    library_count = deck.cards_count(lambda c: c.library)
+    crypt_count = deck.cards_count(lambda c: c.crypt)
+    if library_count < 60:
+        issues.append(tournament.DeckIssue.ShortLibrary(60 - library_count))
+    if library_count > 90:
+        issues.append(tournament.DeckIssue.BigLibrary(library_count - 90))
+    if crypt_count < 12:
+        issues.append(tournament.DeckIssue.ShortCrypt(12 - crypt_count))
+    groups = set(c.group for c, _ in deck.cards(lambda c: c.crypt))
+    groups.discard("ANY")
+    groups = sorted(int(g) for g in groups)
+    if groups and groups[-1] - groups[0] > 1:
+        issues.append(tournament.DeckIssue.InvalidGrouping(groups))
+    banned = [c.name for c, _ in deck.cards(lambda c: c.banned)]
+    if any(banned):
+        issues.append(tournament.DeckIssue.BannedCards(banned))
+    if tourney.exclude:
+        excluded = [c.name for c, _ in deck.cards(lambda c: c.id in tourney.exclude)]
+        if any(excluded):
+            issues.append(tournament.DeckIssue.ExcludedCards(excluded))
+    if tourney.include:
+        excluded = [
+            c.name for c, _ in deck.cards(lambda c: c.id not in tourney.include)
+        ]
+        if any(excluded):
+            issues.append(tournament.DeckIssue.ExcludedCards(excluded))
+    if tourney.flags & tournament.TournamentFlag.SINGLE_CLAN:
+        clans = collections.Counter(
+            c.clans[0] for c, _ in deck.cards(lambda c: c.crypt) if c.clans
+        )
+        _, count = clans.most_common(1)[0]
+        if count < crypt_count * 0.75:
+            issues.append(tournament.DeckIssue.SingleClanViolation())
+    return issues
+
+
+def random_deck(crypt: list, library: list) -> krcg.deck.Deck:
+    deck = krcg.deck.Deck()
+    for card in random.sample(crypt, 8):
+        deck[card] += 1
+    deck[crypt[0]] += 4
+    for card in random.sample(library, 40):
+        deck[card] += random.randint(1, 3)
+    return deck
+
+
+def main(decks_count: int = 300) -> None:
+    krcg.vtes.VTES.load()
+    cards = list(krcg.vtes.VTES)
+    include = sorted(c.id for c in cards if set(c.sets.keys()) & SETS)
+    tourney = tournament.Tournament(
+        name="Benchmark",
+        flags=tournament.TournamentFlag.SINGLE_CLAN,
+        include=include,
+    )
+    print(f"{len(include)} cards included, {decks_count} decks")
+    # realistic: most cards legal, a few illegal ones
+    crypt = [c for c in cards if c.crypt]
+    library = [c for c in cards if c.library]
+    decks = [random_deck(crypt, library) for _ in range(decks_count)]
+    for name, check in [
+        ("legacy", lambda deck: legacy_check_deck(tourney, deck)),
+        ("compiled", tourney.check_deck),
+    ]:
+        start = time.perf_counter()
+        for deck in decks:
+            check(deck)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>10}: {elapsed * 1000:8.1f} ms "
+            f"({elapsed / decks_count * 1e6:.0f} µs per deck)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
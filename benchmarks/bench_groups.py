@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Seating of very large fields: whole round or by groups.
+
+For 300, 600 and 1000 players, seat round 2 and 3 after random rounds with the
+same budget: annealing of the whole round (`SEATING_CHAINS` chains), and by
+groups (`SEATING_GROUP_SIZE` players) with a final repair pass.
+
+Usage:
+
+    python benchmarks/bench_groups.py [budget]
+"""
+
+import asyncio
+import sys
+
+import krcg.seating
+
+from archon_bot import seating
+
+
+def rules(score: krcg.seating.Score) -> str:
+    return " ".join(f"{rule:.3g}" for rule in score.rules)
+
+
+async def main(budget: float = 30) -> None:
+    seating.start()
+    try:
+        for players_count in [300, 600, 1000]:
+            players = [str(1000000 + i) for i in range(players_count)]
+            for rounds_count in [2, 3]:
+                rounds = [
+                    krcg.seating.Round.from_players(players)
+                    for _ in range(rounds_count)
+                ]
+                for round_ in rounds:
+                    round_.shuffle()
+                print(
+                    f"{players_count} players, round {rounds_count}, "
+                    f"{budget:.0f}s budget"
+                )
+                for name, groups in [("whole", False), ("groups", True)]:
+                    result = await seating.optimise(
+                        rounds, fixed=rounds_count - 1, budget=budget, groups=groups
+                    )
+                    print(
+                        f"{name:>8}: {result.elapsed:6.2f} s, "
+                        f"{result.iterations} iterations, "
+                        f"score {result.score.total:.4g} [{rules(result.score)}]"
+                    )
+    finally:
+        seating.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(float(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Seating setup cost by number of previous rounds: rounds or history.
+
+Times the measure of the rounds by krcg (as `krcg.seating.optimise` does), the
+seating evaluator setup (done at each annealing reset) from the previous rounds,
+and from their seating history (`scoring.SeatingHistory`), as
+well as the history update when a round finishes and its stored size.
+
+Usage:
+
+    python benchmarks/bench_history.py [players] [repeat]
+"""
+
+import dataclasses
+import sys
+import timeit
+
+import krcg.seating
+import orjson
+
+from archon_bot import scoring
+
+
+def main(players_count: int = 200, repeat: int = 20) -> None:
+    players = [str(1000000 + i) for i in range(players_count)]
+    rounds = []
+    print(f"{players_count} players, setup time (ms) and stored history size")
+    print(
+        f"{'rounds':>6} {'krcg':>8} {'rounds':>8} {'history':>8} {'update':>8} "
+        f"{'size':>8}"
+    )
+    for rounds_count in range(1, 9):
+        round_ = krcg.seating.Round.from_players(players)
+        round_.shuffle()
+        rounds.append(round_)
+        history = scoring.SeatingHistory.from_rounds(rounds[:-1])
+        pm = krcg.seating.player_mapping(rounds)
+        krcg_measure = timeit.timeit(
+            lambda: sum(krcg.seating.measure(pm, r) for r in rounds), number=repeat
+        )
+        from_rounds = timeit.timeit(
+            lambda: scoring.SeatingEvaluator(rounds), number=repeat
+        )
+        from_history = timeit.timeit(
+            lambda: scoring.SeatingEvaluator(rounds[-1:], history=history),
+            number=repeat,
+        )
+        update = timeit.timeit(
+            lambda: scoring.SeatingHistory(**dataclasses.asdict(history)).add(round_),
+            number=repeat,
+        )
+        size = len(orjson.dumps(dataclasses.asdict(history)))
+        print(
+            f"{rounds_count:>6} {krcg_measure / repeat * 1000:>8.2f} "
+            f"{from_rounds / repeat * 1000:>8.2f} "
+            f"{from_history / repeat * 1000:>8.2f} {update / repeat * 1000:>8.2f} "
+            f"{size / 1024:>7.1f}k"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Memory footprint of a large tournament, as loaded for each interaction.
+
+Usage:
+
+    python benchmarks/bench_memory.py [players] [rounds]
+"""
+
+import dataclasses
+import random
+import sys
+import time
+import tracemalloc
+
+import krcg.seating
+import orjson
+
+from archon_bot import tournament
+from archon_bot import utils
+
+
+def build(players_count: int, rounds_count: int) -> dict:
+    """JSON data of a tournament with all rounds played and scored."""
+    tourney = tournament.Tournament(name="Benchmark", max_rounds=rounds_count)
+    vekns = [f"{1000000 + i}" for i in range(players_count)]
+    for vekn in vekns:
+        tourney.players[vekn] = tournament.Player(vekn=vekn, name=f"Player {vekn}")
+    for _ in range(rounds_count):
+        random.shuffle(vekns)
+        seating = krcg.seating.Round.from_players(vekns)
+        round_ = tournament.Round(seating=seating)
+        for table in seating:
+            # valid scores: a random player ousts everyone
+            round_.results[random.choice(table)] = tournament.Score(vp=len(table))
+        round_.score()
+        tourney.rounds.append(round_)
+    return orjson.loads(orjson.dumps(dataclasses.asdict(tourney)))
+
+
+def main(players_count: int = 1000, rounds_count: int = 10) -> None:
+    raw = orjson.dumps(build(players_count, rounds_count))
+    print(f"{players_count} players, {rounds_count} rounds, {len(raw)} bytes of JSON")
+    tracemalloc.start()
+    start = time.perf_counter()
+    tourney = utils.dictas(tournament.Tournament, orjson.loads(raw))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"load:      {elapsed * 1000:8.1f} ms")
+    print(f"retained:  {current / 1024:8.1f} KiB (peak {peak / 1024:.1f} KiB)")
+    tracemalloc.reset_peak()
+    snapshot = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    tourney.standings()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    print(
+        f"standings: {elapsed * 1000:8.1f} ms (peak {(peak - current) / 1024:.1f} KiB)"
+    )
+    tracemalloc.stop()
+    print("Top allocations (load):")
+    for stat in snapshot.statistics("lineno")[:5]:
+        print(f"  {stat}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Bulk VEKN ID# verification (batch registration) against a local fake registry.
+
+Compares the previous implementation (a session and a login for each line, all
+lines at once) with the registry client bulk lookup. The fake registry answers
+after a delay, and records the requests count and the maximum concurrency.
+
+Usage:
+
+    python benchmarks/bench_registry.py [lines] [delay]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+import aiohttp
+import aiohttp.test_utils
+import aiohttp.web
+
+from archon_bot import registry
+
+
+def fake_registry(delay: float) -> tuple[aiohttp.test_utils.TestServer, dict]:
+    stats = {"logins": 0, "requests": 0, "concurrent": 0, "max_concurrent": 0}
+
+    async def answer(data: dict) -> aiohttp.web.Response:
+        stats["concurrent"] += 1
+        stats["max_concurrent"] = max(stats["max_concurrent"], stats["concurrent"])
+        await asyncio.sleep(delay)
+        stats["concurrent"] -= 1
+        return aiohttp.web.json_response(data)
+
+    async def login(request):
+        stats["logins"] += 1
+        return await answer({"data": {"auth": "token"}})
+
+    async def members(request):
+        stats["requests"] += 1
+        vekn = request.query["filter"]
+        player = {"veknid": vekn, "firstname": "A", "lastname": vekn}
+        return await answer({"data": {"players": [player]}})
+
+    app = aiohttp.web.Application()
+    app.router.add_post("/api/vekn/login", login)
+    app.router.add_get("/api/vekn/registry", members)
+    return aiohttp.test_utils.TestServer(app), stats
+
+
+async def previous(url: str, vekns: list[str]) -> None:
+    """Previous implementation: session and login for each line"""
+
+    async def check(vekn):
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{url}/api/vekn/login") as response:
+                token = (await response.json())["data"]["auth"]
+            async with session.get(
+                f"{url}/api/vekn/registry?filter={vekn}",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as response:
+                await response.json()
+
+    await asyncio.gather(*(check(vekn) for vekn in vekns))
+
+
+async def bulk(url: str, vekns: list[str]) -> None:
+    async with registry.Client(url, "login", "password") as client:
+        await client.lookup_many(vekns)
+
+
+async def main(lines: int = 200, delay: float = 0.05) -> None:
+    # some players are listed twice
+    vekns = [str(1000000 + random.randrange(lines)) for _ in range(lines)]
+    print(f"{lines} lines ({len(set(vekns))} VEKN IDs#), {delay * 1000:.0f} ms delay")
+    for name, verify in [("previous", previous), ("bulk", bulk)]:
+        server, stats = fake_registry(delay)
+        async with server:
+            start = time.perf_counter()
+            await verify(str(server.make_url("")).rstrip("/"), vekns)
+            elapsed = time.perf_counter() - start
+        print(
+            f"{name:>8}: {elapsed:5.2f} s, {stats['logins']} logins, "
+            f"{stats['requests']} registry requests, "
+            f"max {stats['max_concurrent']} concurrent requests"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(t(a) for t, a in zip([int, float], sys.argv[1:3]))))
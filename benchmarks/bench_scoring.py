@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Seating score evaluation throughput, in swaps per second.
+
+Compares the krcg evaluation used by `krcg.seating.optimise` (measure the round,
+sum the rounds measures, `Score.fast_total`) with the incremental evaluator
+(`archon_bot.scoring.SeatingEvaluator`).
+
+Usage:
+
+    python benchmarks/bench_scoring.py [rounds] [swaps]
+"""
+
+import random
+import sys
+import time
+
+import krcg.seating
+
+from archon_bot import scoring
+
+
+def random_swaps(round_: krcg.seating.Round, count: int) -> list:
+    indexes = round_._global_indexes()
+    length = round_.players_count()
+    return [
+        (indexes[random.randrange(length)], indexes[random.randrange(length)])
+        for _ in range(count)
+    ]
+
+
+def krcg_swaps(rounds: list, swaps: list) -> None:
+    """Evaluate each swap like `krcg.seating.optimise`, then swap back"""
+    pm = krcg.seating.player_mapping(rounds)
+    measures = [krcg.seating.measure(pm, r) for r in rounds]
+    round_ = rounds[-1]
+    for (i1, i2), (j1, j2) in swaps:
+        round_[i1][i2], round_[j1][j2] = round_[j1][j2], round_[i1][i2]
+        measure = krcg.seating.measure(
+            pm, round_, previous=measures[-1], hints=[i1, j1]
+        )
+        krcg.seating.Score.fast_total(sum(measures[:-1]) + measure, len(rounds))
+        round_[i1][i2], round_[j1][j2] = round_[j1][j2], round_[i1][i2]
+
+
+def evaluator_swaps(rounds: list, swaps: list) -> None:
+    evaluator = scoring.SeatingEvaluator(rounds)
+    index = len(rounds) - 1
+    for i, j in swaps:
+        evaluator.evaluate(index, i, j)
+
+
+def main(rounds_count: int = 3, swaps_count: int = 2000) -> None:
+    print(f"{rounds_count} rounds, {swaps_count} swaps evaluated in the last round")
+    for players_count in [20, 50, 100, 200, 500]:
+        players = list(range(players_count))
+        rounds = [krcg.seating.Round.from_players(players) for _ in range(rounds_count)]
+        for round_ in rounds:
+            round_.shuffle()
+        swaps = random_swaps(rounds[-1], swaps_count)
+        results = []
+        for function in [krcg_swaps, evaluator_swaps]:
+            start = time.perf_counter()
+            function(rounds, swaps)
+            results.append(swaps_count / (time.perf_counter() - start))
+        print(
+            f"{players_count:>4} players: krcg {results[0]:8.0f} swaps/s, "
+            f"evaluator {results[1]:8.0f} swaps/s ({results[1] / results[0]:.1f}×)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,67 @@
+import csv
+import io
+
+import pytest
+
+from archon_bot import check_vekn
+from archon_bot import registry
+
+from .test_registry import fake_registry
+
+
+class Output(io.StringIO):
+    """Record how many input lines were read when a row is written"""
+
+    def __init__(self, read: list):
+        super().__init__()
+        self.read = read
+        self.read_at_write = []
+
+    def write(self, s):
+        self.read_at_write.append(len(self.read))
+        return super().write(s)
+
+
+@pytest.mark.asyncio
+async def test_check(tmp_path):
+    read = []
+
+    def lines():
+        for i in range(100):
+            read.append(i)
+            yield f"#{1000000 + i % 4}\n"
+        yield "\n"
+
+    output = Output(read)
+    server, stats = fake_registry()
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "secret", concurrency=2) as client:
+            vekns = check_vekn.read_vekns(lines(), skip={"1000000"})
+            assert await check_vekn.check(client, vekns, output) == (75, 0)
+    # streamed: rows are written as the input is read
+    assert output.read_at_write[0] < 10
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert len(rows) == 75
+    assert ["1000001", "True", "Alice Allison", "France"] in rows
+    assert ["1000003", "False", "VEKN ID# not found", ""] in rows
+    assert stats["logins"] == 1
+    # resume from the output file
+    path = tmp_path / "output.csv"
+    path.write_text(output.getvalue())
+    assert check_vekn.checked_vekns(path) == {"1000001", "1000002", "1000003"}
+    assert check_vekn.checked_vekns(tmp_path / "missing.csv") == set()
+
+
+@pytest.mark.asyncio
+async def test_check_errors(monkeypatch):
+    monkeypatch.setattr(registry, "VEKN_BACKOFF", 0.01)
+    output = io.StringIO()
+    server, _ = fake_registry()
+    async with server:
+        url = str(server.make_url("/"))
+        # wrong credentials: nothing checked, nothing in the checkpoint
+        async with registry.Client(url, "login", "wrong") as client:
+            vekns = ["1000001", "1000003"]
+            assert await check_vekn.check(client, vekns, output) == (0, 2)
+    assert output.getvalue() == ""
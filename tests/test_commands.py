@@ -0,0 +1,18 @@
+import dataclasses
+
+from archon_bot import commands
+from archon_bot import utils
+
+
+def test_discord_extra_players_index():
+    extra = utils.dictas(commands.DiscordExtra, {"players": {"1": "1000001"}})
+    assert extra.get_discord_id("1000001") == 1
+    extra.set_player(2, "1000002")
+    assert extra.get_discord_id("1000002") == 2
+    # changing a user's VEKN# drops the previous reverse entry
+    extra.set_player(1, "1000003")
+    assert extra.get_discord_id("1000001") is None
+    assert extra.get_discord_id("1000003") == 1
+    # the reverse index is not serialized
+    assert dataclasses.asdict(extra)["players"] == {1: "1000003", 2: "1000002"}
+    assert "_discord_ids" not in dataclasses.asdict(extra)
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+
+import aiohttp.test_utils
+import aiohttp.web
+import krcg.vtes
+import pytest
+
+from archon_bot import decklists
+
+
+class FakeVTES(dict):
+    """Cards by ID: no need to load the real cards database"""
+
+    def __init__(self):
+        super().__init__({100001: "Card A", 200001: "Vampire A"})
+        self.amaranth = {"a1": "Card A", "a2": "Vampire A"}
+
+
+def fake_websites(delay: float = 0):
+    """A local stand-in for the deckbuilding websites APIs, and its counters."""
+    stats = {"requests": 0, "concurrent": 0, "max_concurrent": 0}
+
+    async def answer(data: dict) -> aiohttp.web.Response:
+        stats["requests"] += 1
+        stats["concurrent"] += 1
+        stats["max_concurrent"] = max(stats["max_concurrent"], stats["concurrent"])
+        await asyncio.sleep(delay)
+        stats["concurrent"] -= 1
+        return aiohttp.web.json_response(data)
+
+    async def vdb(request):
+        if request.match_info["uid"] == "missing":
+            raise aiohttp.web.HTTPNotFound()
+        return await answer(
+            {
+                "name": "VDB deck",
+                "author": "Alice",
+                "timestamp": "Mon, 01 Jan 2024 10:00:00 GMT",
+                "cards": {"100001": 12, "200001": "0"},
+            }
+        )
+
+    async def amaranth(request):
+        data = await request.post()
+        return await answer(
+            {
+                "result": {
+                    "title": f"Amaranth deck {data['id']}",
+                    "modified": "2024-01-02T10:00:00Z",
+                    "cards": {"a1": 3, "a2": 12},
+                }
+            }
+        )
+
+    async def vtesdecks(request):
+        if request.match_info["uid"] == "invalid":
+            return await answer({"name": "VTESDecks deck", "modifyDate": "garbage"})
+        return await answer(
+            {
+                "name": "VTESDecks deck",
+                "modifyDate": "2024-01-03T10:00:00.000+01:00",
+                "crypt": [{"id": 200001, "number": 12}],
+                "library": [{"id": 100001, "number": 90}],
+            }
+        )
+
+    app = aiohttp.web.Application()
+    app.router.add_get("/vdb/{uid}", vdb)
+    app.router.add_post("/amaranth", amaranth)
+    app.router.add_get("/vtesdecks/{uid}", vtesdecks)
+    return aiohttp.test_utils.TestServer(app), stats
+
+
+def test_normalize():
+    for url in [
+        "https://vdb.im/decks/abc123",
+        "https://vdb.smeea.casa/decks?id=abc123",
+        " https://www.VDB.im/decks/abc123/ ",
+    ]:
+        assert decklists.normalize(url) == "https://vdb.im/decks/abc123"
+    assert decklists.source("https://amaranth.vtes.co.nz/#deck/x1") == (
+        "amaranth",
+        "x1",
+    )
+    # the deck is in the URL
+    assert decklists.source("https://vdb.im/decks/deck?name=A#100001=12") is None
+    with pytest.raises(decklists.DeckError, match="provider"):
+        decklists.source("https://example.com/decks/abc123")
+    with pytest.raises(decklists.DeckError, match="Amaranth"):
+        decklists.source("https://amaranth.vtes.co.nz/")
+
+
+@pytest.mark.asyncio
+async def test_decks(monkeypatch):
+    monkeypatch.setattr(krcg.vtes, "VTES", FakeVTES())
+    server, stats = fake_websites(delay=0.02)
+    async with server:
+        apis = {
+            "vdb": str(server.make_url("/vdb/")),
+            "amaranth": str(server.make_url("/amaranth")),
+            "vtesdecks": str(server.make_url("/vtesdecks/")),
+        }
+        async with decklists.Client(concurrency=4, apis=apis) as client:
+            deck = await client.deck("https://vdb.im/decks/abc123")
+            assert deck.name == "VDB deck"
+            assert deck.author == "Alice"
+            assert deck.date == datetime.date(2024, 1, 1)
+            assert dict(deck) == {"Card A": 12}
+            # cached, and each call builds a new deck
+            deck.name = "Renamed"
+            deck = await client.deck("https://vdb.smeea.casa/decks?id=abc123")
+            assert deck.name == "VDB deck"
+            assert stats["requests"] == 1
+            # the deck is in the URL: no request
+            deck = await client.deck("https://vdb.im/decks/deck?name=A#100001=12")
+            assert deck.name == "A"
+            assert stats["requests"] == 1
+            with pytest.raises(decklists.DeckError, match="not found on VDB"):
+                await client.deck("https://vdb.im/decks/missing")
+            deck = await client.deck("https://vtesdecks.com/deck/abc123")
+            assert deck.date == datetime.date(2024, 1, 3)
+            assert dict(deck) == {"Vampire A": 12, "Card A": 90}
+            with pytest.raises(decklists.DeckError, match="invalid deck"):
+                await client.deck("https://vtesdecks.com/deck/invalid")
+            # concurrent, bounded, results in order
+            urls = [f"https://amaranth.vtes.co.nz/#deck/{i}" for i in range(20)]
+            decks = await client.decks(urls + ["https://example.com"])
+            assert [d.name for d in decks[:-1]] == [
+                f"Amaranth deck {i}" for i in range(20)
+            ]
+            assert dict(decks[0]) == {"Card A": 3, "Vampire A": 12}
+            # UTC timestamp ("Z" suffix)
+            assert decks[0].date == datetime.date(2024, 1, 2)
+            assert isinstance(decks[-1], decklists.DeckError)
+            assert stats["max_concurrent"] == 4
+    # unreachable
+    async with decklists.Client(apis=apis) as client:
+        with pytest.raises(decklists.DeckError, match="reach VDB"):
+            await client.deck("https://vdb.im/decks/other")
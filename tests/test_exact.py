@@ -0,0 +1,69 @@
+import math
+import random
+
+import krcg.seating
+
+from archon_bot import exact
+from archon_bot import seating
+
+
+def fast_total(rounds):
+    pm = krcg.seating.player_mapping(rounds)
+    measure = sum(krcg.seating.measure(pm, r) for r in rounds)
+    return krcg.seating.Score.fast_total(measure, len(rounds))
+
+
+def test_decomposition():
+    # the solver cost is the score up to a constant (the same players, rounds)
+    for players_count in [8, 9, 12, 13]:
+        players = list(range(players_count))
+        rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+        for round_ in rounds:
+            round_.shuffle()
+        solver = exact.Solver(rounds)
+        pm = solver.pm
+
+        def cost():
+            return sum(
+                solver._arrangement_cost([pm[p] for p in table]) for table in rounds[-1]
+            )
+
+        constant = fast_total(rounds) - cost()
+        for _ in range(10):
+            rounds[-1].shuffle()
+            assert math.isclose(fast_total(rounds) - cost(), constant, abs_tol=1e-3)
+
+
+def test_solve():
+    random.seed(4)
+    players = list(range(9))
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+    for round_ in rounds:
+        round_.shuffle()
+    _, score, _ = seating.anneal(
+        [krcg.seating.Round(list(r)) for r in rounds],
+        fixed=2,
+        budget=1,
+        patience=10000,
+    )
+    round_, optimal = exact.Solver(rounds).solve(time_limit=20)
+    assert optimal
+    assert sorted(round_.iter_players()) == players
+    assert [len(table) for table in round_] == [5, 4]
+    rounds[-1] = round_
+    assert fast_total(rounds) <= score.total + 1e-3
+
+
+def test_partitions():
+    # without any cut, each partition of the players into tables is reached once
+    class Exhaustive(exact.Solver):
+        def _ordered(self, tables):
+            partitions.append(frozenset(frozenset(t) for t in tables))
+            self.best = math.inf
+            return super()._ordered(tables)
+
+    partitions = []
+    players = list(range(13))
+    Exhaustive([krcg.seating.Round.from_players(players)]).solve()
+    # 13 players in tables of 5, 4 and 4: 13! / (5! 4! 4! 2!)
+    assert len(partitions) == len(set(partitions)) == 45045
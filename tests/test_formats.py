@@ -0,0 +1,35 @@
+import types
+
+import krcg.vtes
+import pytest
+
+from archon_bot import formats
+
+
+def test_compile_format():
+    data = {
+        "sets": {},
+        "allowed": {"crypt": {}, "library": {}},
+        "banned": {"crypt": {"200001": True}, "library": {"100002": True}},
+    }
+    compiled = formats.compile_format(data)
+    assert compiled.include == frozenset()
+    assert compiled.exclude == {200001, 100002}
+    # cached by content
+    assert formats.compile_format(dict(data)) is compiled
+    assert formats.get_format(compiled.digest, {}) is compiled
+    data["allowed"]["library"]["100002"] = True
+    with pytest.raises(ValueError):
+        formats.compile_format(data)
+    with pytest.raises(ValueError):
+        formats.compile_format({"sets": {"Unknown": True}})
+
+
+def test_sets_index(monkeypatch):
+    cards = [types.SimpleNamespace(id=100001, sets={"Jyhad": []})]
+    monkeypatch.setattr(krcg.vtes, "VTES", cards)
+    assert formats.sets_index() == {"Jyhad": {100001}}
+    assert formats.sets_index() is formats.sets_index()
+    # reloaded with the same cards count: rebuilt
+    cards[:] = [types.SimpleNamespace(id=100001, sets={"Sabbat": []})]
+    assert formats.sets_index() == {"Sabbat": {100001}}
@@ -0,0 +1,244 @@
+import asyncio
+import base64
+import time
+import types
+
+import aiohttp.test_utils
+import aiohttp.web
+import orjson
+import pytest
+
+from archon_bot import db
+from archon_bot import registry
+
+MEMBERS = {
+    "1000001": {"firstname": "Alice", "lastname": "Allison", "countryname": "France"},
+    "1000002": {"firstname": "Bob", "lastname": "Bobson", "countryname": "Italy"},
+}
+
+
+def fake_registry(lifetime: float = 3600, delay: float = 0, failures: int = 0):
+    """A local stand-in for the vekn.net API, and its counters.
+
+    The first registry requests fail (HTTP 503), as many as the given failures.
+    """
+    stats = {"logins": 0, "tokens": set(), "requests": 0, "failures": failures}
+    stats["concurrent"] = stats["max_concurrent"] = 0
+
+    async def login(request):
+        data = await request.post()
+        if data["password"] != "secret":
+            return aiohttp.web.json_response({"data": {"auth": None}})
+        stats["logins"] += 1
+        payload = orjson.dumps({"exp": time.time() + lifetime, "n": stats["logins"]})
+        token = "x." + base64.urlsafe_b64encode(payload).decode().rstrip("=") + ".y"
+        stats["tokens"].add(token)
+        return aiohttp.web.json_response({"data": {"auth": token}})
+
+    async def members(request):
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        if token not in stats["tokens"]:
+            return aiohttp.web.json_response({"data": "unauthorized"}, status=401)
+        stats["requests"] += 1
+        if stats["failures"]:
+            stats["failures"] -= 1
+            raise aiohttp.web.HTTPServiceUnavailable()
+        stats["concurrent"] += 1
+        stats["max_concurrent"] = max(stats["max_concurrent"], stats["concurrent"])
+        await asyncio.sleep(delay)
+        stats["concurrent"] -= 1
+        vekn = request.query["filter"]
+        players = [{"veknid": k, **v} for k, v in MEMBERS.items() if k.startswith(vekn)]
+        return aiohttp.web.json_response({"data": {"players": players}})
+
+    server = aiohttp.web.Application()
+    server.router.add_post("/api/vekn/login", login)
+    server.router.add_get("/api/vekn/registry", members)
+    return aiohttp.test_utils.TestServer(server), stats
+
+
+@pytest.mark.asyncio
+async def test_member():
+    server, stats = fake_registry(delay=0.02)
+    async with server:
+        async with registry.Client(
+            str(server.make_url("/")), "login", "secret", concurrency=2
+        ) as client:
+            member = await client.member("1000001")
+            assert member == registry.Member("1000001", "Alice Allison", "France")
+            with pytest.raises(registry.NotFound, match="not found"):
+                await client.member("1000003")
+            with pytest.raises(registry.NotFound, match="7 digits"):
+                await client.member("100000")
+            # a single login, bounded concurrency
+            await asyncio.gather(*(client.member("1000002") for _ in range(10)))
+            assert stats["logins"] == 1
+            assert stats["requests"] == 13
+            assert stats["max_concurrent"] == 2
+            # revoked token: login again
+            stats["tokens"].clear()
+            assert (await client.member("1000002")).name == "Bob Bobson"
+            assert stats["logins"] == 2
+
+
+@pytest.mark.asyncio
+async def test_token_refresh(monkeypatch):
+    server, stats = fake_registry(lifetime=10)
+    async with server:
+        async with registry.Client(
+            str(server.make_url("/")), "login", "secret"
+        ) as client:
+            await asyncio.gather(*(client.member("1000001") for _ in range(5)))
+            assert stats["logins"] == 1
+            # the token expires soon: refreshed in the background
+            monkeypatch.setattr(registry, "TOKEN_REFRESH", 20)
+            token = await client.token()
+            await asyncio.sleep(0.05)
+            assert stats["logins"] == 2
+            assert await client.token() != token
+            # expired: refreshed before the request
+            client._expiry = time.time() - 1
+            await client.member("1000001")
+            assert stats["logins"] == 3
+
+
+@pytest.mark.asyncio
+async def test_errors():
+    server, _ = fake_registry(delay=0.5)
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "wrong") as client:
+            with pytest.raises(registry.VEKNError, match="authentify"):
+                await client.member("1000001")
+        async with registry.Client(url, "login", "secret", timeout=0.1) as client:
+            with pytest.raises(registry.VEKNError, match="reach"):
+                await client.member("1000001")
+    async with registry.Client(url, "login", "secret") as client:
+        with pytest.raises(registry.VEKNError, match="reach"):
+            await client.member("1000001")
+
+
+@pytest.mark.asyncio
+async def test_lookup(monkeypatch):
+    cache = {}
+
+    async def get_vekn(vekn):
+        return cache.get(vekn)
+
+    async def set_vekn(vekn, name, country):
+        cache[vekn] = name, country, 0.0
+
+    async def get_registry_member(vekn):
+        return None
+
+    monkeypatch.setattr(db, "POOL", types.SimpleNamespace(closed=False))
+    monkeypatch.setattr(db, "get_registry_member", get_registry_member)
+    monkeypatch.setattr(db, "get_vekn", get_vekn)
+    monkeypatch.setattr(db, "set_vekn", set_vekn)
+    server, stats = fake_registry()
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "secret") as client:
+            member = await client.lookup("1000001")
+            assert member.name == "Alice Allison"
+            assert await client.lookup("1000001") == member
+            assert stats["requests"] == 1
+            # not found answers are cached too
+            for _ in range(2):
+                with pytest.raises(registry.NotFound):
+                    await client.lookup("1000003")
+            assert stats["requests"] == 2
+            assert cache == {
+                "1000001": ("Alice Allison", "France", 0.0),
+                "1000003": (None, None, 0.0),
+            }
+        # the database cache is shared
+        async with registry.Client(url, "login", "secret") as client:
+            assert await client.lookup("1000001") == member
+            with pytest.raises(registry.NotFound):
+                await client.lookup("1000003")
+            assert stats["requests"] == 2
+            # expired
+            monkeypatch.setattr(registry, "VEKN_CACHE_TTL", 0)
+            assert await client.lookup("1000001") == member
+            assert stats["requests"] == 3
+    # VEKN is down: stale entries are used
+    async with registry.Client(url, "login", "secret") as client:
+        assert await client.lookup("1000001") == member
+        with pytest.raises(registry.VEKNError, match="reach"):
+            await client.lookup("1000002")
+
+
+@pytest.mark.asyncio
+async def test_lookup_many(monkeypatch):
+    monkeypatch.setattr(registry, "VEKN_BACKOFF", 0.01)
+    server, stats = fake_registry(delay=0.01, failures=3)
+    done = []
+
+    async def callback(count, total):
+        done.append((count, total))
+
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "secret") as client:
+            vekns = ["1000001", "1000002", "1000003"] * 5 + ["100000"]
+            results = await client.lookup_many(vekns, workers=2, callback=callback)
+    assert list(results) == ["1000001", "1000002", "1000003", "100000"]
+    assert results["1000001"].name == "Alice Allison"
+    assert results["1000002"].name == "Bob Bobson"
+    assert isinstance(results["1000003"], registry.NotFound)
+    assert "7 digits" in str(results["100000"])
+    # a single login, failures retried
+    assert stats["logins"] == 1
+    assert stats["requests"] == 4 + 3
+    assert done == [(i, 4) for i in range(1, 5)]
+    # too many failures: the error is returned
+    server, stats = fake_registry(failures=10)
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "secret") as client:
+            results = await client.lookup_many(["1000001"])
+    assert str(results["1000001"]) == "VEKN returned an error: HTTP 503"
+    assert stats["requests"] == registry.VEKN_RETRIES
+
+
+@pytest.mark.asyncio
+async def test_mirror(monkeypatch):
+    dump = [
+        "veknid,firstname,lastname,countryname",
+        "1000001,Élodie,D'Aubigné,France",
+        "1000002,Bob,Bobson,Italy,extra field",
+        ",No,ID,",
+        "1000001,Elodie,Duplicate,France",
+    ]
+    members = list(registry.parse_dump(dump))
+    assert members == [
+        registry.Member("1000001", "Élodie D'Aubigné", "France"),
+        registry.Member("1000002", "Bob Bobson", "Italy"),
+    ]
+    assert registry.search_key(members[0].name) == "elodie d aubigne"
+    mirror = {m.vekn: (m.name, m.country) for m in members}
+
+    async def get_registry_member(vekn):
+        return mirror.get(vekn)
+
+    async def get_vekn(vekn):
+        return None
+
+    async def set_vekn(vekn, name, country):
+        pass
+
+    monkeypatch.setattr(db, "POOL", types.SimpleNamespace(closed=False))
+    monkeypatch.setattr(db, "get_registry_member", get_registry_member)
+    monkeypatch.setattr(db, "get_vekn", get_vekn)
+    monkeypatch.setattr(db, "set_vekn", set_vekn)
+    server, stats = fake_registry()
+    async with server:
+        url = str(server.make_url("/"))
+        async with registry.Client(url, "login", "secret") as client:
+            # the mirror is used first, then the registry
+            assert await client.lookup("1000001") == members[0]
+            assert stats["requests"] == 0
+            with pytest.raises(registry.NotFound):
+                await client.lookup("1000003")
+            assert stats["requests"] == 1
@@ -0,0 +1,60 @@
+import math
+import random
+
+import krcg.seating
+import pytest
+
+from archon_bot import scoring
+
+
+def fast_total(rounds, pm):
+    measure = sum(krcg.seating.measure(pm, r) for r in rounds)
+    return krcg.seating.Score.fast_total(measure, len(rounds))
+
+
+def test_evaluator():
+    for players_count, rounds_count in [(8, 2), (13, 3), (20, 4), (7, 3), (11, 3)]:
+        players = list(range(players_count))
+        if players_count in [7, 11]:
+            rounds = krcg.seating.get_rounds(players, rounds_count)
+        else:
+            rounds = [
+                krcg.seating.Round.from_players(players) for _ in range(rounds_count)
+            ]
+        for round_ in rounds:
+            round_.shuffle()
+        evaluator = scoring.SeatingEvaluator(rounds)
+        pm = evaluator.pm
+        assert math.isclose(evaluator.total, fast_total(rounds, pm))
+        assert evaluator.rules() == pytest.approx(krcg.seating.Score(rounds).rules)
+        for _ in range(200):
+            index = random.randrange(len(rounds))
+            indexes = rounds[index]._global_indexes()
+            (i1, i2), (j1, j2) = i, j = random.sample(list(indexes.values()), 2)
+            swapped = [krcg.seating.Round.copy(r) for r in rounds]
+            table = swapped[index]
+            table[i1][i2], table[j1][j2] = table[j1][j2], table[i1][i2]
+            assert math.isclose(
+                evaluator.evaluate(index, i, j), fast_total(swapped, pm)
+            )
+            if random.random() < 0.5:
+                evaluator.commit()
+                assert rounds == swapped
+                assert math.isclose(evaluator.total, fast_total(rounds, pm))
+
+
+def test_history():
+    players = list(range(40))
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+    # 4 players dropped
+    rounds.append(krcg.seating.Round.from_players(players[:-4]))
+    for round_ in rounds:
+        round_.shuffle()
+    history = scoring.SeatingHistory.from_rounds(rounds[:3])
+    evaluator = scoring.SeatingEvaluator(rounds[3:], history=history)
+    assert math.isclose(evaluator.total, scoring.SeatingEvaluator(rounds).total)
+    assert evaluator.score().rules == krcg.seating.Score(rounds).rules
+    # removing the last round added
+    history.add(rounds[3])
+    history.remove(rounds[3])
+    assert history == scoring.SeatingHistory.from_rounds(rounds[:3])
@@ -0,0 +1,275 @@
+import asyncio
+import collections
+import itertools
+import threading
+import types
+
+import krcg.seating
+import pytest
+
+from archon_bot import db
+from archon_bot import exact
+from archon_bot import seating
+from archon_bot import staggered
+
+
+@pytest.mark.asyncio
+async def test_optimise():
+    players = [str(1000000 + i) for i in range(10)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    reported = []
+
+    async def callback(progress, score):
+        reported.append(progress)
+
+    try:
+        result = await seating.optimise(
+            rounds=rounds,
+            fixed=1,
+            callback=callback,
+            max_iterations=300,
+            chains=2,
+        )
+    finally:
+        seating.shutdown()
+    assert result.rounds[0] == rounds[0]
+    assert sorted(result.rounds[1].iter_players()) == players
+    assert isinstance(result.rounds[1], krcg.seating.Round)
+    assert result.score.rules[0] == 0
+    assert 0 < result.iterations <= 600
+    assert reported == sorted(reported)
+
+
+def test_anneal():
+    players = [str(1000000 + i) for i in range(20)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    # iterations cap
+    _, score, iterations = seating.anneal(
+        rounds, fixed=1, budget=60, patience=10000, max_iterations=500
+    )
+    assert iterations == 500
+    assert score.rules[0] == 0
+    # early stop: no improvement
+    _, _, iterations = seating.anneal(rounds, fixed=1, budget=60, patience=50)
+    assert iterations < 10000
+    # nothing to optimise
+    result, _, iterations = seating.anneal(rounds, fixed=2, budget=60, patience=50)
+    assert iterations == 0
+    assert result == rounds
+
+
+@pytest.mark.asyncio
+async def test_speculation(monkeypatch):
+    monkeypatch.setattr(seating, "SPECULATION_DELAY", 0.01)
+    monkeypatch.setattr(seating, "SEATING_BUDGET", 1)
+    players = [str(1000000 + i) for i in range(10)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    try:
+        # debounced: no result before the computation starts
+        seating.speculate("owner", "key", rounds, fixed=1)
+        assert await seating.speculation("owner", "key") is None
+        seating.speculate("owner", "key", rounds, fixed=1)
+        task = seating.SPECULATIONS["owner"].task
+        # same key: the computation goes on
+        seating.speculate("owner", "key", rounds, fixed=1)
+        assert seating.SPECULATIONS["owner"].task is task
+        await asyncio.sleep(0.05)
+        # players changed
+        assert await seating.speculation("owner", "other") is None
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        seating.speculate("owner", "key", rounds, fixed=1)
+        await asyncio.sleep(0.05)
+        result = await seating.speculation("owner", "key")
+    finally:
+        seating.shutdown()
+    assert result.speculative
+    assert result.rounds[0] == rounds[0]
+    assert sorted(result.rounds[1].iter_players()) == players
+    assert "owner" not in seating.SPECULATIONS
+
+
+@pytest.mark.asyncio
+async def test_speculation_priority(monkeypatch):
+    monkeypatch.setattr(seating, "SPECULATION_DELAY", 0.01)
+    monkeypatch.setattr(seating, "SEATING_BUDGET", 5)
+    players = [str(1000000 + i) for i in range(10)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    try:
+        seating.speculate("owner", "key", rounds, fixed=1)
+        await asyncio.sleep(0.05)
+        task = seating.SPECULATIONS["owner"].task
+        # a round start cancels the running speculative seatings
+        await seating.optimise(rounds, fixed=1, max_iterations=100)
+        assert task.cancelled()
+        assert "owner" not in seating.SPECULATIONS
+        # and new ones wait until it is finished
+        monkeypatch.setattr(seating, "LIVE", 1)
+        seating.speculate("owner", "key", rounds, fixed=1)
+        await asyncio.sleep(0.05)
+        assert not seating.SPECULATIONS["owner"].started
+        monkeypatch.setattr(seating, "LIVE", 0)
+        await asyncio.sleep(0.05)
+        assert seating.SPECULATIONS["owner"].started
+    finally:
+        seating.discard("owner")
+        seating.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cache(monkeypatch):
+    cache = {}
+
+    async def get_seating(key):
+        return cache.get(key)
+
+    async def set_seating(key, data):
+        cache[key] = data
+
+    monkeypatch.setattr(db, "POOL", types.SimpleNamespace(closed=False))
+    monkeypatch.setattr(db, "get_seating", get_seating)
+    monkeypatch.setattr(db, "set_seating", set_seating)
+    players = [str(1000000 + i) for i in range(10)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    shuffled = [rounds[0], krcg.seating.Round.from_players(players[::-1])]
+    # the players order in the round to optimise does not matter
+    assert seating.cache_key(rounds, 1, 0) == seating.cache_key(shuffled, 1, 0)
+    assert seating.cache_key(rounds, 1, 0) != seating.cache_key(rounds, 1, 1)
+    try:
+        result = await seating.optimise(rounds, fixed=1, max_iterations=300, seed=0)
+        assert not result.cached
+        cached = await seating.optimise(shuffled, fixed=1, seed=0)
+        assert cached.cached
+        assert cached.rounds == result.rounds
+        assert cached.score.total == result.score.total
+        # new seed: new computation
+        result = await seating.optimise(rounds, fixed=1, max_iterations=300, seed=1)
+        assert not result.cached
+        # speculative results are as good: cached as well
+        result = await seating.optimise(
+            rounds, fixed=1, max_iterations=300, seed=2, speculative=True
+        )
+        assert result.speculative
+    finally:
+        seating.shutdown()
+    assert len(cache) == 3
+
+
+def test_partition():
+    players = [str(1000000 + i) for i in range(123)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+    for round_ in rounds:
+        round_.shuffle()
+    groups = seating.partition(rounds, 20)
+    # tables of 4 in the last group only
+    assert [len(group) for group in groups] == [20] * 5 + [23]
+    assert sorted(p for group in groups for p in group) == players
+    met = set()
+    for round_ in rounds[:-1]:
+        for table in round_:
+            met.update(itertools.permutations(table, 2))
+    conflicts = sum(
+        (p, q) in met for group in groups for p, q in itertools.combinations(group, 2)
+    )
+    # random groups: about 80 pairs who already met
+    assert conflicts < 40
+    # groups of 10 players at least
+    assert [len(group) for group in seating.partition(rounds[:1] * 2, 5)] == [
+        10
+    ] * 9 + [33]
+
+
+@pytest.mark.asyncio
+async def test_optimise_groups(monkeypatch):
+    monkeypatch.setattr(seating, "SEATING_GROUP_SIZE", 20)
+    players = [str(1000000 + i) for i in range(64)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    rounds[0].shuffle()
+    reported = []
+
+    async def callback(progress, score):
+        reported.append(progress)
+
+    try:
+        result = await seating.optimise(
+            rounds, fixed=1, callback=callback, budget=2, groups=True
+        )
+    finally:
+        seating.shutdown()
+    # groups then repair pass
+    assert reported == sorted(reported)
+    assert reported[-1] <= 1
+    assert result.rounds[0] == rounds[0]
+    assert sorted(result.rounds[1].iter_players()) == players
+    # 12 tables of 5, 1 table of 4
+    assert sorted(len(table) for table in result.rounds[1]) == [4] + [5] * 12
+    # no predator-prey or opponents repeat
+    assert result.score.rules[0] == result.score.rules[3] == 0
+
+
+@pytest.mark.asyncio
+async def test_optimise_exact():
+    players = [str(1000000 + i) for i in range(9)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+    for round_ in rounds:
+        round_.shuffle()
+    reported = []
+
+    async def callback(progress, score):
+        reported.append(progress)
+
+    try:
+        result = await seating.optimise(
+            rounds, fixed=2, callback=callback, budget=5, exact=True
+        )
+    finally:
+        seating.shutdown()
+    assert result.optimal
+    assert result.rounds[:2] == rounds[:2]
+    assert sorted(result.rounds[2].iter_players()) == players
+    assert reported and reported == sorted(reported)
+
+
+def test_stop():
+    # the exact search and the repair pass honour the stop event
+    players = [str(1000000 + i) for i in range(13)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(3)]
+    for round_ in rounds:
+        round_.shuffle()
+    stop = threading.Event()
+    stop.set()
+    solver = exact.Solver(rounds)
+    round_, optimal = solver.solve(incumbent=rounds[-1], stop=stop)
+    assert not optimal
+    assert solver.nodes == 1000
+    reported = []
+    _, _, steps = seating.repair(
+        rounds,
+        budget=10,
+        patience=10**9,
+        callback=lambda progress, score: reported.append(progress),
+        stop=stop,
+    )
+    assert steps < 10**6
+    assert reported[-1] == 1
+
+
+def test_staggered_templates():
+    for players_count in staggered.PLAYERS_COUNTS:
+        players = [str(1000000 + i) for i in range(players_count)]
+        for rounds_count in staggered.ROUNDS_COUNTS:
+            rounds = staggered.get_rounds(players, rounds_count)
+            template = [
+                krcg.seating.Round(r)
+                for r in staggered.templates()[str(players_count)][str(rounds_count)]
+            ]
+            played = collections.Counter()
+            for round_ in rounds:
+                assert all(len(table) in [4, 5] for table in round_)
+                played.update(round_.iter_players())
+            assert played == {p: rounds_count for p in players}
+            # relabeling players does not change the score
+            assert krcg.seating.Score(rounds).rules == (
+                krcg.seating.Score(template).rules
+            )
+    assert staggered.get_rounds(players, 12) is None
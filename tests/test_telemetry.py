@@ -0,0 +1,76 @@
+import krcg.seating
+import orjson
+import pytest
+
+from archon_bot import seating
+from archon_bot import telemetry
+
+
+@pytest.mark.asyncio
+async def test_record():
+    players = [str(1000000 + i) for i in range(20)]
+    rounds = [krcg.seating.Round.from_players(players) for _ in range(2)]
+    try:
+        result = await seating.optimise(
+            rounds=rounds, fixed=1, budget=1, patience=10**6, chains=2
+        )
+    finally:
+        seating.shutdown()
+    data = orjson.loads(orjson.dumps(telemetry.record(result)))
+    assert data["players"] == 20
+    assert data["score"] == result.score.total
+    assert {report["chain"] for report in data["trace"]} == {0, 1}
+    for report in data["trace"]:
+        assert len(report["rules"]) == 9
+        assert 0 <= report["accepts"] <= report["trials"]
+        assert report["improves"] <= report["accepts"]
+    # the best chain score is the result score
+    assert min(report["score"] for report in data["trace"]) == pytest.approx(
+        data["score"]
+    )
+    report = telemetry.render(data, 2)
+    assert report.startswith("Round 2: 20 players, 2 chains")
+    assert "Best found at" in report
+    assert report.splitlines()[-1].startswith(" final")
+
+
+def test_render():
+    data = {
+        "players": 30,
+        "iterations": 400,
+        "elapsed": 2.0,
+        "cached": False,
+        "optimal": False,
+        "groups": True,
+        "score": 3.0,
+        "rules": [0, 0, 0, 0, 0, 0, 3, 0, 0],
+        "trace": [
+            {
+                "chain": chain,
+                "elapsed": elapsed,
+                "score": score,
+                "rules": [0, 0, 0, 0, 0, 0, score, 0, 0],
+                "trials": 100,
+                "accepts": 50,
+                "improves": 1,
+            }
+            for chain, elapsed, score in [
+                (0, 0.5, 5),
+                (1, 0.6, 4),
+                (0, 1.0, 1),
+                (1, 2.0, 2),
+            ]
+        ],
+    }
+    lines = telemetry.render(data).splitlines()
+    assert lines[0] == "30 players, 2 groups, 400 iterations, 2.0s"
+    # groups scores add up: the best (3) is reached at the end
+    assert lines[1] == "Best found at 2.0s (100%), acceptance rate 50%"
+    # empty rows are skipped
+    assert [line.split()[:2] for line in lines[4:-2]] == [
+        ["0.6s", "9"],
+        ["1.0s", "5"],
+        ["2.0s", "3"],
+    ]
+    data.update(trace=[], cached=True)
+    assert telemetry.render(data).splitlines()[1] == "Cached seating: no optimisation"
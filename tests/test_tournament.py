@@ -1,7 +1,13 @@
 import dataclasses
+import itertools
+import krcg.seating
 import pytest
 
+from archon_bot import registry
+from archon_bot import scoring
+from archon_bot import seating
 from archon_bot import tournament
+from archon_bot import utils
 
 
 @pytest.mark.asyncio
@@ -28,6 +34,14 @@ async def test_tournament():
         "include": [],
         "extra": {},
         "flags": 0,
+        "format": "",
+        "history": {
+            "pairs": "",
+            "players": [],
+            "position": "",
+            "relationships": "",
+            "rounds": 0,
+        },
         "max_rounds": 0,
         "name": "Test Tournament",
         "notes": {},
@@ -72,3 +86,233 @@ async def test_tournament():
     assert tourney.players[doug.vekn].playing is True
     assert tourney.players[emily.vekn].name == "Emily"
     assert tourney.players[emily.vekn].playing is True
+
+
+@pytest.mark.asyncio
+async def test_change_vekn(monkeypatch):
+    tourney = tournament.Tournament(name="Test Tournament")
+    for i in range(8):
+        await tourney.add_player(name=f"Player {i}")
+    previous = list(tourney.players)[0]
+    for _ in range(2):
+        round_ = krcg.seating.Round.from_players(list(tourney.players))
+        round_.shuffle()
+        tourney.rounds.append(tournament.Round(seating=round_))
+    tourney._seating_history(2)
+    await tourney.add_player(
+        vekn="1000001",
+        prev_vekn=previous,
+        judge=True,
+        member=registry.Member("1000001", "Alice", "France"),
+    )
+    # the player keeps their history under the new VEKN#
+    history = tourney._seating_history(2)
+    assert "1000001" in history.players
+    assert previous not in history.players
+    assert history == scoring.SeatingHistory.from_rounds(
+        [r.seating for r in tourney.rounds]
+    )
+    # and the next round is seated with it
+    seated = []
+
+    async def optimise(rounds, fixed, history, **kwargs):
+        seated.append(history)
+        return seating.SeatingResult(rounds, None, 0, 0)
+
+    monkeypatch.setattr(seating, "optimise", optimise)
+    tourney.current_round = 2
+    tourney.state = tournament.TournamentState.WAITING_FOR_START
+    for player in tourney.players.values():
+        player.playing = True
+    await tourney.start_round(None)
+    assert seated == [history]
+
+
+@pytest.mark.asyncio
+async def test_add_players(monkeypatch):
+    checked = []
+
+    async def lookup_many(vekns, callback=None):
+        vekns = list(vekns)
+        checked.extend(vekns)
+        return {
+            vekn: (
+                registry.Member(vekn, f"Member {vekn}", "France")
+                if vekn != "1000003"
+                else registry.NotFound("VEKN ID# not found")
+            )
+            for vekn in vekns
+        }
+
+    monkeypatch.setattr(registry.CLIENT, "lookup_many", lookup_many)
+    tourney = tournament.Tournament(name="Test Tournament")
+    errors = await tourney.add_players(
+        [("1000001", "Alice"), ("#1000002", ""), ("1000003", "Claire"), ("", "Doug")]
+    )
+    assert checked == ["1000001", "1000002", "1000003"]
+    assert errors == {2: "VEKN ID# not found"}
+    assert [p.name for p in tourney.players.values()] == [
+        "Alice (Member 1000001)",
+        "Member 1000002",
+        "Doug",
+    ]
+
+
+def test_results_table():
+    rounds = [
+        tournament.Round(
+            seating=krcg.seating.Round([["1", "2", "3", "4"]]),
+            results={
+                "1": tournament.Score(gw=1, vp=3, tp=60),
+                "2": tournament.Score(vp=1, tp=36),
+                "3": tournament.Score(tp=18),
+                "4": tournament.Score(tp=18),
+            },
+        ),
+        tournament.Round(
+            seating=krcg.seating.Round([["1", "2", "3", "4", "5"]]),
+            results={
+                "2": tournament.Score(gw=1, vp=2, tp=60),
+                "5": tournament.Score(vp=2, tp=48),
+                "1": tournament.Score(vp=1, tp=36),
+            },
+        ),
+    ]
+    table = tournament.ResultsTable.from_rounds(rounds)
+    assert table.player_score("1") == (1, 4.0, 96)
+    assert table.player_rounds_played("3") == 2
+    assert table.player_rounds_played("6") == 0
+    tourney = tournament.Tournament(name="Test Tournament", rounds=rounds)
+    assert tourney.player_score("1") == tournament.Score(gw=1, vp=4, tp=96)
+    assert tourney.player_score("6") == tournament.Score()
+    assert table.ranking(dropped=["4"]) == [
+        (1, "1", (1, 4.0, 96)),
+        (2, "2", (1, 3.0, 96)),
+        (3, "5", (0, 2.0, 48)),
+        (4, "3", (0, 0.0, 18)),
+        (5, "4", (0, 0.0, 18)),
+    ]
+    # JSON round trip, seated players without results included
+    rounds.append(
+        tournament.Round(seating=krcg.seating.Round([["1", "2", "3", "4", "6"]]))
+    )
+    table = tournament.ResultsTable.from_rounds(rounds)
+    decoded = tournament.ResultsTable.from_json(table.to_json())
+    assert decoded.to_json() == table.to_json()
+    assert decoded.to_json()[2] == {"seated": ["1", "2", "3", "4", "6"], "results": {}}
+    assert decoded.player_rounds_played("6") == 1
+    assert decoded.player_score("1") == (1, 4.0, 96)
+    tourney = tournament.Tournament(name="Test Tournament", rounds=rounds)
+    assert tourney.player_rounds_played("6", table) == 1
+    assert tourney.player_score("6", table) == tournament.Score()
+
+
+def test_zero_score():
+    score = tournament.ZERO_SCORE
+    score += tournament.Score(gw=1, vp=3, tp=60)
+    assert score == tournament.Score(gw=1, vp=3, tp=60)
+    assert tournament.ZERO_SCORE == tournament.Score()
+
+
+def test_round_freeze():
+    round_ = tournament.Round(
+        seating=krcg.seating.Round([["1", "2", "3", "4"]]),
+        results={"1": tournament.Score(vp=4)},
+    )
+    assert not round_.frozen
+    round_.score()
+    round_.freeze()
+    assert round_.frozen
+    # decoded rounds stay frozen
+    decoded = utils.dictas(tournament.Round, dataclasses.asdict(round_))
+    assert decoded.frozen
+    # judge fixes thaw the round
+    decoded.thaw()
+    assert not decoded.frozen
+
+
+def test_legality():
+    tourney = tournament.Tournament(name="Test", include=[100001, 100002])
+    legality = tourney.legality()
+    assert legality.is_legal(100001)
+    assert not legality.is_legal(100003)
+    # compiled once
+    assert tourney.legality() is legality
+    # recompiled when the format changes
+    tourney.include = []
+    tourney.exclude = [100001]
+    assert not tourney.legality().is_legal(100001)
+    assert tourney.legality().is_legal(100003)
+
+
+@pytest.mark.asyncio
+async def test_check_decks():
+    tourney = tournament.Tournament(name="Test")
+    for i in range(120):
+        vekn = str(1000000 + i)
+        tourney.players[vekn] = tournament.Player(
+            vekn=vekn, deck={"cards": {}} if i % 2 else {}
+        )
+    progress = []
+
+    async def callback(done, total):
+        progress.append((done, total))
+
+    issues = await tourney.check_decks(callback)
+    assert list(issues) == [str(1000000 + i) for i in range(1, 120, 2)]
+    assert progress == [(50, 60), (60, 60)]
+
+
+@pytest.mark.asyncio
+async def test_make_staggered():
+    tourney = tournament.Tournament(name="Test Tournament")
+    tourney.open_checkin()
+    for i in range(7):
+        await tourney.add_player(name=f"Player {i}")
+
+    async def progress(**kwargs):
+        raise AssertionError("the template should be used")
+
+    await tourney.make_staggered(2, progress)
+    assert tourney.flags & tournament.TournamentFlag.STAGGERED
+    assert len(tourney.rounds) == 3
+    round, result = await tourney.start_round(progress)
+    assert result is None
+    assert round is tourney.rounds[0]
+    assert sum(p.playing for p in tourney.players.values()) in [4, 5]
+
+
+@pytest.mark.asyncio
+async def test_seating_history():
+    tourney = tournament.Tournament(name="Test Tournament")
+    for i in range(13):
+        await tourney.add_player(name=f"Player {i}")
+    players = list(tourney.players)
+    for _ in range(3):
+        seating = krcg.seating.Round.from_players(players)
+        seating.shuffle()
+        tourney.rounds.append(tournament.Round(seating=seating))
+    seatings = [r.seating for r in tourney.rounds]
+    # computed anew, then updated incrementally
+    assert tourney._seating_history(2) == scoring.SeatingHistory.from_rounds(
+        seatings[:2]
+    )
+    assert tourney._seating_history(3) == scoring.SeatingHistory.from_rounds(seatings)
+    assert tourney._seating_history(2) == scoring.SeatingHistory.from_rounds(
+        seatings[:2]
+    )
+    decoded = utils.dictas(tournament.Tournament, dataclasses.asdict(tourney))
+    assert decoded.history == tourney.history
+    # the player removed, the table is optimised with the history
+    tourney.current_round = 3
+    tourney.state = tournament.TournamentState.PLAYING
+    table = tourney.rounds[-1].seating[0]
+    tourney.round_remove(table[0])
+    assert len(table) == 4
+    best = min(
+        scoring.SeatingEvaluator(
+            seatings[:2] + [krcg.seating.Round([list(p)] + seatings[2][1:])]
+        ).total
+        for p in itertools.permutations(table)
+    )
+    assert scoring.SeatingEvaluator(seatings).total == pytest.approx(best)
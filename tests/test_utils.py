@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from archon_bot import utils
+
+
+@pytest.mark.asyncio
+async def test_progress_reporter():
+    sent = []
+
+    async def send(text):
+        await asyncio.sleep(0.01)
+        sent.append(text)
+
+    def render(done, total):
+        return {"text": f"{done * 10 // total}/10"}
+
+    async with utils.ProgressReporter(send, render, interval=0.05) as progress:
+        for i in range(101):
+            # the callback never waits for the sender
+            await asyncio.wait_for(progress(i, 100), 0.001)
+            await asyncio.sleep(0.001)
+        # the latest progress is sent
+        await asyncio.sleep(0.1)
+        # unchanged: not sent again
+        await progress(100, 100)
+        await asyncio.sleep(0.1)
+    # coalesced: the first update, then at most one every interval
+    assert sent[0] == "0/10"
+    assert sent[-1] == "10/10"
+    assert len(sent) < 10
+    assert len(sent) == len(set(sent))
+    # dropped on exit
+    async with utils.ProgressReporter(send, render, interval=0.05) as progress:
+        await progress(1, 1)
+    assert sent[-1] == "10/10"